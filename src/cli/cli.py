@@ -2,6 +2,10 @@
 
 import click
 import random
+import time
+import uuid
+from config import CHAT_STREAMING
+from cli.lazy_handler import LazyCommandHandler
 
 # Color palette
 NEON_PINK = 'bright_magenta'
@@ -72,7 +76,70 @@ def hal_speak(text):
     return random.choice(responses)
 
 
+def echo_result(result, color):
+    if isinstance(result, dict):
+        if result.get('status') == 'error':
+            click.echo(synthwave_style(
+                "Error: {}", NEON_PINK).format(result.get('data')))
+            return
+        result = result.get('data')
+    click.echo(synthwave_style(hal_speak(result), color))
+
+
+def stream_chat(command_handler, data):
+    click.echo(synthwave_style("HAL-9001: ", NEON_PURPLE), nl=False)
+    started = time.perf_counter()
+    first_token_at = None
+    model = None
+    events = command_handler.stream_command("chat", data)
+    try:
+        for event in events:
+            if event["event"] == "token":
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                click.echo(synthwave_style(event["data"], NEON_PURPLE), nl=False)
+            elif event["event"] == "model":
+                # The first answer looked unsure, a larger model is retrying
+                click.echo(click.style(
+                    f"\n(escalating to {event['data']})", dim=True))
+                click.echo(synthwave_style("HAL-9001: ", NEON_PURPLE), nl=False)
+            elif event.get("status") == "error":
+                click.echo(synthwave_style(
+                    "Error: {}", NEON_PINK).format(event.get("data")))
+                return
+            else:
+                model = event.get("model")
+                if first_token_at is None:
+                    # Nothing was streamed (e.g. a cached answer), print it whole
+                    click.echo(synthwave_style(str(event.get("data")), NEON_PURPLE), nl=False)
+    except KeyboardInterrupt:
+        # Closing the stream aborts the in-flight request
+        events.close()
+        click.echo(synthwave_style(" [cancelled]", NEON_PINK))
+        return
+    click.echo()
+    if first_token_at is not None:
+        click.echo(click.style(
+            f"({model or 'unknown model'}, first token {first_token_at - started:.2f}s, "
+            f"total {time.perf_counter() - started:.2f}s)", dim=True))
+
+
 def create_cli(command_handler):
+    # Accept either a ready CommandHandler or a factory that builds one on
+    # first use, so parsing argv never pays for the LLM/database setup.
+    if not hasattr(command_handler, "handle_command"):
+        command_handler = LazyCommandHandler(command_handler)
+
+    def complete_names(kind):
+        # Tab completion of entity names, served by the name index
+        def complete(ctx, param, incomplete):
+            result = command_handler.handle_command(
+                "name", {"action": "complete", "kind": kind, "prefix": incomplete})
+            if result.get("status") != "success":
+                return []
+            return result.get("data") or []
+        return complete
+
     @click.group(cls=SynthwaveGroup, invoke_without_command=True)
     @click.pass_context
     def cli(ctx):
@@ -87,6 +154,25 @@ def create_cli(command_handler):
         """Display help information"""
         click.echo(ctx.parent.get_help())
 
+    @cli.command()
+    @click.option('--socket', 'socket_path', default=None, help='Unix socket path to listen on')
+    @click.pass_context
+    def serve(ctx, socket_path):
+        """Run the daemon that keeps HAL-9001 warm"""
+        from engine.daemon import serve as run_daemon
+        from config import DAEMON_SOCKET
+
+        handler = ctx.obj.handler if isinstance(
+            ctx.obj, LazyCommandHandler) else ctx.obj
+        try:
+            run_daemon(handler, socket_path or DAEMON_SOCKET,
+                       on_ready=lambda path: click.echo(synthwave_style(
+                           f"HAL-9001 daemon listening on {path}", NEON_GREEN)))
+        except RuntimeError as e:
+            # Another daemon already owns the socket
+            click.echo(synthwave_style("Error: {}", NEON_PINK).format(e))
+            ctx.exit(1)
+
     @cli.group(cls=SynthwaveGroup, invoke_without_command=True)
     @click.pass_context
     def project(ctx):
@@ -99,7 +185,7 @@ def create_cli(command_handler):
     def list(ctx):
         """List all projects"""
         result = ctx.obj.handle_command("project", {"action": "list"})
-        click.echo(synthwave_style(hal_speak(result), NEON_PURPLE))
+        echo_result(result, NEON_PURPLE)
 
     @project.command()
     @click.argument('name')
@@ -108,32 +194,32 @@ def create_cli(command_handler):
         """Add a new project"""
         result = ctx.obj.handle_command(
             "project", {"action": "add", "name": name})
-        click.echo(synthwave_style(hal_speak(result), NEON_GREEN))
+        echo_result(result, NEON_GREEN)
 
     @project.command()
-    @click.argument('name')
+    @click.argument('name', shell_complete=complete_names('project'))
     @click.pass_context
     def remove(ctx, name):
         """Remove a project"""
         result = ctx.obj.handle_command(
             "project", {"action": "remove", "name": name})
-        click.echo(synthwave_style(hal_speak(result), NEON_PINK))
+        echo_result(result, NEON_PINK)
 
     @project.command()
-    @click.argument('name')
+    @click.argument('name', shell_complete=complete_names('project'))
     @click.pass_context
     def info(ctx, name):
         """Get info about a specific project"""
         result = ctx.obj.handle_command(
             "project", {"action": "info", "name": name})
-        click.echo(synthwave_style(hal_speak(result), NEON_BLUE))
+        echo_result(result, NEON_BLUE)
 
     @project.command()
     @click.pass_context
     def chat(ctx):
         """Chat about projects"""
         result = ctx.obj.handle_command("project", {"action": "chat"})
-        click.echo(synthwave_style(hal_speak(result), NEON_PURPLE))
+        echo_result(result, NEON_PURPLE)
 
     @cli.group(cls=SynthwaveGroup, invoke_without_command=True)
     @click.pass_context
@@ -147,41 +233,42 @@ def create_cli(command_handler):
     def list(ctx):
         """List all skills"""
         result = ctx.obj.handle_command("skill", {"action": "list"})
-        click.echo(synthwave_style(hal_speak(result), NEON_GREEN))
+        echo_result(result, NEON_GREEN)
 
     @skill.command()
     @click.argument('name')
+    @click.option('--parent', default=None, help='Name of the parent skill', shell_complete=complete_names('skill'))
     @click.pass_context
-    def add(ctx, name):
+    def add(ctx, name, parent):
         """Add a new skill"""
         result = ctx.obj.handle_command(
-            "skill", {"action": "add", "name": name})
-        click.echo(synthwave_style(hal_speak(result), NEON_PINK))
+            "skill", {"action": "add", "name": name, "parent": parent})
+        echo_result(result, NEON_PINK)
 
     @skill.command()
-    @click.argument('name')
+    @click.argument('name', shell_complete=complete_names('skill'))
     @click.pass_context
     def remove(ctx, name):
         """Remove a skill"""
         result = ctx.obj.handle_command(
             "skill", {"action": "remove", "name": name})
-        click.echo(synthwave_style(hal_speak(result), NEON_BLUE))
+        echo_result(result, NEON_BLUE)
 
     @skill.command()
-    @click.argument('name')
+    @click.argument('name', shell_complete=complete_names('skill'))
     @click.pass_context
     def info(ctx, name):
         """Get info about a specific skill"""
         result = ctx.obj.handle_command(
             "skill", {"action": "info", "name": name})
-        click.echo(synthwave_style(hal_speak(result), NEON_PURPLE))
+        echo_result(result, NEON_PURPLE)
 
     @skill.command()
     @click.pass_context
     def chat(ctx):
         """Chat about skills"""
         result = ctx.obj.handle_command("skill", {"action": "chat"})
-        click.echo(synthwave_style(hal_speak(result), NEON_GREEN))
+        echo_result(result, NEON_GREEN)
 
     @cli.group(cls=SynthwaveGroup, invoke_without_command=True)
     @click.pass_context
@@ -191,35 +278,38 @@ def create_cli(command_handler):
             click.echo(ctx.get_help())
 
     @schedule.command()
+    @click.option('--days', type=int, default=7, help='Number of days to plan, starting today')
+    @click.option('--explain', is_flag=True, help='Have the assistant explain the generated schedule')
     @click.pass_context
-    def generate(ctx):
+    def generate(ctx, days, explain):
         """Generate a schedule"""
-        result = ctx.obj.handle_command("schedule", {"action": "generate"})
-        click.echo(synthwave_style(hal_speak(result), NEON_BLUE))
+        result = ctx.obj.handle_command(
+            "schedule", {"action": "generate", "days": days, "explain": explain})
+        echo_result(result, NEON_BLUE)
 
     @schedule.command()
     @click.pass_context
     def print(ctx):
         """Print the current schedule"""
         result = ctx.obj.handle_command("schedule", {"action": "print"})
-        click.echo(synthwave_style(hal_speak(result), NEON_PURPLE))
+        echo_result(result, NEON_PURPLE)
 
     @schedule.command()
-    @click.option('--time', required=True, help='Time of the task to patch')
-    @click.option('--task', required=True, help='New task description')
+    @click.option('--time', required=True, help='Start time, HH:MM today or YYYY-MM-DD HH:MM')
+    @click.option('--task', required=True, help='Name of the task to put there', shell_complete=complete_names('task'))
     @click.pass_context
     def patch(ctx, time, task):
         """Patch the current schedule"""
         result = ctx.obj.handle_command(
             "schedule", {"action": "patch", "time": time, "task": task})
-        click.echo(synthwave_style(hal_speak(result), NEON_GREEN))
+        echo_result(result, NEON_GREEN)
 
     @schedule.command()
     @click.pass_context
     def chat(ctx):
         """Chat about the schedule"""
         result = ctx.obj.handle_command("schedule", {"action": "chat"})
-        click.echo(synthwave_style(hal_speak(result), NEON_PINK))
+        echo_result(result, NEON_PINK)
 
     @cli.command()
     @click.option('--mood', type=click.Choice(['good', 'neutral', 'bad', 'none']), default='none', help='Your current mood')
@@ -227,7 +317,7 @@ def create_cli(command_handler):
     def checkin(ctx, mood):
         """Perform a check-in"""
         result = ctx.obj.handle_command("checkin", {"mood": mood})
-        click.echo(synthwave_style(hal_speak(result), NEON_PINK))
+        echo_result(result, NEON_PINK)
 
     @cli.group(cls=SynthwaveGroup, invoke_without_command=True)
     @click.pass_context
@@ -241,21 +331,21 @@ def create_cli(command_handler):
     def settings(ctx):
         """Manage user settings"""
         result = ctx.obj.handle_command("user", {"action": "settings"})
-        click.echo(synthwave_style(hal_speak(result), NEON_BLUE))
+        echo_result(result, NEON_BLUE)
 
     @user.command()
     @click.pass_context
     def stats(ctx):
         """View user statistics"""
         result = ctx.obj.handle_command("user", {"action": "stats"})
-        click.echo(synthwave_style(hal_speak(result), NEON_GREEN))
+        echo_result(result, NEON_GREEN)
 
     @user.command()
     @click.pass_context
     def account(ctx):
         """Manage user account"""
         result = ctx.obj.handle_command("user", {"action": "account"})
-        click.echo(synthwave_style(hal_speak(result), NEON_PURPLE))
+        echo_result(result, NEON_PURPLE)
 
     @cli.group(cls=SynthwaveGroup, invoke_without_command=True)
     @click.pass_context
@@ -271,30 +361,75 @@ def create_cli(command_handler):
         """Add a new log entry"""
         result = ctx.obj.handle_command(
             "log", {"action": "add", "entry": entry})
-        click.echo(synthwave_style(hal_speak(result), NEON_GREEN))
+        echo_result(result, NEON_GREEN)
 
     @log.command()
+    @click.option('--limit', type=click.IntRange(min=1), default=None, help='Entries per page')
+    @click.option('--page-token', default=None, help='Continue from a previous page')
+    @click.option('--all', 'all_pages', is_flag=True, help='Keep fetching until the last entry')
     @click.pass_context
-    def list(ctx):
+    def list(ctx, limit, page_token, all_pages):
         """List all log entries"""
-        result = ctx.obj.handle_command("log", {"action": "list"})
-        click.echo(synthwave_style(hal_speak(result), NEON_BLUE))
+        data = {"action": "list", "limit": limit, "page_token": page_token}
+        result = ctx.obj.handle_command("log", data)
+        echo_result(result, NEON_BLUE)
+        # One page in memory at a time; each is printed as soon as it arrives
+        while all_pages and result.get("status") == "success" and result.get("next_page_token"):
+            result = ctx.obj.handle_command(
+                "log", {**data, "page_token": result["next_page_token"]})
+            click.echo(synthwave_style(str(result.get("data")), NEON_BLUE))
+        if not all_pages and result.get("next_page_token"):
+            click.echo(click.style(
+                f"More entries: --page-token {result['next_page_token']}", dim=True))
 
     @log.command()
     @click.argument('query')
-    @click.pass_context
-    def search(ctx, query):
-        """Search log entries"""
-        result = ctx.obj.handle_command(
-            "log", {"action": "search", "query": query})
-        click.echo(synthwave_style(hal_speak(result), NEON_PURPLE))
+    @click.option('--kind', 'kinds', multiple=True, type=click.Choice(['log', 'checkin', 'task', 'project']),
+                  help='Only search these kinds of entries (repeatable)')
+    @click.option('--since', default=None, help='Entries from this date on (YYYY-MM-DD)')
+    @click.option('--until', default=None, help='Entries up to this date (YYYY-MM-DD)')
+    @click.option('--project', default=None, help='Only entries linked to this project',
+                  shell_complete=complete_names('project'))
+    @click.option('--skill', default=None, help='Only entries linked to this skill',
+                  shell_complete=complete_names('skill'))
+    @click.option('--tag', default=None, help='Only entries with this tag')
+    @click.option('--limit', type=click.IntRange(min=1), default=None, help='Results per page')
+    @click.option('--page-token', default=None, help='Continue from a previous page')
+    @click.pass_context
+    def search(ctx, query, kinds, since, until, project, skill, tag, limit, page_token):
+        """Search logs, check-ins, tasks and projects"""
+        result = ctx.obj.handle_command("log", {
+            "action": "search", "query": query, "kinds": [*kinds], "since": since, "until": until,
+            "project": project, "skill": skill, "tag": tag, "limit": limit, "page_token": page_token})
+        echo_result(result, NEON_PURPLE)
+        if result.get("next_page_token"):
+            click.echo(click.style(
+                f"More results: --page-token {result['next_page_token']}", dim=True))
 
     @log.command()
-    @click.pass_context
-    def export(ctx):
-        """Export log entries"""
-        result = ctx.obj.handle_command("log", {"action": "export"})
-        click.echo(synthwave_style(hal_speak(result), NEON_PINK))
+    @click.option('--kind', 'kinds', multiple=True, default=['logs'], show_default=True,
+                  type=click.Choice(['logs', 'checkins', 'tasks', 'projects']),
+                  help='What to export (repeatable), one file each')
+    @click.option('--format', 'fmt', type=click.Choice(['jsonl', 'csv', 'parquet']), default='jsonl',
+                  show_default=True, help='Parquet needs pyarrow and is written as <kind>-NNNNN.parquet parts')
+    @click.option('--output', '-o', 'directory', default='.', show_default=True,
+                  type=click.Path(file_okay=False, resolve_path=True), help='Directory to write to')
+    @click.option('--compress', 'compression', type=click.Choice(['gzip', 'zstd', 'none']), default=None,
+                  help='Compress the output (Parquet: the column codec, default snappy)')
+    @click.option('--since', default=None, help='Entries from this date on (YYYY-MM-DD)')
+    @click.option('--until', default=None, help='Entries up to this date (YYYY-MM-DD)')
+    @click.option('--user', default=None, help='Export this user instead of the current one')
+    @click.option('--all-users', is_flag=True, help='Export every user')
+    @click.option('--resume', is_flag=True, help='Continue an interrupted export from its checkpoint')
+    @click.option('--batch-size', type=int, default=None, help='Documents per database round trip')
+    @click.pass_context
+    def export(ctx, kinds, fmt, directory, compression, since, until, user, all_users, resume, batch_size):
+        """Export logs, check-ins, tasks or projects to JSONL, CSV or Parquet"""
+        result = ctx.obj.handle_command("log", {
+            "action": "export", "kinds": [*kinds], "format": fmt, "directory": directory,
+            "compression": compression, "since": since, "until": until, "user": user,
+            "all_users": all_users, "resume": resume, "batch_size": batch_size})
+        echo_result(result, NEON_PINK)
 
     @cli.group(cls=SynthwaveGroup, invoke_without_command=True)
     @click.pass_context
@@ -310,35 +445,44 @@ def create_cli(command_handler):
         """Add a new task"""
         result = ctx.obj.handle_command(
             "task", {"action": "add", "name": name})
-        click.echo(synthwave_style(hal_speak(result), NEON_GREEN))
+        echo_result(result, NEON_GREEN)
 
     @task.command()
     @click.pass_context
     def list(ctx):
         """List all tasks"""
         result = ctx.obj.handle_command("task", {"action": "list"})
-        click.echo(synthwave_style(hal_speak(result), NEON_BLUE))
+        echo_result(result, NEON_BLUE)
+
+    @task.command(name='import')
+    @click.argument('file', type=click.File('r'))
+    @click.pass_context
+    def import_tasks(ctx, file):
+        """Add one task per line of FILE ('-' for stdin)"""
+        result = ctx.obj.handle_command(
+            "task", {"action": "import", "names": file.read().splitlines()})
+        echo_result(result, NEON_GREEN)
 
     @task.command()
-    @click.argument('name')
+    @click.argument('name', shell_complete=complete_names('task'))
     @click.pass_context
     def complete(ctx, name):
         """Mark a task as complete"""
         result = ctx.obj.handle_command(
             "task", {"action": "complete", "name": name})
-        click.echo(synthwave_style(hal_speak(result), NEON_PURPLE))
+        echo_result(result, NEON_PURPLE)
 
     @task.command()
-    @click.argument('name')
+    @click.argument('name', shell_complete=complete_names('task'))
     @click.pass_context
     def delete(ctx, name):
         """Delete a task"""
         result = ctx.obj.handle_command(
             "task", {"action": "delete", "name": name})
-        click.echo(synthwave_style(hal_speak(result), NEON_PINK))
+        echo_result(result, NEON_PINK)
 
     @task.command()
-    @click.argument('name')
+    @click.argument('name', shell_complete=complete_names('task'))
     @click.option('--new-name', help='New name for the task')
     @click.option('--description', help='New description for the task')
     @click.pass_context
@@ -350,23 +494,31 @@ def create_cli(command_handler):
         if description:
             data["description"] = description
         result = ctx.obj.handle_command("task", data)
-        click.echo(synthwave_style(hal_speak(result), NEON_GREEN))
+        echo_result(result, NEON_GREEN)
 
     # src/cli/cli.py
 
 
     @cli.command()
+    @click.option('--stream/--no-stream', default=CHAT_STREAMING, help='Print the response as it is generated')
+    @click.option('--no-cache', is_flag=True, help='Always ask the model instead of reusing cached answers')
     @click.pass_context
-    def chat(ctx):
+    def chat(ctx, stream, no_cache):
         """Start a chat session"""
         click.echo(synthwave_style("Starting chat session...", NEON_BLUE))
+        # Lets the handler keep this conversation's memory between turns
+        session_id = uuid.uuid4().hex
         while True:
             user_input = click.prompt(synthwave_style(
                 "You", NEON_GREEN), prompt_suffix=": ")
             if user_input.lower() in ['exit', 'quit', 'bye']:
                 click.echo(synthwave_style("Ending chat session...", NEON_BLUE))
                 break
-            result = ctx.obj.handle_command("chat", {"input": user_input})
+            data = {"input": user_input, "session_id": session_id, "no_cache": no_cache}
+            if stream:
+                stream_chat(ctx.obj, data)
+                continue
+            result = ctx.obj.handle_command("chat", data)
 
             if isinstance(result, dict):
                 status = result.get('status', 'error')
@@ -393,7 +545,7 @@ def create_cli(command_handler):
     def list(ctx):
         """List all routines"""
         result = ctx.obj.handle_command("routine", {"action": "list"})
-        click.echo(synthwave_style(hal_speak(result), NEON_GREEN))
+        echo_result(result, NEON_GREEN)
 
     @routine.command()
     @click.argument('name')
@@ -405,11 +557,11 @@ def create_cli(command_handler):
             "routine", {"action": "add", "name": name,
                         "description": description}
         )
-        click.echo(synthwave_style(hal_speak(result), NEON_PINK))
+        echo_result(result, NEON_PINK)
 
     @routine.command()
-    @click.argument('routine_id')
-    @click.argument('task_id')
+    @click.argument('routine_id', shell_complete=complete_names('routine'))
+    @click.argument('task_id', shell_complete=complete_names('task'))
     @click.pass_context
     def add_task(ctx, routine_id, task_id):
         """Add a task to a routine"""
@@ -417,11 +569,11 @@ def create_cli(command_handler):
             "routine", {"action": "add_task",
                         "routine_id": routine_id, "task_id": task_id}
         )
-        click.echo(synthwave_style(hal_speak(result), NEON_BLUE))
+        echo_result(result, NEON_BLUE)
 
     @routine.command()
-    @click.argument('routine_id')
-    @click.argument('task_id')
+    @click.argument('routine_id', shell_complete=complete_names('routine'))
+    @click.argument('task_id', shell_complete=complete_names('task'))
     @click.pass_context
     def remove_task(ctx, routine_id, task_id):
         """Remove a task from a routine"""
@@ -429,7 +581,69 @@ def create_cli(command_handler):
             "routine", {"action": "remove_task",
                         "routine_id": routine_id, "task_id": task_id}
         )
-        click.echo(synthwave_style(hal_speak(result), NEON_PINK))
+        echo_result(result, NEON_PINK)
 
+    @cli.group(cls=SynthwaveGroup, invoke_without_command=True)
+    @click.pass_context
+    def db(ctx):
+        """Database maintenance commands"""
+        if ctx.invoked_subcommand is None:
+            click.echo(ctx.get_help())
+
+    @db.command()
+    @click.pass_context
+    def migrate(ctx):
+        """Create or validate the indexes for all collections"""
+        result = ctx.obj.handle_command("db", {"action": "migrate"})
+        echo_result(result, NEON_GREEN)
+
+    @db.command()
+    @click.pass_context
+    def check(ctx):
+        """Report missing or conflicting indexes"""
+        result = ctx.obj.handle_command("db", {"action": "check"})
+        echo_result(result, NEON_BLUE)
+
+    @db.command("stats")
+    @click.pass_context
+    def db_stats(ctx):
+        """Show query cache hit rates and write buffer metrics"""
+        result = ctx.obj.handle_command("db", {"action": "stats"})
+        echo_result(result, NEON_BLUE)
+
+    @db.command()
+    @click.pass_context
+    def reindex(ctx):
+        """Rebuild the local search index from the database"""
+        result = ctx.obj.handle_command("db", {"action": "reindex"})
+        echo_result(result, NEON_GREEN)
+
+    @db.command()
+    @click.pass_context
+    def flush(ctx):
+        """Write out buffered log and check-in inserts now"""
+        result = ctx.obj.handle_command("db", {"action": "flush"})
+        echo_result(result, NEON_GREEN)
+
+    @cli.group(cls=SynthwaveGroup, invoke_without_command=True)
+    @click.pass_context
+    def cache(ctx):
+        """LLM response cache commands"""
+        if ctx.invoked_subcommand is None:
+            click.echo(ctx.get_help())
+
+    @cache.command()
+    @click.pass_context
+    def stats(ctx):
+        """Show response cache hit/miss counters"""
+        result = ctx.obj.handle_command("cache", {"action": "stats"})
+        echo_result(result, NEON_BLUE)
+
+    @cache.command()
+    @click.pass_context
+    def clear(ctx):
+        """Drop all cached responses"""
+        result = ctx.obj.handle_command("cache", {"action": "clear"})
+        echo_result(result, NEON_PINK)
 
     return cli
@@ -0,0 +1,76 @@
+# src/cli/daemon_client.py
+
+import json
+import socket
+from typing import Dict, Any, Iterator
+
+from config import DAEMON_SOCKET, DAEMON_CONNECT_TIMEOUT, DAEMON_REQUEST_TIMEOUT
+
+
+class DaemonUnavailable(Exception):
+    pass
+
+
+class DaemonClient:
+    """Thin client for the `serve` daemon: one JSON line per request/response."""
+
+    def __init__(self, socket_path: str = DAEMON_SOCKET):
+        self.socket_path = socket_path
+
+    def connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(DAEMON_CONNECT_TIMEOUT)
+        try:
+            sock.connect(self.socket_path)
+        except (FileNotFoundError, ConnectionRefusedError, socket.timeout) as e:
+            sock.close()
+            raise DaemonUnavailable(str(e))
+        sock.settimeout(DAEMON_REQUEST_TIMEOUT)
+        return sock
+
+    def request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        # Only a failed connect raises DaemonUnavailable; once the request
+        # is sent we never fall back, so commands cannot run twice.
+        sock = self.connect()
+        try:
+            with sock, sock.makefile("rwb") as stream:
+                stream.write(json.dumps(payload).encode() + b"\n")
+                stream.flush()
+                line = stream.readline()
+        except OSError as e:
+            return {"status": "error", "data": f"Lost connection to the HAL-9001 daemon: {str(e)}"}
+        if not line:
+            return {"status": "error", "data": "The HAL-9001 daemon closed the connection"}
+        return json.loads(line)
+
+    def handle_command(self, command: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        return self.request({"op": "handle_command", "command": command, "data": data})
+
+    def stream_command(self, command: str, data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        # Connect eagerly so DaemonUnavailable surfaces before iteration
+        sock = self.connect()
+        return self._stream_events(sock, {"op": "stream_command", "command": command, "data": data})
+
+    def _stream_events(self, sock: socket.socket, payload: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        # Closing this generator closes the socket, which tells the daemon
+        # to cancel the in-flight request
+        with sock, sock.makefile("rwb") as stream:
+            try:
+                stream.write(json.dumps(payload).encode() + b"\n")
+                stream.flush()
+                for line in stream:
+                    event = json.loads(line)
+                    yield event
+                    if event.get("event") == "result":
+                        return
+            except OSError as e:
+                yield {"event": "result", "status": "error",
+                       "data": f"Lost connection to the HAL-9001 daemon: {str(e)}"}
+                return
+        yield {"event": "result", "status": "error", "data": "The HAL-9001 daemon closed the connection"}
+
+    def ping(self) -> bool:
+        try:
+            return self.request({"op": "ping"}).get("status") == "success"
+        except DaemonUnavailable:
+            return False
@@ -0,0 +1,47 @@
+# src/cli/lazy_handler.py
+
+from cli.daemon_client import DaemonClient, DaemonUnavailable
+from config import DAEMON_DISABLED
+
+
+class LazyCommandHandler:
+    """Stands in for CommandHandler and only builds it on first use.
+
+    Commands go to the `serve` daemon when one is listening; otherwise the
+    real handler is built in-process.
+    """
+
+    def __init__(self, factory, use_daemon: bool = not DAEMON_DISABLED):
+        self._factory = factory
+        self._handler = None
+        self.daemon = DaemonClient() if use_daemon else None
+
+    @property
+    def handler(self):
+        if self._handler is None:
+            self._handler = self._factory()
+        return self._handler
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._handler is not None
+
+    def handle_command(self, command, data):
+        if self.daemon is not None and self._handler is None:
+            try:
+                return self.daemon.handle_command(command, data)
+            except DaemonUnavailable:
+                # No daemon running, stop trying for this process
+                self.daemon = None
+        return self.handler.handle_command(command, data)
+
+    def stream_command(self, command, data):
+        if self.daemon is not None and self._handler is None:
+            try:
+                return self.daemon.stream_command(command, data)
+            except DaemonUnavailable:
+                self.daemon = None
+        return self.handler.stream_command(command, data)
+
+    def __getattr__(self, name):
+        return getattr(self.handler, name)
@@ -0,0 +1,99 @@
+# src/config.py
+
+import os
+from dotenv import load_dotenv
+
+# Load environment variables from .env file before anything reads them
+load_dotenv()
+
+# Startup
+IMPORT_BUDGET_MS = float(os.getenv("HAL9001_IMPORT_BUDGET_MS", "250"))
+
+# Daemon
+RUNTIME_DIR = os.getenv("XDG_RUNTIME_DIR") or os.path.join(
+    os.path.expanduser("~"), ".hal9001")
+DAEMON_SOCKET = os.getenv(
+    "HAL9001_SOCKET", os.path.join(RUNTIME_DIR, "hal9001.sock"))
+DAEMON_DISABLED = os.getenv("HAL9001_NO_DAEMON", "").lower() in ("1", "true", "yes")
+DAEMON_CONNECT_TIMEOUT = float(os.getenv("HAL9001_DAEMON_CONNECT_TIMEOUT", "0.5"))
+DAEMON_REQUEST_TIMEOUT = float(os.getenv("HAL9001_DAEMON_REQUEST_TIMEOUT", "300"))
+
+# User
+USERNAME = os.getenv("HAL9001_USERNAME")
+
+# Chat
+CHAT_STREAMING = os.getenv("HAL9001_CHAT_STREAMING", "true").lower() in ("1", "true", "yes")
+
+# Local data
+DATA_DIR = os.getenv("HAL9001_DATA_DIR") or os.path.join(
+    os.getenv("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share"), "hal9001")
+
+# LLM response cache
+RESPONSE_CACHE_ENABLED = os.getenv("HAL9001_RESPONSE_CACHE", "true").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_PATH = os.getenv(
+    "HAL9001_RESPONSE_CACHE_PATH", os.path.join(DATA_DIR, "response_cache.sqlite3"))
+RESPONSE_CACHE_TTL = float(os.getenv("HAL9001_RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("HAL9001_RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+# Comma-separated commands that never use the cache, e.g. "chat,schedule"
+RESPONSE_CACHE_SKIP_COMMANDS = {
+    command.strip() for command in os.getenv("HAL9001_RESPONSE_CACHE_SKIP", "").split(",") if command.strip()}
+
+# Chat memory
+CHAT_MEMORY_TOKEN_BUDGET = int(os.getenv("HAL9001_CHAT_MEMORY_TOKENS", "2000"))
+CHAT_MEMORY_KEEP_TURNS = int(os.getenv("HAL9001_CHAT_MEMORY_KEEP_TURNS", "4"))
+CHAT_MEMORY_MAX_SESSIONS = int(os.getenv("HAL9001_CHAT_MEMORY_MAX_SESSIONS", "32"))
+
+# Model routing
+MODEL_SMALL = os.getenv("HAL9001_MODEL_SMALL", "claude-3-haiku-20240307")
+MODEL_LARGE = os.getenv("HAL9001_MODEL_LARGE", "claude-3-opus-20240229")
+# Commands that always get the large model, e.g. "schedule"
+MODEL_LARGE_COMMANDS = {
+    command.strip() for command in os.getenv("HAL9001_MODEL_LARGE_COMMANDS", "schedule").split(",") if command.strip()}
+MODEL_LONG_INPUT_TOKENS = int(os.getenv("HAL9001_MODEL_LONG_INPUT_TOKENS", "300"))
+MODEL_COMPLEXITY_THRESHOLD = float(os.getenv("HAL9001_MODEL_COMPLEXITY_THRESHOLD", "0.5"))
+MODEL_ESCALATION = os.getenv("HAL9001_MODEL_ESCALATION", "true").lower() in ("1", "true", "yes")
+
+# LLM context
+CONTEXT_TOKEN_BUDGET = int(os.getenv("HAL9001_CONTEXT_TOKENS", "1500"))
+CONTEXT_CANDIDATES = int(os.getenv("HAL9001_CONTEXT_CANDIDATES", "100"))
+CONTEXT_FETCH_WORKERS = int(os.getenv("HAL9001_CONTEXT_FETCH_WORKERS", "8"))
+
+# Local full-text search over logs, check-ins, tasks and projects
+SEARCH_ENABLED = os.getenv("HAL9001_SEARCH", "true").lower() in ("1", "true", "yes")
+SEARCH_INDEX_PATH = os.getenv(
+    "HAL9001_SEARCH_INDEX_PATH", os.path.join(DATA_DIR, "search.sqlite3"))
+
+# Exports write a resumable checkpoint (and start a new Parquet part) every so many rows
+EXPORT_CHECKPOINT_ROWS = int(os.getenv("HAL9001_EXPORT_CHECKPOINT_ROWS", "100000"))
+
+# Database
+INDEX_CHECK = os.getenv("HAL9001_INDEX_CHECK", "true").lower() in ("1", "true", "yes")
+# Seconds between the startup index checks (0 checks on every start)
+INDEX_CHECK_INTERVAL = float(os.getenv("HAL9001_INDEX_CHECK_INTERVAL", "86400"))
+INDEX_CHECK_STAMP = os.path.join(DATA_DIR, "index_check")
+READ_BATCH_SIZE = int(os.getenv("HAL9001_READ_BATCH_SIZE", "500"))
+PAGE_SIZE = int(os.getenv("HAL9001_PAGE_SIZE", "50"))
+
+# Read-through cache for hot find_one/aggregate reads (off by default: other
+# processes' writes can take up to a TTL to show), e.g.
+# HAL9001_DB_CACHE_TTLS="users=300,protocols=300,projects=60"
+DB_CACHE_ENABLED = os.getenv("HAL9001_DB_CACHE", "false").lower() in ("1", "true", "yes")
+DB_CACHE_TTL = float(os.getenv("HAL9001_DB_CACHE_TTL", "30"))
+DB_CACHE_TTLS = {
+    name.strip(): float(ttl) for name, _, ttl in (
+        item.partition("=") for item in os.getenv(
+            "HAL9001_DB_CACHE_TTLS", "users=300,protocols=300,projects=60").split(",") if "=" in item)}
+DB_CACHE_MAX_ENTRIES = int(os.getenv("HAL9001_DB_CACHE_MAX_ENTRIES", "2000"))
+# Write-behind batching for log and check-in inserts (off by default)
+WRITE_BUFFER_ENABLED = os.getenv("HAL9001_WRITE_BUFFER", "false").lower() in ("1", "true", "yes")
+# Each process spools to its own write_spool.<pid>-<token>.jsonl next to this path
+WRITE_BUFFER_SPOOL = os.getenv(
+    "HAL9001_WRITE_BUFFER_SPOOL", os.path.join(DATA_DIR, "write_spool.jsonl"))
+WRITE_BUFFER_BATCH = int(os.getenv("HAL9001_WRITE_BUFFER_BATCH", "500"))
+WRITE_BUFFER_INTERVAL = float(os.getenv("HAL9001_WRITE_BUFFER_INTERVAL", "1.0"))
+WRITE_BUFFER_MAX_PENDING = int(os.getenv("HAL9001_WRITE_BUFFER_MAX_PENDING", "10000"))
+WRITE_BUFFER_BLOCK_TIMEOUT = float(os.getenv("HAL9001_WRITE_BUFFER_BLOCK_TIMEOUT", "5"))
+WRITE_BUFFER_FSYNC = os.getenv("HAL9001_WRITE_BUFFER_FSYNC", "false").lower() in ("1", "true", "yes")
+
+# Protocols whose recurring events are kept expanded in memory
+RECURRENCE_CACHE_MAX_PROTOCOLS = int(os.getenv("HAL9001_RECURRENCE_CACHE_MAX_PROTOCOLS", "64"))
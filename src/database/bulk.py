@@ -0,0 +1,104 @@
+# src/database/bulk.py
+
+from typing import Dict, Any, List
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import InsertOne, UpdateOne, UpdateMany, DeleteOne, DeleteMany, ReplaceOne
+from pymongo.errors import BulkWriteError
+
+
+OPERATIONS = {
+    "insert_one": lambda op: InsertOne(op["document"]),
+    "update_one": lambda op: UpdateOne(op["filter"], op["update"], upsert=op.get("upsert", False)),
+    "update_many": lambda op: UpdateMany(op["filter"], op["update"], upsert=op.get("upsert", False)),
+    "replace_one": lambda op: ReplaceOne(op["filter"], op["replacement"], upsert=op.get("upsert", False)),
+    "delete_one": lambda op: DeleteOne(op["filter"]),
+    "delete_many": lambda op: DeleteMany(op["filter"]),
+}
+
+
+def to_request(operation: Dict[str, Any]):
+    """Build a pymongo write request from {"op": "update_one", "filter": ..., "update": ...}."""
+    builder = OPERATIONS.get(operation.get("op"))
+    if builder is None:
+        raise ValueError(f"Unsupported bulk operation: {operation.get('op')}")
+    return builder(operation)
+
+
+def bulk_write(collection, requests: List[Any]) -> Dict[str, Any]:
+    """Send all requests unordered in one round trip.
+
+    A failing item does not stop the others; its position in `requests` is
+    reported under "errors" instead of raising.
+    """
+    summary = {"inserted": 0, "matched": 0, "modified": 0,
+               "deleted": 0, "upserted": 0, "errors": []}
+    if not requests:
+        return summary
+
+    try:
+        details = collection.bulk_write(requests, ordered=False).bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+
+    summary.update({
+        "inserted": details.get("nInserted", 0),
+        "matched": details.get("nMatched", 0),
+        "modified": details.get("nModified", 0),
+        "deleted": details.get("nRemoved", 0),
+        "upserted": details.get("nUpserted", 0),
+        "errors": [{"index": error["index"], "code": error.get("code"), "message": error.get("errmsg")}
+                   for error in details.get("writeErrors", [])],
+    })
+    if details.get("writeConcernErrors"):
+        summary["write_concern_errors"] = [error.get("errmsg") for error in details["writeConcernErrors"]]
+    return summary
+
+
+def _failed(summary: Dict[str, Any]) -> set:
+    return {error["index"] for error in summary["errors"]}
+
+
+def bulk_create(collection, models: List[Any]) -> Dict[str, Any]:
+    summary = bulk_write(collection, [InsertOne(model.to_dict()) for model in models])
+    failed = _failed(summary)
+    for index, model in enumerate(models):
+        if index not in failed:
+            model.mark_clean()
+    summary["inserted_ids"] = [str(model._id) for index, model in enumerate(models) if index not in failed]
+    return summary
+
+
+def bulk_update(collection, models: List[Any]) -> Dict[str, Any]:
+    # Clean models are skipped; error indexes are mapped back to `models`
+    pending = [(index, model, model.changes()) for index, model in enumerate(models)]
+    pending = [(index, model, changes) for index, model, changes in pending if changes]
+    summary = bulk_write(collection, [UpdateOne({"_id": model._id}, changes)
+                                      for _, model, changes in pending])
+    failed = _failed(summary)
+    for position, (index, model, _) in enumerate(pending):
+        if position not in failed:
+            model.mark_clean()
+    for error in summary["errors"]:
+        index, model, _ = pending[error["index"]]
+        error.update({"index": index, "_id": str(model._id)})
+    return summary
+
+
+def bulk_delete(collection, ids: List[Any]) -> Dict[str, Any]:
+    # A malformed id is reported as its own error rather than aborting the batch
+    requests, positions, invalid = [], [], []
+    for index, _id in enumerate(ids):
+        try:
+            if _id is None:
+                raise InvalidId("no id given")  # ObjectId(None) would make up a new one
+            requests.append(DeleteOne({"_id": ObjectId(_id)}))
+            positions.append(index)
+        except (InvalidId, TypeError) as e:
+            invalid.append({"index": index, "code": None, "_id": str(_id), "message": f"Invalid id: {e}"})
+    summary = bulk_write(collection, requests)
+    for error in summary["errors"]:
+        index = positions[error["index"]]
+        error.update({"index": index, "_id": str(ids[index])})
+    summary["errors"] = sorted(invalid + summary["errors"], key=lambda error: error["index"])
+    return summary
@@ -0,0 +1,251 @@
+# src/database/cache.py
+
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from pymongo.collection import Collection
+
+from database.models.codec import copy_value
+
+# Collection methods that change data; calling any of them drops the cached
+# reads of that collection
+WRITE_METHODS = {
+    "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+    "delete_one", "delete_many", "bulk_write", "find_one_and_update",
+    "find_one_and_replace", "find_one_and_delete", "drop",
+}
+
+# Pipeline stages that read from another collection
+_LOOKUP_STAGES = ("$lookup", "$graphLookup")
+# Pipeline stages that write, which must never be served from the cache
+_WRITE_STAGES = ("$out", "$merge")
+
+
+def _cache_key(*parts) -> str:
+    # repr keeps ObjectId("...") distinct from the plain string, and key order
+    # is preserved because it matters for sort specifications
+    return json.dumps(parts, default=repr)
+
+
+def pipeline_collections(collection: str, pipeline) -> Optional[Set[str]]:
+    """Collections an aggregate reads from, or None if it must not be cached."""
+    collections = {collection}
+    for stage in pipeline:
+        for name, spec in stage.items():
+            if name in _WRITE_STAGES:
+                return None
+            if name in _LOOKUP_STAGES and isinstance(spec, dict) and "from" in spec:
+                collections.add(spec["from"])
+                nested = pipeline_collections(spec["from"], spec.get("pipeline", []))
+                if nested is None:
+                    return None
+                collections |= nested
+            elif name == "$unionWith":
+                union = spec if isinstance(spec, str) else spec.get("coll")
+                collections.add(union)
+                if isinstance(spec, dict):
+                    nested = pipeline_collections(union, spec.get("pipeline", []))
+                    if nested is None:
+                        return None
+                    collections |= nested
+    return collections
+
+
+class QueryCache:
+    """LRU of query results with per-collection TTLs.
+
+    Entries are invalidated per collection: a write drops every cached read
+    that depends on that collection (an aggregate also depends on the
+    collections it $lookups). Each collection carries a generation counter so
+    a read that raced with a write is not stored afterwards.
+    """
+
+    def __init__(self, ttl: float = 30.0, ttls: Optional[Dict[str, float]] = None,
+                 max_entries: int = 2000):
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[float, Set[str], Any]]" = OrderedDict()
+        self.by_collection: Dict[str, Set[str]] = defaultdict(set)
+        self.generations: Dict[str, int] = defaultdict(int)
+        self.counters: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "misses": 0, "invalidations": 0})
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def ttl_for(self, collection: str) -> float:
+        return self.ttls.get(collection, self.ttl)
+
+    def generation(self, collections: Set[str]) -> Tuple[int, ...]:
+        with self.lock:
+            return tuple(self.generations[name] for name in sorted(collections))
+
+    def get(self, collection: str, key: str):
+        """Return (hit, value); the value is a copy the caller may modify."""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= now:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.counters[collection]["misses"] += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.counters[collection]["hits"] += 1
+            value = entry[2]
+        return True, copy_value(value)
+
+    def set(self, collection: str, key: str, value, collections: Set[str], generation: Tuple[int, ...]):
+        ttl = min(self.ttl_for(name) for name in collections)
+        if ttl <= 0:
+            return
+        value = copy_value(value)
+        with self.lock:
+            if generation != tuple(self.generations[name] for name in sorted(collections)):
+                return
+            self._drop(key)
+            self.entries[key] = (time.monotonic() + ttl, collections, value)
+            for name in collections:
+                self.by_collection[name].add(key)
+            while len(self.entries) > self.max_entries:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+
+    def invalidate(self, collection: str):
+        with self.lock:
+            self.generations[collection] += 1
+            keys = self.by_collection.pop(collection, set())
+            for key in keys:
+                self._drop(key)
+            if keys:
+                self.counters[collection]["invalidations"] += 1
+
+    def clear(self):
+        with self.lock:
+            for collection in list(self.by_collection):
+                self.generations[collection] += 1
+            self.entries.clear()
+            self.by_collection.clear()
+
+    def _drop(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            for name in entry[1]:
+                self.by_collection.get(name, set()).discard(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            collections = {name: {**counts, "hit_rate": counts["hits"] / max(counts["hits"] + counts["misses"], 1)}
+                           for name, counts in self.counters.items()}
+            hits = sum(counts["hits"] for counts in self.counters.values())
+            misses = sum(counts["misses"] for counts in self.counters.values())
+            return {"entries": len(self.entries), "hits": hits, "misses": misses,
+                    "evictions": self.evictions, "hit_rate": hits / max(hits + misses, 1),
+                    "collections": collections}
+
+
+class CachedCollection:
+    """Collection proxy serving find_one and aggregate from a QueryCache."""
+
+    def __init__(self, collection, cache: QueryCache,
+                 on_write: Optional[Callable[[Optional[str]], None]] = None):
+        self._collection = collection
+        self._cache = cache
+        self._name = collection.name
+        self._on_write = on_write
+
+    def _written(self, collection: Optional[str]):
+        if self._on_write is not None:
+            self._on_write(collection)
+
+    def find_one(self, filter=None, *args, **kwargs):
+        key = _cache_key(self._name, "find_one", filter, args, kwargs)
+        hit, value = self._cache.get(self._name, key)
+        if hit:
+            return value
+        collections = {self._name}
+        generation = self._cache.generation(collections)
+        value = self._collection.find_one(filter, *args, **kwargs)
+        # Misses are not kept, so a document another process inserts is seen
+        if value is not None:
+            self._cache.set(self._name, key, value, collections, generation)
+        return value
+
+    def aggregate(self, pipeline, *args, **kwargs):
+        collections = pipeline_collections(self._name, pipeline)
+        if collections is None:
+            # $out/$merge write to another collection; drop everything after
+            try:
+                return self._collection.aggregate(pipeline, *args, **kwargs)
+            finally:
+                self._cache.clear()
+                self._written(None)
+        key = _cache_key(self._name, "aggregate", pipeline, args, kwargs)
+        hit, value = self._cache.get(self._name, key)
+        if hit:
+            return iter(value)
+        generation = self._cache.generation(collections)
+        value = list(self._collection.aggregate(pipeline, *args, **kwargs))
+        self._cache.set(self._name, key, value, collections, generation)
+        return iter(value)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._collection, name)
+        if name not in WRITE_METHODS:
+            return attribute
+
+        def write(*args, **kwargs):
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                self._cache.invalidate(self._name)
+                self._written(self._name)
+        return write
+
+
+class CachedDatabase:
+    """Drop-in wrapper for a pymongo Database that caches hot reads.
+
+    Repositories and DatabaseHandler take it in place of the database; every
+    collection they touch is wrapped in a CachedCollection sharing one cache.
+    Listeners registered with on_write are called with the collection name
+    after each write through any of them (None when a pipeline may have
+    written anywhere).
+    """
+
+    def __init__(self, database, cache: Optional[QueryCache] = None):
+        self._database = database
+        self.cache = cache or QueryCache()
+        self._collections: Dict[str, CachedCollection] = {}
+        self._write_listeners: List[Callable[[Optional[str]], None]] = []
+
+    def on_write(self, listener: Callable[[Optional[str]], None]):
+        self._write_listeners.append(listener)
+
+    def _written(self, collection: Optional[str]):
+        for listener in self._write_listeners:
+            listener(collection)
+
+    def __getitem__(self, name: str) -> CachedCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = CachedCollection(
+                self._database[name], self.cache, self._written)
+        return collection
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attribute = getattr(self._database, name)
+        # Attribute access on a Database returns a collection for unknown names
+        if isinstance(attribute, Collection):
+            return self[name]
+        return attribute
+
+    @property
+    def unwrapped(self):
+        return self._database
@@ -0,0 +1,379 @@
+# src/database/export.py
+
+import csv
+import glob
+import gzip
+import io
+import json
+import os
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from config import EXPORT_CHECKPOINT_ROWS, READ_BATCH_SIZE
+from database.pagination import iter_documents
+
+# What each export reads. CSV and Parquet get exactly these columns, typed as
+#   id      ObjectId, written as its hex string
+#   text    string
+#   time    datetime (ISO 8601 in CSV)
+#   number  float
+#   list    list of strings (a JSON array in CSV)
+# JSONL keeps whole documents.
+EXPORTS = {
+    "logs": {"collection": "logs", "time": "timestamp", "columns": {
+        "_id": "id", "user_id": "id", "timestamp": "time", "entry": "text",
+        "project_id": "id", "skill_id": "id", "tags": "list"}},
+    "checkins": {"collection": "checkins", "time": "timestamp", "columns": {
+        "_id": "id", "user_id": "id", "timestamp": "time", "mood": "text", "notes": "text",
+        "projects": "list", "skills": "list", "tags": "list"}},
+    "tasks": {"collection": "tasks", "time": "created_at", "columns": {
+        "_id": "id", "user_id": "id", "project_id": "id", "name": "text", "description": "text",
+        "status": "text", "priority": "text", "due_date": "time", "created_at": "time",
+        "completed_at": "time", "estimated_time": "number", "actual_time": "number", "tags": "list"}},
+    "projects": {"collection": "projects", "time": "start_date", "columns": {
+        "_id": "id", "user_id": "id", "name": "text", "description": "text", "status": "text",
+        "start_date": "time", "end_date": "time", "tasks": "list", "skills": "list", "logs": "list",
+        "xp_gain": "number", "tags": "list"}},
+}
+
+FORMATS = ("jsonl", "csv", "parquet")
+COMPRESSIONS = ("gzip", "zstd", "none")
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+
+# Encoded rows are handed to the file in chunks of about this size
+WRITE_CHUNK_BYTES = 1 << 20
+# Rows per Parquet row group
+ROW_GROUP_ROWS = 10000
+
+
+class ExportError(Exception):
+    pass
+
+
+def export_filename(kind: str, fmt: str, compression: Optional[str] = None) -> str:
+    if fmt == "parquet":
+        return f"{kind}.parquet"
+    return f"{kind}.{fmt}{SUFFIXES[compression or 'none']}"
+
+
+def parquet_part(path: str, part: int) -> str:
+    base, suffix = os.path.splitext(path)
+    return f"{base}-{part:05d}{suffix or '.parquet'}"
+
+
+def _json_value(value):
+    # Called by the encoder only for what JSON has no type for
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)  # ObjectId as its hex string, Decimal128, ...
+
+
+_json = json.JSONEncoder(ensure_ascii=False, default=_json_value)
+
+
+def _list(value) -> List[str]:
+    values = value if isinstance(value, (list, tuple)) else [value]
+    return [str(item) for item in values if item is not None]
+
+
+def _csv_cell(value, column_type: str):
+    if value is None:
+        return ""
+    if column_type == "list":
+        return json.dumps(_list(value), ensure_ascii=False)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value) if column_type == "id" else value
+
+
+def _arrow_cell(value, column_type: str):
+    if value is None:
+        return None
+    if column_type == "time":
+        return value if isinstance(value, datetime) else None
+    if column_type == "number":
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    if column_type == "list":
+        return _list(value)
+    return str(value)
+
+
+def _zstd_writer(raw):
+    try:
+        from compression import zstd  # Python 3.14+
+        return zstd.ZstdFile(raw, "wb")
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ExportError("zstd compression needs Python 3.14+ or the zstandard package "
+                          "(pip install zstandard)")
+    return zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ExportError("Parquet export needs the pyarrow package (pip install pyarrow)")
+    return pyarrow, pyarrow.parquet
+
+
+class _TextSink:
+    """JSONL or CSV, optionally compressed, written in members that end at checkpoints.
+
+    gzip and zstd readers both accept concatenated members (frames), so a
+    resumed export truncates the file to the last checkpoint and appends.
+    """
+
+    def __init__(self, path: str, fmt: str, columns: Dict[str, str], compression: str,
+                 state: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.fmt = fmt
+        self.columns = columns
+        self.compression = compression
+        if state is None:
+            self.raw = open(path, "wb")
+        else:
+            self.raw = open(path, "r+b")
+            self.raw.truncate(state["offset"])
+            self.raw.seek(state["offset"])
+        self.stream = None
+        self.pending: List[bytes] = []
+        self.pending_bytes = 0
+        if fmt == "csv":
+            self.text = io.StringIO()
+            self.csv = csv.writer(self.text)
+            if state is None:
+                self.csv.writerow(list(columns))
+                self._queue(self._take())
+
+    def _take(self) -> bytes:
+        data = self.text.getvalue().encode()
+        self.text.seek(0)
+        self.text.truncate()
+        return data
+
+    def _queue(self, data: bytes):
+        self.pending.append(data)
+        self.pending_bytes += len(data)
+        if self.pending_bytes >= WRITE_CHUNK_BYTES:
+            self._flush()
+
+    def _flush(self):
+        if not self.pending:
+            return
+        if self.stream is None:
+            if self.compression == "gzip":
+                self.stream = gzip.GzipFile(fileobj=self.raw, mode="wb", compresslevel=6)
+            elif self.compression == "zstd":
+                self.stream = _zstd_writer(self.raw)
+            else:
+                self.stream = self.raw
+        self.stream.write(b"".join(self.pending))
+        self.pending = []
+        self.pending_bytes = 0
+
+    def write(self, document: Dict[str, Any]):
+        if self.fmt == "csv":
+            self.csv.writerow([_csv_cell(document.get(name), column_type)
+                               for name, column_type in self.columns.items()])
+            self._queue(self._take())
+        else:
+            self._queue(_json.encode(document).encode() + b"\n")
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """End the current member, make it durable and return where to resume."""
+        self._flush()
+        if self.stream is not None and self.stream is not self.raw:
+            self.stream.close()
+        self.stream = None
+        self.raw.flush()
+        os.fsync(self.raw.fileno())
+        return {"offset": self.raw.tell()}
+
+    def close(self):
+        try:
+            self.checkpoint()
+        finally:
+            self.raw.close()
+
+    def files(self) -> List[str]:
+        return [self.path]
+
+
+class _ParquetSink:
+    """Parquet as numbered part files (`<name>-00000.parquet`, ...), one per checkpoint.
+
+    A Parquet file is only readable once its footer is written, so each
+    checkpoint closes the current part and a resumed export starts the next.
+    """
+
+    def __init__(self, path: str, columns: Dict[str, str], compression: Optional[str],
+                 state: Optional[Dict[str, Any]] = None):
+        self.pa, self.pq = _pyarrow()
+        types = {"id": self.pa.string(), "text": self.pa.string(), "time": self.pa.timestamp("us"),
+                 "number": self.pa.float64(), "list": self.pa.list_(self.pa.string())}
+        self.schema = self.pa.schema([(name, types[column_type]) for name, column_type in columns.items()])
+        self.columns = columns
+        self.codec = {None: "snappy", "none": "none"}.get(compression, compression)
+        self.path = path
+        if state is None:
+            # Parts left over from an earlier, longer export of the same file
+            base, suffix = os.path.splitext(path)
+            suffix = suffix or ".parquet"
+            for stale in glob.glob(glob.escape(base) + "-*" + suffix):
+                if re.fullmatch(r"\d{5}", stale[len(base) + 1:-len(suffix)]):
+                    os.remove(stale)
+        self.part = state["part"] if state else 0
+        self.written: List[str] = []
+        self.writer = None
+        self._reset()
+
+    def _reset(self):
+        self.rows: Dict[str, List[Any]] = {name: [] for name in self.columns}
+        self.count = 0
+
+    def write(self, document: Dict[str, Any]):
+        for name, column_type in self.columns.items():
+            self.rows[name].append(_arrow_cell(document.get(name), column_type))
+        self.count += 1
+        if self.count >= ROW_GROUP_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if not self.count:
+            return
+        if self.writer is None:
+            path = parquet_part(self.path, self.part)
+            self.writer = self.pq.ParquetWriter(path, self.schema, compression=self.codec)
+            self.written.append(path)
+        self.writer.write_table(self.pa.Table.from_pydict(self.rows, schema=self.schema))
+        self._reset()
+
+    def checkpoint(self) -> Dict[str, Any]:
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            self.part += 1
+        return {"part": self.part}
+
+    def close(self):
+        self.checkpoint()
+
+    def files(self) -> List[str]:
+        return self.written
+
+
+def _read_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        raise ExportError(f"Unreadable export checkpoint {path}: {e}")
+
+
+def _write_checkpoint(path: str, checkpoint: Dict[str, Any]):
+    # Written aside and renamed so a crash never leaves half a checkpoint
+    temporary = path + ".tmp"
+    with open(temporary, "w") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def export(database, kind: str, path: str, fmt: str = "jsonl", compression: Optional[str] = None,
+           user_id=None, since: Optional[datetime] = None, until: Optional[datetime] = None,
+           resume: bool = False, batch_size: int = READ_BATCH_SIZE,
+           checkpoint_rows: int = EXPORT_CHECKPOINT_ROWS) -> Dict[str, Any]:
+    """Stream one collection to `path` in `_id` order.
+
+    Documents come off the cursor one batch at a time and go straight to the
+    file, so memory stays flat however much history there is. Every
+    `checkpoint_rows` rows the output is synced and `<path>.checkpoint`
+    records the last `_id` written; with `resume` an interrupted export picks
+    up from there, and one that already finished is left alone. `until` is
+    exclusive.
+
+    Returns {"kind", "rows", "files", "bytes", "seconds", "status"} with
+    status "done", "resumed" or "complete" (nothing left to do).
+    """
+    if kind not in EXPORTS:
+        raise ExportError(f"Cannot export '{kind}', expected one of {', '.join(EXPORTS)}")
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown export format '{fmt}', expected one of {', '.join(FORMATS)}")
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ExportError(f"Unknown compression '{compression}', expected one of {', '.join(COMPRESSIONS)}")
+    spec = EXPORTS[kind]
+    query: Dict[str, Any] = {}
+    if user_id is not None:
+        query["user_id"] = ObjectId(user_id)
+    if since or until:
+        query[spec["time"]] = {**({"$gte": since} if since else {}), **({"$lt": until} if until else {})}
+    options = {"kind": kind, "format": fmt, "compression": compression, "user_id": str(user_id) if user_id else None,
+               "since": since.isoformat() if since else None, "until": until.isoformat() if until else None}
+
+    checkpoint_path = path + ".checkpoint"
+    checkpoint = _read_checkpoint(checkpoint_path) if resume else None
+    if checkpoint is not None and checkpoint["options"] != options:
+        raise ExportError(f"{checkpoint_path} belongs to an export with different options; "
+                          "run again without --resume to start over")
+    started = time.monotonic()
+    if resume and checkpoint is None and (
+            os.path.exists(path) if fmt != "parquet" else os.path.exists(parquet_part(path, 0))):
+        # No checkpoint but the output is there: that export finished
+        return {"kind": kind, "rows": 0, "files": [], "bytes": 0, "seconds": 0.0, "status": "complete"}
+
+    if checkpoint is not None:
+        rows = checkpoint["rows"]
+        state = checkpoint["state"]
+        if checkpoint["last_id"]:
+            query["_id"] = {"$gt": ObjectId(checkpoint["last_id"])}
+    else:
+        rows, state = 0, None
+    if fmt == "parquet":
+        sink = _ParquetSink(path, spec["columns"], compression, state)
+    else:
+        sink = _TextSink(path, fmt, spec["columns"], compression or "none", state)
+
+    def save(last_id):
+        _write_checkpoint(checkpoint_path, {
+            "options": options, "last_id": str(last_id) if last_id else None, "rows": rows,
+            "state": sink.checkpoint(), "updated_at": datetime.utcnow().isoformat()})
+
+    # Written before the first row so an export cut short is always resumable
+    last_id = checkpoint["last_id"] if checkpoint else None
+    save(last_id)
+    projection = {name: 1 for name in spec["columns"]} if fmt != "jsonl" else None
+    since_checkpoint = 0
+    try:
+        # Walking the _id index keeps the cursor streaming; any other plan
+        # for this sort could mean an in-memory sort of the whole result
+        for document in iter_documents(database[spec["collection"]], query, batch_size,
+                                       projection=projection, hint=[("_id", 1)]):
+            sink.write(document)
+            rows += 1
+            since_checkpoint += 1
+            last_id = document["_id"]
+            if since_checkpoint >= checkpoint_rows:
+                save(last_id)
+                since_checkpoint = 0
+    finally:
+        sink.close()
+    os.remove(checkpoint_path)
+    files = sink.files()
+    return {"kind": kind, "rows": rows, "files": files,
+            "bytes": sum(os.path.getsize(file) for file in files),
+            "seconds": time.monotonic() - started, "status": "resumed" if checkpoint else "done"}
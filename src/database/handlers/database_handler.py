@@ -1,7 +1,10 @@
 # src/database/database_handler.py
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Iterator, Optional
 from bson import ObjectId
+from config import READ_BATCH_SIZE, PAGE_SIZE
+from database.pagination import iter_documents, find_page
+from database.bulk import bulk_write, to_request
 
 
 class DatabaseHandler:
@@ -16,14 +19,16 @@ class DatabaseHandler:
         result = self.db[collection].insert_many(documents)
         return [str(id) for id in result.inserted_ids]
 
-    def find_one(self, collection: str, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        result = self.db[collection].find_one(query)
+    def find_one(self, collection: str, query: Dict[str, Any],
+                 projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        result = self.db[collection].find_one(query, projection)
         if result:
             result['_id'] = str(result['_id'])  # Convert ObjectId to string
         return result
 
-    def find_many(self, collection: str, query: Dict[str, Any], limit: int = 0) -> List[Dict[str, Any]]:
-        cursor = self.db[collection].find(query)
+    def find_many(self, collection: str, query: Dict[str, Any], limit: int = 0,
+                  projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        cursor = self.db[collection].find(query, projection)
         if limit > 0:
             cursor = cursor.limit(limit)
         results = list(cursor)
@@ -31,6 +36,23 @@ class DatabaseHandler:
             result['_id'] = str(result['_id'])  # Convert ObjectId to string
         return results
 
+    def iter_many(self, collection: str, query: Dict[str, Any], batch_size: int = READ_BATCH_SIZE,
+                  sort_field: str = "_id", descending: bool = False,
+                  projection: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        for result in iter_documents(self.db[collection], query, batch_size, sort_field=sort_field,
+                                     descending=descending, projection=projection):
+            result['_id'] = str(result['_id'])  # Convert ObjectId to string
+            yield result
+
+    def find_page(self, collection: str, query: Dict[str, Any], limit: int = PAGE_SIZE,
+                  page_token: Optional[str] = None, sort_field: str = "_id",
+                  descending: bool = False, projection: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        results, next_token = find_page(self.db[collection], query, limit, page_token, sort_field=sort_field,
+                                        descending=descending, projection=projection)
+        for result in results:
+            result['_id'] = str(result['_id'])  # Convert ObjectId to string
+        return {"documents": results, "next_page_token": next_token}
+
     def update_one(self, collection: str, query: Dict[str, Any], update: Dict[str, Any]) -> int:
         result = self.db[collection].update_one(query, {"$set": update})
         return result.modified_count
@@ -47,5 +69,21 @@ class DatabaseHandler:
         result = self.db[collection].delete_many(query)
         return result.deleted_count
 
+    def bulk_write(self, collection: str, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # Unordered: every operation is attempted and failures are reported by index
+        requests, errors = [], []
+        positions = []
+        for index, operation in enumerate(operations):
+            try:
+                requests.append(to_request(operation))
+                positions.append(index)
+            except (KeyError, ValueError) as e:
+                errors.append({"index": index, "code": None, "message": f"Invalid operation: {e}"})
+        summary = bulk_write(self.db[collection], requests)
+        for error in summary["errors"]:
+            error["index"] = positions[error["index"]]
+        summary["errors"] = sorted(errors + summary["errors"], key=lambda error: error["index"])
+        return summary
+
     def count_documents(self, collection: str, query: Dict[str, Any]) -> int:
         return self.db[collection].count_documents(query)
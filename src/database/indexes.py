@@ -0,0 +1,115 @@
+# src/database/indexes.py
+
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo.errors import OperationFailure
+
+from database.repositories.checkin_repository import CheckInRepository
+from database.repositories.log_repository import LogRepository
+from database.repositories.project_repository import ProjectRepository
+from database.repositories.protocol_repository import ProtocolRepository
+from database.repositories.routine_repository import RoutineRepository
+from database.repositories.schedule_repository import ScheduleRepository
+from database.repositories.skill_repository import SkillRepository
+from database.repositories.task_repository import TaskRepository
+from database.repositories.user_repository import UserRepository
+
+# Collection name -> repository declaring its INDEXES
+INDEX_REGISTRY = {
+    "users": UserRepository,
+    "tasks": TaskRepository,
+    "projects": ProjectRepository,
+    "skills": SkillRepository,
+    "logs": LogRepository,
+    "checkins": CheckInRepository,
+    "routines": RoutineRepository,
+    "schedules": ScheduleRepository,
+    "protocols": ProtocolRepository,
+}
+
+# Options that change what an index enforces or holds. Collation is left
+# out: the server fills in defaults, so it never matches the declaration.
+COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+logger = logging.getLogger(__name__)
+
+
+def _key(index_spec) -> List[Tuple[str, int]]:
+    return [(field, int(direction)) for field, direction in index_spec]
+
+
+def _options(index: Dict[str, Any]) -> Dict[str, Any]:
+    return {option: index[option] for option in COMPARED_OPTIONS if index.get(option) not in (None, False)}
+
+
+def check_indexes(database) -> List[Tuple[str, str, str]]:
+    """Compare the registry with the database without changing anything.
+
+    Returns (collection, index name, status) with status one of
+    "ok", "missing" or "conflict" (same name, different keys or options).
+    """
+    report = []
+    for collection, repository in INDEX_REGISTRY.items():
+        existing = database[collection].index_information()
+        for index in repository.INDEXES:
+            document = index.document
+            name = document["name"]
+            if name not in existing:
+                status = "missing"
+            elif (_key(existing[name]["key"]) != _key(document["key"].items())
+                  or _options(existing[name]) != _options(document)):
+                status = "conflict"
+            else:
+                status = "ok"
+            report.append((collection, name, status))
+    return report
+
+
+def migrate(database) -> List[Tuple[str, str, str]]:
+    """Create missing indexes; safe to run any number of times.
+
+    Returns (collection, index name, status) with status one of "ok",
+    "created", "conflict" or "failed: <reason>".
+    """
+    report = []
+    for collection, name, status in check_indexes(database):
+        if status == "missing":
+            index = next(index for index in INDEX_REGISTRY[collection].INDEXES
+                         if index.document["name"] == name)
+            try:
+                database[collection].create_indexes([index])
+                status = "created"
+            except OperationFailure as e:
+                status = f"failed: {e.details.get('errmsg', str(e)) if e.details else str(e)}"
+        report.append((collection, name, status))
+    return report
+
+
+def warn_missing_indexes(database, stamp_path: Optional[str] = None,
+                         interval: float = 0) -> List[Tuple[str, str, str]]:
+    """Log indexes that need `db migrate`, at most once per `interval` seconds.
+
+    The check costs a listIndexes round trip per collection, so with a
+    stamp file it is skipped while the last one is recent enough.
+    """
+    if stamp_path and interval > 0:
+        try:
+            if time.time() - os.path.getmtime(stamp_path) < interval:
+                return []
+        except OSError:
+            pass  # Never checked yet
+    problems = [entry for entry in check_indexes(database) if entry[2] != "ok"]
+    if stamp_path:
+        try:
+            os.makedirs(os.path.dirname(stamp_path) or ".", exist_ok=True)
+            with open(stamp_path, "w") as f:
+                f.write(str(time.time()))
+        except OSError as e:
+            logger.debug(f"Could not write {stamp_path}: {e}")
+    if problems:
+        names = ", ".join(f"{collection}.{name} ({status})" for collection, name, status in problems)
+        logger.warning(f"{len(problems)} expected indexes need attention: {names}. Run `db migrate`.")
+    return problems
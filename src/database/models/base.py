@@ -0,0 +1,93 @@
+# src/database/models/base.py
+
+from typing import Dict, Any, List, Optional
+from database.models.codec import compile_codec
+
+
+def _list_changes(old: List[Any], new: List[Any]) -> Optional[Dict[str, Any]]:
+    """Express a list change as $push or $pull when that is exact, else None."""
+    if len(new) > len(old) and new[:len(old)] == old:
+        return {"$push": {"$each": new[len(old):]}}
+    if len(new) < len(old):
+        removed = [item for item in old if item not in new]
+        # $pull drops every equal element, so it only matches a plain removal
+        if removed and [item for item in old if item not in removed] == new:
+            return {"$pull": {"$in": removed}}
+    return None
+
+
+class TrackedModel:
+    """Remembers the last persisted state so updates only send changed fields.
+
+    Subclasses list their document fields in `__slots__` (in document order),
+    with `DEFAULTS` for fields that fall back to a value or factory when
+    missing and `ENCODERS` for fields that need converting on the way out.
+    `from_dict`, `to_dict` and the `View` class are generated from that.
+
+    Models built from a database document should go through `from_document`
+    (or call `mark_clean`); a model that was never marked clean is treated as
+    entirely dirty. The snapshot is the document itself, not a copy: containers
+    are only copied once read (see codec._copy_on_read).
+    """
+
+    __slots__ = ("_snapshot",)
+    DEFAULTS: Dict[str, Any] = {}
+    ENCODERS: Dict[str, Any] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "__slots__" in cls.__dict__:
+            from_dict, from_document, to_dict, view_class = compile_codec(cls)
+            cls.from_dict = staticmethod(from_dict)
+            cls.from_document = staticmethod(from_document)
+            cls.to_dict = to_dict
+            cls.View = view_class
+
+    @classmethod
+    def view(cls, data):
+        """Wrap a raw document without copying it (see DocumentView)."""
+        return cls.View(data)
+
+    def mark_clean(self):
+        self._snapshot = self.to_dict()
+
+    def original(self, field: str, default=None):
+        """The value `field` had when the model was last marked clean."""
+        snapshot = getattr(self, "_snapshot", None)
+        if snapshot is None:
+            return default
+        return snapshot.get(field)
+
+    def is_dirty(self) -> bool:
+        return bool(self.changes())
+
+    def dirty_fields(self) -> List[str]:
+        current = self.to_dict()
+        snapshot = getattr(self, "_snapshot", None)
+        if snapshot is None:
+            return [key for key in current if key != "_id"]
+        return [key for key, value in current.items()
+                if key != "_id" and value != snapshot.get(key)]
+
+    def changes(self) -> Dict[str, Dict[str, Any]]:
+        """Minimal update operators for the fields changed since mark_clean.
+
+        Repositories send exactly this from update(), so only the fields
+        changed since the model was loaded reach the database, and a clean
+        model costs no round trip.
+        """
+        current = self.to_dict()
+        snapshot = getattr(self, "_snapshot", None)
+        operators: Dict[str, Dict[str, Any]] = {}
+        previous = snapshot if snapshot is not None else {}
+        for key in self.dirty_fields():
+            value = current[key]
+            old = previous.get(key)
+            if isinstance(old, list) and isinstance(value, list):
+                list_update = _list_changes(old, value)
+                if list_update:
+                    (operator, argument), = list_update.items()
+                    operators.setdefault(operator, {})[key] = argument
+                    continue
+            operators.setdefault("$set", {})[key] = value
+        return operators
@@ -1,8 +1,12 @@
 from datetime import datetime
 from bson import ObjectId
+from database.models.base import TrackedModel
 
 
-class CheckIn:
+class CheckIn(TrackedModel):
+    __slots__ = ("_id", "user_id", "timestamp", "mood", "notes", "projects", "skills", "tags")
+    DEFAULTS = {"timestamp": datetime.utcnow, "projects": list, "skills": list, "tags": list}
+
     def __init__(self, user_id, mood, notes, projects=None, skills=None, tags=None, timestamp=None, _id=None):
         self._id = _id if _id else ObjectId()
         self.user_id = user_id
@@ -12,15 +16,3 @@ class CheckIn:
         self.projects = projects if projects else []
         self.skills = skills if skills else []
         self.tags = tags if tags else []
-
-    def to_dict(self):
-        return {
-            "_id": self._id,
-            "user_id": self.user_id,
-            "timestamp": self.timestamp,
-            "mood": self.mood,
-            "notes": self.notes,
-            "projects": self.projects,
-            "skills": self.skills,
-            "tags": self.tags
-        }
@@ -0,0 +1,158 @@
+# src/database/models/codec.py
+
+from typing import Any, Callable, Dict, Tuple, Type
+from bson import ObjectId
+
+
+class DocumentView:
+    """Read-through wrapper over a raw BSON document.
+
+    Attribute access goes straight to the wrapped dict, so nothing is copied
+    on hydration. Assignments write into the dict, and `to_dict()` returns the
+    dict itself. A missing defaulted field is stored in the dict the first
+    time it is read, so edits to it stick.
+    """
+
+    __slots__ = ("_doc",)
+    MODEL = None
+
+    def __init__(self, doc: Dict[str, Any]):
+        self._doc = doc
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._doc
+
+    def to_model(self):
+        """Decode the wrapped document into a tracked model."""
+        return self.MODEL.from_document(self._doc)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self._doc.get('_id')}>"
+
+
+def copy_value(value):
+    # Documents only nest lists and dicts around immutable BSON scalars, so
+    # this is a much cheaper stand-in for copy.deepcopy
+    if isinstance(value, list):
+        return [copy_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: copy_value(item) for key, item in value.items()}
+    return value
+
+
+def _field_defaults(model_class) -> Dict[str, Callable[[], Any]]:
+    defaults = {"_id": ObjectId, **model_class.DEFAULTS}
+    # Constants are wrapped so every default is a zero-argument factory
+    return {name: value if callable(value) else (lambda value=value: value)
+            for name, value in defaults.items()}
+
+
+def _view_property(name: str, default: Callable[[], Any] = None):
+    if default is None:
+        def getter(self):
+            return self._doc.get(name)
+    else:
+        def getter(self):
+            value = self._doc.get(name)
+            if value is None:
+                value = self._doc[name] = default()
+            return value
+
+    def setter(self, value):
+        self._doc[name] = value
+
+    return property(getter, setter)
+
+
+def _copy_on_read(name: str, slot):
+    """Property over a container slot that unshares it from the snapshot.
+
+    A loaded model shares its containers with the document it keeps as its
+    snapshot; the first read copies the container, so in-place edits show up
+    as changes and containers that are never read are never copied.
+    """
+    get, set_ = slot.__get__, slot.__set__
+
+    def getter(self):
+        value = get(self)
+        snapshot = getattr(self, "_snapshot", None)
+        if snapshot is not None and value is snapshot.get(name):
+            value = copy_value(value)
+            set_(self, value)
+        return value
+
+    return property(getter, set_)
+
+
+def compile_codec(model_class) -> Tuple[Callable, Callable, Callable, Type[DocumentView]]:
+    """Generate from_dict, from_document, to_dict and a view class from __slots__.
+
+    `from_document` is `from_dict` that also keeps `data` as the model's
+    snapshot, with the values filled in from defaults or changed by encoders
+    merged over it. Container fields (those defaulting to a list or dict) are
+    replaced on the class by copy-on-read properties (see _copy_on_read).
+
+    The functions are built as source and compiled once per class, so a decode
+    is a straight run of slot assignments with no per-field loop, signature
+    binding or __dict__ allocation.
+    """
+    fields = model_class.__slots__
+    defaults = _field_defaults(model_class)
+    encoders = model_class.ENCODERS
+    namespace: Dict[str, Any] = {"_new": object.__new__, "_cls": model_class}
+    containers = {name for name, default in defaults.items() if isinstance(default(), (list, dict))}
+
+    decoders = {}
+    for document in (False, True):
+        decode = [f"def {'from_document' if document else 'from_dict'}(data):",
+                  "    obj = _new(_cls)",
+                  "    get = data.get"]
+        if document:
+            decode.append("    changed = None")
+        for name in fields:
+            target = f"_set_{name}(obj, " if name in containers else f"obj.{name} = ("
+            if name in defaults:
+                decode.append(f"    value = get({name!r})")
+                decode.append("    if value is None:")
+                decode.append(f"        value = _default_{name}()")
+                if document and name not in encoders:
+                    decode.append("        changed = changed or {}")
+                    decode.append(f"        changed[{name!r}] = value")
+            else:
+                decode.append(f"    value = get({name!r})")
+            decode.append(f"    {target}value)")
+            if document and name in encoders:
+                # The snapshot holds what to_dict will produce
+                decode.append("    changed = changed or {}")
+                decode.append(f"    changed[{name!r}] = _encode_{name}(value)")
+        decode.append("    obj._snapshot = data if changed is None else {**data, **changed}"
+                      if document else "    obj._snapshot = None")
+        decode.append("    return obj")
+        decoders[document] = "\n".join(decode)
+
+    encode = ["def to_dict(self):",
+              "    return {"]
+    for name in fields:
+        if name in defaults:
+            namespace[f"_default_{name}"] = defaults[name]
+        if name in containers:
+            namespace[f"_set_{name}"] = model_class.__dict__[name].__set__
+        if name in encoders:
+            namespace[f"_encode_{name}"] = encoders[name]
+            encode.append(f"        {name!r}: _encode_{name}(self.{name}),")
+        else:
+            encode.append(f"        {name!r}: self.{name},")
+    encode.append("    }")
+
+    source = "\n\n".join([decoders[False], decoders[True], "\n".join(encode)]) + "\n"
+    exec(compile(source, f"<codec {model_class.__name__}>", "exec"), namespace)
+
+    for name in containers & set(fields):
+        setattr(model_class, name, _copy_on_read(name, model_class.__dict__[name]))
+
+    view_attrs = {"__slots__": (), "MODEL": model_class}
+    for name in fields:
+        view_attrs[name] = _view_property(name, defaults.get(name))
+    view_class = type(f"{model_class.__name__}View", (DocumentView,), view_attrs)
+
+    return namespace["from_dict"], namespace["from_document"], namespace["to_dict"], view_class
@@ -1,8 +1,12 @@
 from datetime import datetime
 from bson import ObjectId
+from database.models.base import TrackedModel
 
 
-class Log:
+class Log(TrackedModel):
+    __slots__ = ("_id", "user_id", "timestamp", "entry", "project_id", "skill_id", "tags")
+    DEFAULTS = {"timestamp": datetime.utcnow, "tags": list}
+
     def __init__(self, user_id, entry, project_id=None, skill_id=None, tags=None, timestamp=None, _id=None):
         self._id = _id if _id else ObjectId()
         self.user_id = user_id
@@ -11,14 +15,3 @@ class Log:
         self.project_id = project_id
         self.skill_id = skill_id
         self.tags = tags if tags else []
-
-    def to_dict(self):
-        return {
-            "_id": self._id,
-            "user_id": self.user_id,
-            "timestamp": self.timestamp,
-            "entry": self.entry,
-            "project_id": self.project_id,
-            "skill_id": self.skill_id,
-            "tags": self.tags
-        }
@@ -1,22 +1,18 @@
 # src/database/models/routine.py
 
 from bson import ObjectId
+from database.models.base import TrackedModel
 from datetime import timedelta
 
 
-class Routine:
+class Routine(TrackedModel):
+    __slots__ = ("_id", "user_id", "name", "task_ids", "description")
+    DEFAULTS = {"task_ids": list, "description": ""}
+    ENCODERS = {"task_ids": lambda task_ids: [str(task_id) for task_id in task_ids]}
+
     def __init__(self, user_id, name, task_ids, description="", _id=None):
         self._id = _id if _id else ObjectId()
         self.user_id = user_id
         self.name = name
         self.task_ids = task_ids  # List of Task ObjectIds
         self.description = description
-
-    def to_dict(self):
-        return {
-            "_id": self._id,
-            "user_id": self.user_id,
-            "name": self.name,
-            "task_ids": [str(task_id) for task_id in self.task_ids],
-            "description": self.description
-        }
@@ -1,10 +1,26 @@
 # src/database/models/skill.py
 
+import math
 from bson import ObjectId
+from database.models.base import TrackedModel
 
+# XP needed for level n is XP_PER_LEVEL * (n - 1) ** 2
+XP_PER_LEVEL = 100
 
-class Skill:
-    def __init__(self, user_id, name, description, level=1, xp=0, projects=None, logs=None, tags=None, parent=None, children=None, _id=None):
+
+def level_for_xp(xp) -> int:
+    return 1 + math.isqrt(max(int(xp or 0), 0) // XP_PER_LEVEL)
+
+
+class Skill(TrackedModel):
+    # `ancestors` holds the ids from the root down to the parent, as strings
+    # like `parent`; `subtree_xp` is this skill's xp plus all descendants'
+    __slots__ = ("_id", "user_id", "name", "description", "level", "xp", "projects", "logs", "tags",
+                 "parent", "children", "ancestors", "subtree_xp")
+    DEFAULTS = {"level": 1, "xp": 0, "projects": list, "logs": list, "tags": list, "children": list,
+                "ancestors": list, "subtree_xp": 0}
+
+    def __init__(self, user_id, name, description, level=1, xp=0, projects=None, logs=None, tags=None, parent=None, children=None, ancestors=None, subtree_xp=None, _id=None):
         self._id = _id if _id else ObjectId()
         self.user_id = user_id
         self.name = name
@@ -16,18 +32,9 @@ class Skill:
         self.tags = tags if tags else []
         self.parent = parent
         self.children = children if children else []
+        self.ancestors = ancestors if ancestors else []
+        self.subtree_xp = subtree_xp if subtree_xp is not None else xp
 
-    def to_dict(self):
-        return {
-            "_id": self._id,
-            "user_id": self.user_id,
-            "name": self.name,
-            "description": self.description,
-            "level": self.level,
-            "xp": self.xp,
-            "projects": self.projects,
-            "logs": self.logs,
-            "tags": self.tags,
-            "parent": self.parent,
-            "children": self.children
-        }
+    @property
+    def subtree_level(self) -> int:
+        return level_for_xp(self.subtree_xp)
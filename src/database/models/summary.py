@@ -0,0 +1,64 @@
+# src/database/models/summary.py
+
+from database.models.project import Project
+from database.models.skill import Skill
+from database.models.task import Task
+
+
+class LazyModel:
+    """A model hydrated from a projected document.
+
+    Projected fields are plain attributes; touching any other field loads
+    the full document once through `loader(_id)`.
+    """
+
+    MODEL = None
+    FIELDS = ()
+
+    def __init__(self, data, loader, model_class=None):
+        self.__dict__.update(data)
+        self.__dict__["_model_class"] = model_class or self.MODEL
+        self.__dict__["_loader"] = loader
+        self.__dict__["_loaded"] = False
+
+    @classmethod
+    def projection(cls):
+        return {field: 1 for field in cls.FIELDS}
+
+    def __getattr__(self, name):
+        # Only reached for attributes that are not set yet
+        if name.startswith("__") or self.__dict__.get("_loaded", True):
+            raise AttributeError(name)
+        self.load()
+        return getattr(self, name)
+
+    def load(self):
+        full = self._loader(self.__dict__["_id"])
+        self.__dict__["_loaded"] = True
+        if full is not None:
+            for key, value in full.to_dict().items():
+                self.__dict__.setdefault(key, value)
+        return self
+
+    def to_model(self):
+        """Fetch and return the complete model."""
+        return self._loader(self._id)
+
+    def __repr__(self):
+        model = self._model_class.__name__ if self._model_class else "Model"
+        return f"<{type(self).__name__} {model} {self.__dict__.get('_id')}>"
+
+
+class TaskSummary(LazyModel):
+    MODEL = Task
+    FIELDS = ("user_id", "project_id", "name", "status", "priority", "due_date")
+
+
+class ProjectSummary(LazyModel):
+    MODEL = Project
+    FIELDS = ("user_id", "name", "status", "start_date", "end_date", "xp_gain")
+
+
+class SkillSummary(LazyModel):
+    MODEL = Skill
+    FIELDS = ("user_id", "name", "level", "xp", "parent")
@@ -1,8 +1,13 @@
 from datetime import datetime
 from bson import ObjectId
+from database.models.base import TrackedModel
 
 
-class User:
+class User(TrackedModel):
+    __slots__ = ("_id", "username", "email", "password_hash", "created_at", "last_login", "settings")
+    DEFAULTS = {"created_at": datetime.utcnow,
+                "settings": lambda: {"theme": "default", "notification_preferences": {}}}
+
     def __init__(self, username, email, password_hash, created_at=None, last_login=None, settings=None, _id=None):
         self._id = _id if _id else ObjectId()
         self.username = username
@@ -14,14 +19,3 @@ class User:
             "theme": "default",
             "notification_preferences": {}
         }
-
-    def to_dict(self):
-        return {
-            "_id": self._id,
-            "username": self.username,
-            "email": self.email,
-            "password_hash": self.password_hash,
-            "created_at": self.created_at,
-            "last_login": self.last_login,
-            "settings": self.settings
-        }
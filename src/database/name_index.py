@@ -0,0 +1,233 @@
+# src/database/name_index.py
+
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+from bson import ObjectId
+
+from database.cache import CachedDatabase
+
+# Entity kinds and the collections their names live in
+COLLECTIONS = {"task": "tasks", "project": "projects", "skill": "skills", "routine": "routines"}
+
+# Dice coefficient a fuzzy candidate needs to be suggested
+FUZZY_THRESHOLD = 0.4
+
+
+class AmbiguousName(Exception):
+    def __init__(self, kind: str, name: str, candidates: List[str]):
+        self.kind = kind
+        self.name = name
+        self.candidates = candidates
+        super().__init__(f"'{name}' matches several {kind}s: {', '.join(candidates)}")
+
+
+def fold(name: str) -> str:
+    return " ".join(str(name).casefold().split())
+
+
+def trigrams(folded: str) -> Set[str]:
+    padded = f"  {folded} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.ids: Set[str] = set()
+
+
+class _UserNames:
+    """The names of one kind of entity for one user."""
+
+    def __init__(self):
+        self.names: Dict[str, str] = {}
+        self.exact: Dict[str, Set[str]] = defaultdict(set)
+        self.trie = _TrieNode()
+        self.grams: Dict[str, Set[str]] = defaultdict(set)
+        self.gram_counts: Dict[str, int] = {}
+
+    def add(self, entity_id: str, name: str):
+        if entity_id in self.names:
+            self.remove(entity_id)
+        folded = fold(name)
+        self.names[entity_id] = name
+        self.exact[folded].add(entity_id)
+        node = self.trie
+        for char in folded:
+            node = node.children.setdefault(char, _TrieNode())
+        node.ids.add(entity_id)
+        grams = trigrams(folded)
+        self.gram_counts[entity_id] = len(grams)
+        for gram in grams:
+            self.grams[gram].add(entity_id)
+
+    def remove(self, entity_id: str):
+        name = self.names.pop(entity_id, None)
+        if name is None:
+            return
+        folded = fold(name)
+        del self.gram_counts[entity_id]
+        self.exact[folded].discard(entity_id)
+        if not self.exact[folded]:
+            del self.exact[folded]
+        # Walk down, then prune the branch nodes left empty
+        path = [self.trie]
+        for char in folded:
+            path.append(path[-1].children[char])
+        path[-1].ids.discard(entity_id)
+        for depth in range(len(folded), 0, -1):
+            node = path[depth]
+            if node.ids or node.children:
+                break
+            del path[depth - 1].children[folded[depth - 1]]
+        for gram in trigrams(folded):
+            self.grams[gram].discard(entity_id)
+            if not self.grams[gram]:
+                del self.grams[gram]
+
+    def prefixed(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        node = self.trie
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        ids: List[str] = []
+        stack = [node]
+        while stack and (limit is None or len(ids) < limit):
+            node = stack.pop()
+            ids.extend(node.ids)
+            stack.extend(node.children[char] for char in sorted(node.children, reverse=True))
+        return ids[:limit] if limit is not None else ids
+
+    def similar(self, folded: str, limit: int) -> List[str]:
+        query = trigrams(folded)
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in query:
+            for entity_id in self.grams.get(gram, ()):
+                shared[entity_id] += 1
+        scored = []
+        for entity_id, count in shared.items():
+            score = 2 * count / (len(query) + self.gram_counts[entity_id])
+            if score >= FUZZY_THRESHOLD:
+                scored.append((-score, self.names[entity_id], entity_id))
+        return [entity_id for _, _, entity_id in sorted(scored)[:limit]]
+
+
+class NameIndex:
+    """In-memory, per-user name lookup for tasks, projects, skills and routines.
+
+    A user's names of one kind are loaded with a single projected query the
+    first time they are needed and then kept in step by the repositories,
+    which report creates, renames and deletes. Behind a CachedDatabase any
+    other write to those collections in this process drops the loaded names
+    too; writes from other processes are not seen, so callers confirm what
+    the index returns against the database. Lookups try the case-folded
+    name first, then (if allowed) unique prefixes, and fall back to trigram
+    similarity for suggestions only, so a typo never resolves to a
+    different entity.
+    """
+
+    def __init__(self, database):
+        self.db = database
+        self.users: Dict[Any, _UserNames] = {}
+        self.owners: Dict[Any, Any] = {}
+        self.lock = threading.RLock()
+        if isinstance(database, CachedDatabase):
+            database.on_write(self.collection_written)
+
+    def _names(self, kind: str, user_id) -> _UserNames:
+        # Called with the lock held
+        key = (kind, str(user_id))
+        names = self.users.get(key)
+        if names is None:
+            names = self.users[key] = _UserNames()
+            for document in self.db[COLLECTIONS[kind]].find({"user_id": ObjectId(user_id)}, {"name": 1}):
+                if document.get("name"):
+                    names.add(str(document["_id"]), document["name"])
+                    self.owners[(kind, str(document["_id"]))] = str(user_id)
+        return names
+
+    def resolve(self, kind: str, user_id, name: str, prefix: bool = True) -> Optional[str]:
+        """The id named by `name`, or None; raises AmbiguousName on several matches.
+
+        With prefix=False only the case-folded name itself matches.
+        """
+        folded = fold(name)
+        with self.lock:
+            names = self._names(kind, user_id)
+            exact = names.exact.get(folded)
+            if exact:
+                if len(exact) > 1:
+                    raise AmbiguousName(kind, name, [f"{names.names[entity_id]} ({entity_id})"
+                                                     for entity_id in sorted(exact)])
+                return next(iter(exact))
+            prefixed = names.prefixed(folded) if folded and prefix else []
+            if len(prefixed) == 1:
+                return prefixed[0]
+            if prefixed:
+                raise AmbiguousName(kind, name, sorted(names.names[entity_id] for entity_id in prefixed))
+            return None
+
+    def complete(self, kind: str, user_id, prefix: str, limit: int = 50) -> List[str]:
+        with self.lock:
+            names = self._names(kind, user_id)
+            return sorted({names.names[entity_id] for entity_id in names.prefixed(fold(prefix), limit)})
+
+    def suggest(self, kind: str, user_id, name: str, limit: int = 3) -> List[str]:
+        with self.lock:
+            names = self._names(kind, user_id)
+            return [names.names[entity_id] for entity_id in names.similar(fold(name), limit)]
+
+    # Called by the repositories after their writes succeed
+
+    def added(self, kind: str, model):
+        name = getattr(model, "name", None)
+        with self.lock:
+            names = self.users.get((kind, str(model.user_id)))
+            if names is not None and name:
+                names.add(str(model._id), name)
+                self.owners[(kind, str(model._id))] = str(model.user_id)
+
+    def renamed(self, kind: str, model):
+        self.added(kind, model)
+
+    def removed(self, kind: str, entity_id):
+        with self.lock:
+            user_id = self.owners.pop((kind, str(entity_id)), None)
+            names = self.users.get((kind, user_id))
+            if names is not None:
+                names.remove(str(entity_id))
+
+    def bulk_added(self, kind: str, models: List[Any], summary: Dict[str, Any]):
+        inserted = set(summary.get("inserted_ids", []))
+        for model in models:
+            if str(model._id) in inserted:
+                self.added(kind, model)
+
+    def bulk_renamed(self, kind: str, models: List[Any], summary: Dict[str, Any]):
+        failed = {error.get("_id") for error in summary["errors"]}
+        for model in models:
+            if str(model._id) not in failed:
+                self.renamed(kind, model)
+
+    def bulk_removed(self, kind: str, entity_ids: List[Any], summary: Dict[str, Any]):
+        failed = {error.get("_id") for error in summary["errors"]}
+        for entity_id in entity_ids:
+            if str(entity_id) not in failed:
+                self.removed(kind, entity_id)
+
+    def collection_written(self, collection: Optional[str]):
+        """Write hook of a CachedDatabase; None means any collection."""
+        for kind, name in COLLECTIONS.items():
+            if collection is None or collection == name:
+                self.invalidate(kind)
+
+    def invalidate(self, kind: Optional[str] = None, user_id=None):
+        """Forget loaded names so they are read again on next use."""
+        with self.lock:
+            for key in list(self.users):
+                if (kind is None or key[0] == kind) and (user_id is None or key[1] == str(user_id)):
+                    del self.users[key]
@@ -0,0 +1,107 @@
+# src/database/pagination.py
+
+import base64
+import json
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+from config import READ_BATCH_SIZE
+
+
+class InvalidPageToken(ValueError):
+    pass
+
+
+def _encode_value(value):
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "$oid" in value:
+        return ObjectId(value["$oid"])
+    if isinstance(value, dict) and "$date" in value:
+        return datetime.fromisoformat(value["$date"])
+    return value
+
+
+def encode_page_token(sort_value, last_id) -> str:
+    payload = json.dumps([_encode_value(sort_value), _encode_value(last_id)])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_page_token(token: str) -> Tuple[Any, Any]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        sort_value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+        return _decode_value(sort_value), _decode_value(last_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidPageToken(f"Invalid page token: {token}") from e
+
+
+def keyset_query(query: Dict[str, Any], sort_field: str, descending: bool,
+                 after: Optional[Tuple[Any, Any]]) -> Dict[str, Any]:
+    """Restrict `query` to documents strictly after the (sort value, _id) key."""
+    if after is None:
+        return query
+    sort_value, last_id = after
+    op = "$lt" if descending else "$gt"
+    if sort_field == "_id":
+        return {**query, "_id": {op: last_id}}
+    return {"$and": [query, {"$or": [
+        {sort_field: {op: sort_value}},
+        {sort_field: sort_value, "_id": {op: last_id}},
+    ]}]}
+
+
+def _sort(sort_field: str, descending: bool) -> List[Tuple[str, int]]:
+    direction = DESCENDING if descending else ASCENDING
+    if sort_field == "_id":
+        return [("_id", direction)]
+    return [(sort_field, direction), ("_id", direction)]
+
+
+def _with_sort_field(projection: Optional[Dict[str, Any]], sort_field: str):
+    # Inclusion projections must still return the field the keyset is built on
+    if projection and all(projection.values()) and sort_field not in projection:
+        return {**projection, sort_field: 1}
+    return projection
+
+
+def iter_documents(collection, query: Dict[str, Any], batch_size: int = READ_BATCH_SIZE,
+                   sort_field: str = "_id", descending: bool = False,
+                   projection: Optional[Dict[str, Any]] = None,
+                   page_token: Optional[str] = None, hint=None) -> Iterator[Dict[str, Any]]:
+    """Stream documents in keyset order; only one batch is held at a time."""
+    after = decode_page_token(page_token) if page_token else None
+    projection = _with_sort_field(projection, sort_field)
+    cursor = collection.find(keyset_query(query, sort_field, descending, after), projection)
+    cursor = cursor.sort(_sort(sort_field, descending)).batch_size(batch_size)
+    if hint is not None:
+        cursor = cursor.hint(hint)
+    try:
+        yield from cursor
+    finally:
+        cursor.close()
+
+
+def find_page(collection, query: Dict[str, Any], limit: int, page_token: Optional[str] = None,
+              sort_field: str = "_id", descending: bool = False,
+              projection: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Return up to `limit` documents and the token for the next page (None at the end)."""
+    after = decode_page_token(page_token) if page_token else None
+    projection = _with_sort_field(projection, sort_field)
+    cursor = collection.find(keyset_query(query, sort_field, descending, after), projection)
+    # Fetch one extra document to know whether another page exists
+    docs = list(cursor.sort(_sort(sort_field, descending)).limit(limit + 1))
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    last = docs[-1]
+    return docs, encode_page_token(last.get(sort_field) if sort_field != "_id" else None, last["_id"])
@@ -1,27 +1,100 @@
 from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from config import READ_BATCH_SIZE, PAGE_SIZE
 from database.models.checkin import CheckIn
+from database.pagination import iter_documents, find_page
+from database import bulk
 
 
 class CheckInRepository:
-    def __init__(self, database):
+    INDEXES = [
+        IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING)], name="user_timestamp"),
+    ]
+
+    def __init__(self, database, write_buffer=None, search_index=None):
         self.db = database
         self.collection = self.db.checkins
+        # Optional WriteBehindBuffer: creates are batched instead of inserted one by one
+        self.write_buffer = write_buffer
+        self.search_index = search_index
 
     def create(self, checkin):
-        result = self.collection.insert_one(checkin.to_dict())
-        return str(result.inserted_id)
+        document = checkin.to_dict()
+        if self.write_buffer is not None:
+            self.write_buffer.add(self.collection.name, document)
+        else:
+            self.collection.insert_one(document)
+        checkin.mark_clean()
+        if self.search_index is not None:
+            self.search_index.add("checkin", document)
+        return str(checkin._id)
+
+    def _sync(self):
+        # Reads see buffered writes
+        if self.write_buffer is not None and self.write_buffer.pending:
+            self.write_buffer.flush()
 
     def find_by_id(self, checkin_id):
+        self._sync()
         checkin_data = self.collection.find_one({"_id": ObjectId(checkin_id)})
-        return CheckIn(**checkin_data) if checkin_data else None
+        return CheckIn.from_document(checkin_data) if checkin_data else None
 
     def find_by_user(self, user_id):
+        self._sync()
         checkins = self.collection.find({"user_id": ObjectId(user_id)})
-        return [CheckIn(**checkin) for checkin in checkins]
+        return [CheckIn.from_document(checkin) for checkin in checkins]
+
+    def iter_by_user(self, user_id, batch_size=READ_BATCH_SIZE, page_token=None, view=False):
+        self._sync()
+        checkins = iter_documents(
+            self.collection, {"user_id": ObjectId(user_id)}, batch_size,
+            page_token=page_token, sort_field="timestamp", descending=True)
+        # Views wrap the raw documents, which is cheapest for read-only scans
+        hydrate = CheckIn.view if view else CheckIn.from_document
+        return (hydrate(checkin) for checkin in checkins)
+
+    def find_page_by_user(self, user_id, limit=PAGE_SIZE, page_token=None, view=False):
+        self._sync()
+        checkins, next_token = find_page(
+            self.collection, {"user_id": ObjectId(user_id)}, limit, page_token,
+            sort_field="timestamp", descending=True)
+        hydrate = CheckIn.view if view else CheckIn.from_document
+        return [hydrate(checkin) for checkin in checkins], next_token
 
     def update(self, checkin):
-        self.collection.update_one({"_id": checkin._id}, {
-                                   "$set": checkin.to_dict()})
+        self._sync()
+        changes = checkin.changes()
+        if not changes:
+            return 0
+        result = self.collection.update_one({"_id": checkin._id}, changes)
+        if self.search_index is not None:
+            self.search_index.add("checkin", checkin.to_dict())
+        checkin.mark_clean()
+        return result.modified_count
 
     def delete(self, checkin_id):
+        self._sync()
         self.collection.delete_one({"_id": ObjectId(checkin_id)})
+        if self.search_index is not None:
+            self.search_index.remove("checkin", checkin_id)
+
+    def bulk_create(self, checkins):
+        summary = bulk.bulk_create(self.collection, checkins)
+        if self.search_index is not None:
+            self.search_index.bulk_added("checkin", checkins, summary)
+        return summary
+
+    def bulk_update(self, checkins):
+        self._sync()
+        changed = [checkin for checkin in checkins if checkin.is_dirty()]
+        summary = bulk.bulk_update(self.collection, checkins)
+        if self.search_index is not None:
+            self.search_index.bulk_updated("checkin", changed, summary)
+        return summary
+
+    def bulk_delete(self, checkin_ids):
+        self._sync()
+        summary = bulk.bulk_delete(self.collection, checkin_ids)
+        if self.search_index is not None:
+            self.search_index.bulk_removed("checkin", checkin_ids, summary)
+        return summary
@@ -1,30 +1,113 @@
 from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from config import READ_BATCH_SIZE, PAGE_SIZE
 from database.models.log import Log
+from database.pagination import iter_documents, find_page
+from database import bulk
 
 
 class LogRepository:
-    def __init__(self, database):
+    INDEXES = [
+        IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING)], name="user_timestamp"),
+        IndexModel([("project_id", ASCENDING)], name="project_id"),
+    ]
+
+    def __init__(self, database, write_buffer=None, search_index=None):
         self.db = database
         self.collection = self.db.logs
+        # Optional WriteBehindBuffer: creates are batched instead of inserted one by one
+        self.write_buffer = write_buffer
+        self.search_index = search_index
 
     def create(self, log):
-        result = self.collection.insert_one(log.to_dict())
-        return str(result.inserted_id)
+        document = log.to_dict()
+        if self.write_buffer is not None:
+            self.write_buffer.add(self.collection.name, document)
+        else:
+            self.collection.insert_one(document)
+        log.mark_clean()
+        if self.search_index is not None:
+            self.search_index.add("log", document)
+        return str(log._id)
+
+    def _sync(self):
+        # Reads see buffered writes
+        if self.write_buffer is not None and self.write_buffer.pending:
+            self.write_buffer.flush()
 
     def find_by_id(self, log_id):
+        self._sync()
         log_data = self.collection.find_one({"_id": ObjectId(log_id)})
-        return Log(**log_data) if log_data else None
+        return Log.from_document(log_data) if log_data else None
 
     def find_by_user(self, user_id):
+        self._sync()
         logs = self.collection.find({"user_id": ObjectId(user_id)})
-        return [Log(**log) for log in logs]
+        return [Log.from_document(log) for log in logs]
 
     def find_by_project(self, project_id):
+        self._sync()
         logs = self.collection.find({"project_id": ObjectId(project_id)})
-        return [Log(**log) for log in logs]
+        return [Log.from_document(log) for log in logs]
+
+    def iter_by_user(self, user_id, batch_size=READ_BATCH_SIZE, page_token=None, view=False):
+        self._sync()
+        logs = iter_documents(
+            self.collection, {"user_id": ObjectId(user_id)}, batch_size,
+            page_token=page_token, sort_field="timestamp", descending=True)
+        # Views wrap the raw documents, which is cheapest for read-only scans
+        hydrate = Log.view if view else Log.from_document
+        return (hydrate(log) for log in logs)
+
+    def find_page_by_user(self, user_id, limit=PAGE_SIZE, page_token=None, view=False):
+        self._sync()
+        logs, next_token = find_page(
+            self.collection, {"user_id": ObjectId(user_id)}, limit, page_token,
+            sort_field="timestamp", descending=True)
+        hydrate = Log.view if view else Log.from_document
+        return [hydrate(log) for log in logs], next_token
+
+    def iter_by_project(self, project_id, batch_size=READ_BATCH_SIZE):
+        self._sync()
+        logs = iter_documents(
+            self.collection, {"project_id": ObjectId(project_id)}, batch_size,
+            sort_field="timestamp", descending=True)
+        return (Log.from_document(log) for log in logs)
 
     def update(self, log):
-        self.collection.update_one({"_id": log._id}, {"$set": log.to_dict()})
+        self._sync()
+        changes = log.changes()
+        if not changes:
+            return 0
+        result = self.collection.update_one({"_id": log._id}, changes)
+        if self.search_index is not None:
+            self.search_index.add("log", log.to_dict())
+        log.mark_clean()
+        return result.modified_count
 
     def delete(self, log_id):
+        self._sync()
         self.collection.delete_one({"_id": ObjectId(log_id)})
+        if self.search_index is not None:
+            self.search_index.remove("log", log_id)
+
+    def bulk_create(self, logs):
+        summary = bulk.bulk_create(self.collection, logs)
+        if self.search_index is not None:
+            self.search_index.bulk_added("log", logs, summary)
+        return summary
+
+    def bulk_update(self, logs):
+        self._sync()
+        changed = [log for log in logs if log.is_dirty()]
+        summary = bulk.bulk_update(self.collection, logs)
+        if self.search_index is not None:
+            self.search_index.bulk_updated("log", changed, summary)
+        return summary
+
+    def bulk_delete(self, log_ids):
+        self._sync()
+        summary = bulk.bulk_delete(self.collection, log_ids)
+        if self.search_index is not None:
+            self.search_index.bulk_removed("log", log_ids, summary)
+        return summary
@@ -1,27 +1,111 @@
 from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
+from config import READ_BATCH_SIZE, PAGE_SIZE
 from database.models.project import Project
+from database.models.summary import LazyModel, ProjectSummary
+from database.pagination import iter_documents, find_page
+from database import bulk
 
 
 class ProjectRepository:
-    def __init__(self, database):
+    INDEXES = [
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING)], name="user_status"),
+        IndexModel([("user_id", ASCENDING), ("name", ASCENDING)], name="user_name"),
+    ]
+
+    def __init__(self, database, name_index=None, search_index=None):
         self.db = database
         self.collection = self.db.projects
+        self.name_index = name_index
+        self.search_index = search_index
 
     def create(self, project):
         result = self.collection.insert_one(project.to_dict())
+        project.mark_clean()
+        if self.name_index is not None:
+            self.name_index.added("project", project)
+        if self.search_index is not None:
+            self.search_index.add("project", project.to_dict())
         return str(result.inserted_id)
 
-    def find_by_id(self, project_id):
-        project_data = self.collection.find_one({"_id": ObjectId(project_id)})
-        return Project(**project_data) if project_data else None
+    def find_by_id(self, project_id, projection=None):
+        project_data = self.collection.find_one({"_id": ObjectId(project_id)}, projection)
+        if not project_data:
+            return None
+        return self._hydrate(project_data, projection)
+
+    def find_by_user(self, user_id, projection=None):
+        projects = self.collection.find({"user_id": ObjectId(user_id)}, projection)
+        return [self._hydrate(project, projection) for project in projects]
+
+    def find_summaries_by_user(self, user_id):
+        projects = self.collection.find(
+            {"user_id": ObjectId(user_id)}, ProjectSummary.projection())
+        return [ProjectSummary(project, self.find_by_id) for project in projects]
+
+    def _hydrate(self, project_data, projection=None):
+        # Projected reads load the remaining fields lazily on access
+        if projection:
+            return LazyModel(project_data, self.find_by_id, Project)
+        return Project.from_document(project_data)
+
+    def find_by_name(self, user_id, name):
+        project_data = self.collection.find_one(
+            {"user_id": ObjectId(user_id), "name": name})
+        return Project.from_document(project_data) if project_data else None
 
-    def find_by_user(self, user_id):
-        projects = self.collection.find({"user_id": ObjectId(user_id)})
-        return [Project(**project) for project in projects]
+    def iter_by_user(self, user_id, batch_size=READ_BATCH_SIZE, page_token=None):
+        projects = iter_documents(
+            self.collection, {"user_id": ObjectId(user_id)}, batch_size,
+            page_token=page_token)
+        return (Project.from_document(project) for project in projects)
+
+    def find_page_by_user(self, user_id, limit=PAGE_SIZE, page_token=None):
+        projects, next_token = find_page(
+            self.collection, {"user_id": ObjectId(user_id)}, limit, page_token)
+        return [Project.from_document(project) for project in projects], next_token
 
     def update(self, project):
-        self.collection.update_one({"_id": project._id}, {
-                                   "$set": project.to_dict()})
+        changes = project.changes()
+        if not changes:
+            return 0
+        result = self.collection.update_one({"_id": project._id}, changes)
+        if self.name_index is not None and "name" in changes.get("$set", {}):
+            self.name_index.renamed("project", project)
+        if self.search_index is not None:
+            self.search_index.add("project", project.to_dict())
+        project.mark_clean()
+        return result.modified_count
 
     def delete(self, project_id):
         self.collection.delete_one({"_id": ObjectId(project_id)})
+        if self.search_index is not None:
+            self.search_index.remove("project", project_id)
+        if self.name_index is not None:
+            self.name_index.removed("project", project_id)
+
+    def bulk_create(self, projects):
+        summary = bulk.bulk_create(self.collection, projects)
+        if self.search_index is not None:
+            self.search_index.bulk_added("project", projects, summary)
+        if self.name_index is not None:
+            self.name_index.bulk_added("project", projects, summary)
+        return summary
+
+    def bulk_update(self, projects):
+        renamed = [project for project in projects if "name" in project.dirty_fields()]
+        changed = [project for project in projects if project.is_dirty()]
+        summary = bulk.bulk_update(self.collection, projects)
+        if self.search_index is not None:
+            self.search_index.bulk_updated("project", changed, summary)
+        if self.name_index is not None:
+            self.name_index.bulk_renamed("project", renamed, summary)
+        return summary
+
+    def bulk_delete(self, project_ids):
+        summary = bulk.bulk_delete(self.collection, project_ids)
+        if self.search_index is not None:
+            self.search_index.bulk_removed("project", project_ids, summary)
+        if self.name_index is not None:
+            self.name_index.bulk_removed("project", project_ids, summary)
+        return summary
@@ -1,33 +1,44 @@
 # src/database/repositories/protocol_repository.py
 
+from datetime import datetime
 from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
 from database.models.protocol import Protocol
 
 
 class ProtocolRepository:
+    INDEXES = [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ]
+
     def __init__(self, database):
         self.db = database
         self.collection = self.db.protocols
 
     def create(self, protocol):
         result = self.collection.insert_one(protocol.to_dict())
+        protocol.mark_clean()
         return str(result.inserted_id)
 
     def find_by_id(self, protocol_id):
         protocol_data = self.collection.find_one(
             {"_id": ObjectId(protocol_id)})
-        return Protocol.from_dict(protocol_data) if protocol_data else None
+        return Protocol.from_document(protocol_data) if protocol_data else None
 
     def find_by_user(self, user_id):
         protocol_data = self.collection.find_one(
             {"user_id": ObjectId(user_id)})
-        return Protocol.from_dict(protocol_data) if protocol_data else None
+        return Protocol.from_document(protocol_data) if protocol_data else None
 
     def update(self, protocol):
-        self.collection.update_one(
-            {"_id": protocol._id},
-            {"$set": protocol.to_dict()}
-        )
+        changes = protocol.changes()
+        if not changes:
+            return 0
+        protocol.last_updated = datetime.utcnow()
+        changes.setdefault("$set", {})["last_updated"] = protocol.last_updated
+        result = self.collection.update_one({"_id": protocol._id}, changes)
+        protocol.mark_clean()
+        return result.modified_count
 
     def delete(self, protocol_id):
         self.collection.delete_one({"_id": ObjectId(protocol_id)})
@@ -1,32 +1,88 @@
 # src/database/repositories/routine_repository.py
 
 from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
+from config import READ_BATCH_SIZE, PAGE_SIZE
 from database.models.routine import Routine
+from database.pagination import iter_documents, find_page
+from database import bulk
 
 
 class RoutineRepository:
-    def __init__(self, database):
+    INDEXES = [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ]
+
+    def __init__(self, database, name_index=None):
         self.db = database
         self.collection = self.db.routines
+        self.name_index = name_index
 
     def create(self, routine):
         result = self.collection.insert_one(routine.to_dict())
+        routine.mark_clean()
+        if self.name_index is not None:
+            self.name_index.added("routine", routine)
         return str(result.inserted_id)
 
     def find_by_id(self, routine_id):
         routine_data = self.collection.find_one({"_id": ObjectId(routine_id)})
-        return Routine(**routine_data) if routine_data else None
+        return Routine.from_document(routine_data) if routine_data else None
 
-    def find_by_user(self, user_id):
+    def find_by_user(self, user_id, view=False):
         routines = self.collection.find({"user_id": ObjectId(user_id)})
-        return [Routine(**routine) for routine in routines]
+        hydrate = Routine.view if view else Routine.from_document
+        return [hydrate(routine) for routine in routines]
+
+    def find_by_name(self, user_id, name):
+        routine_data = self.collection.find_one(
+            {"user_id": ObjectId(user_id), "name": name})
+        return Routine.from_document(routine_data) if routine_data else None
+
+    def iter_by_user(self, user_id, batch_size=READ_BATCH_SIZE, page_token=None):
+        routines = iter_documents(
+            self.collection, {"user_id": ObjectId(user_id)}, batch_size,
+            page_token=page_token)
+        return (Routine.from_document(routine) for routine in routines)
+
+    def find_page_by_user(self, user_id, limit=PAGE_SIZE, page_token=None):
+        routines, next_token = find_page(
+            self.collection, {"user_id": ObjectId(user_id)}, limit, page_token)
+        return [Routine.from_document(routine) for routine in routines], next_token
 
     def update(self, routine):
-        self.collection.update_one({"_id": routine._id}, {
-                                   "$set": routine.to_dict()})
+        changes = routine.changes()
+        if not changes:
+            return 0
+        result = self.collection.update_one({"_id": routine._id}, changes)
+        if self.name_index is not None and "name" in changes.get("$set", {}):
+            self.name_index.renamed("routine", routine)
+        routine.mark_clean()
+        return result.modified_count
 
     def delete(self, routine_id):
         self.collection.delete_one({"_id": ObjectId(routine_id)})
+        if self.name_index is not None:
+            self.name_index.removed("routine", routine_id)
+
+    def bulk_create(self, routines):
+        summary = bulk.bulk_create(self.collection, routines)
+        if self.name_index is not None:
+            self.name_index.bulk_added("routine", routines, summary)
+        return summary
+
+    def bulk_update(self, routines):
+        renamed = [routine for routine in routines if "name" in routine.dirty_fields()]
+        summary = bulk.bulk_update(self.collection, routines)
+        if self.name_index is not None:
+            self.name_index.bulk_renamed("routine", renamed, summary)
+        return summary
+
+    def bulk_delete(self, routine_ids):
+        summary = bulk.bulk_delete(self.collection, routine_ids)
+        if self.name_index is not None:
+            self.name_index.bulk_removed("routine", routine_ids, summary)
+        return summary
 
     def add_task_to_routine(self, routine_id, task_id):
         self.collection.update_one(
@@ -1,29 +1,96 @@
 from bson import ObjectId
+from pymongo import ASCENDING, IndexModel, UpdateOne
 from database.models.schedule import Schedule
+from database import bulk
 
 
 class ScheduleRepository:
+    INDEXES = [
+        IndexModel([("user_id", ASCENDING), ("date", ASCENDING)], name="user_date"),
+    ]
+
     def __init__(self, database):
         self.db = database
         self.collection = self.db.schedules
 
     def create(self, schedule):
         result = self.collection.insert_one(schedule.to_dict())
+        schedule.mark_clean()
         return str(result.inserted_id)
 
     def find_by_id(self, schedule_id):
         schedule_data = self.collection.find_one(
             {"_id": ObjectId(schedule_id)})
-        return Schedule(**schedule_data) if schedule_data else None
+        return Schedule.from_document(schedule_data) if schedule_data else None
 
     def find_by_user_and_date(self, user_id, date):
         schedule_data = self.collection.find_one(
             {"user_id": ObjectId(user_id), "date": date})
-        return Schedule(**schedule_data) if schedule_data else None
+        return Schedule.from_document(schedule_data) if schedule_data else None
 
     def update(self, schedule):
-        self.collection.update_one({"_id": schedule._id}, {
-                                   "$set": schedule.to_dict()})
+        changes = schedule.changes()
+        if not changes:
+            return 0
+        result = self.collection.update_one({"_id": schedule._id}, changes)
+        schedule.mark_clean()
+        return result.modified_count
+
+    def find_by_user_between(self, user_id, start, end):
+        schedules = self.collection.find(
+            {"user_id": ObjectId(user_id), "date": {"$gte": start, "$lt": end}}).sort("date", ASCENDING)
+        return [Schedule.from_document(schedule) for schedule in schedules]
+
+    def replace_days(self, user_id, days):
+        """Upsert the task slots of several days ({date: [entry, ...]}) in one round trip."""
+        requests = [UpdateOne({"user_id": ObjectId(user_id), "date": day},
+                              {"$set": {"tasks": Schedule.ENCODERS["tasks"](entries)},
+                               "$setOnInsert": {"tags": []}},
+                              upsert=True)
+                    for day, entries in days.items()]
+        if not requests:
+            return 0
+        result = self.collection.bulk_write(requests, ordered=False)
+        return result.upserted_count + result.modified_count
+
+    def insert_entry(self, user_id, date, entry):
+        """Add one task slot to a day, keeping the day's slots in time order."""
+        result = self.collection.update_one(
+            {"user_id": ObjectId(user_id), "date": date},
+            {"$push": {"tasks": {"$each": Schedule.ENCODERS["tasks"]([entry]), "$sort": {"start_time": 1}}},
+             "$setOnInsert": {"tags": []}},
+            upsert=True)
+        return result.modified_count + (1 if result.upserted_id else 0)
+
+    def patch_entries(self, schedule, changes):
+        """Set fields of single slots by position ({index: {field: value}}).
+
+        Each slot is matched on its loaded task and start time as well, so the
+        patch is refused (returns False) if the day changed in between.
+        """
+        if not changes:
+            return True
+        query = {"_id": schedule._id}
+        update = {}
+        for index, fields in changes.items():
+            entry = schedule.tasks[index]
+            query[f"tasks.{index}.task_id"] = entry["task_id"]
+            query[f"tasks.{index}.start_time"] = entry["start_time"]
+            update.update({f"tasks.{index}.{field}": value for field, value in fields.items()})
+        return self.collection.update_one(query, {"$set": update}).matched_count == 1
+
+    def delete_from(self, user_id, start):
+        """Drop the schedules dated `start` or later, e.g. beyond a new plan's horizon."""
+        return self.collection.delete_many({"user_id": ObjectId(user_id), "date": {"$gte": start}}).deleted_count
 
     def delete(self, schedule_id):
         self.collection.delete_one({"_id": ObjectId(schedule_id)})
+
+    def bulk_create(self, schedules):
+        return bulk.bulk_create(self.collection, schedules)
+
+    def bulk_update(self, schedules):
+        return bulk.bulk_update(self.collection, schedules)
+
+    def bulk_delete(self, schedule_ids):
+        return bulk.bulk_delete(self.collection, schedule_ids)
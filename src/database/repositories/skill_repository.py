@@ -1,26 +1,268 @@
 # src/database/repositories/skill_repository.py
 
 from bson import ObjectId
+from pymongo import ASCENDING, IndexModel, InsertOne, UpdateMany, UpdateOne
 from database.models.skill import Skill
+from database.models.summary import LazyModel, SkillSummary
+from database import bulk
 
 
 class SkillRepository:
-    def __init__(self, database):
+    INDEXES = [
+        IndexModel([("user_id", ASCENDING), ("name", ASCENDING)], name="user_name"),
+        IndexModel([("parent", ASCENDING)], name="parent"),
+        IndexModel([("ancestors", ASCENDING)], name="ancestors"),
+    ]
+
+    def __init__(self, database, name_index=None):
         self.db = database
         self.collection = self.db.skills
+        self.name_index = name_index
+
+    def create(self, skill):
+        # The insert, the parent's children list and the ancestors' subtree
+        # totals go out as one ordered bulk write
+        if skill.parent and not skill.ancestors:
+            parent = self.collection.find_one({"_id": ObjectId(skill.parent)}, {"ancestors": 1})
+            skill.ancestors = ((parent or {}).get("ancestors") or []) + [str(skill.parent)]
+        skill.subtree_xp = skill.xp
+        requests = [InsertOne(skill.to_dict())]
+        if skill.parent:
+            requests.append(UpdateOne({"_id": ObjectId(skill.parent)},
+                                      {"$addToSet": {"children": str(skill._id)}}))
+        if skill.ancestors and skill.xp:
+            requests.append(self._inc_ancestors(skill.ancestors, skill.xp))
+        self.collection.bulk_write(requests)
+        skill.mark_clean()
+        if self.name_index is not None:
+            self.name_index.added("skill", skill)
+        return str(skill._id)
+
+    def find_by_id(self, skill_id, projection=None):
+        skill_data = self.collection.find_one({"_id": ObjectId(skill_id)}, projection)
+        if not skill_data:
+            return None
+        return self._hydrate(skill_data, projection)
+
+    def find_by_user(self, user_id, projection=None):
+        skills = self.collection.find({"user_id": ObjectId(user_id)}, projection)
+        return [self._hydrate(skill, projection) for skill in skills]
+
+    def find_summaries_by_user(self, user_id):
+        skills = self.collection.find(
+            {"user_id": ObjectId(user_id)}, SkillSummary.projection())
+        return [SkillSummary(skill, self.find_by_id) for skill in skills]
+
+    def _hydrate(self, skill_data, projection=None):
+        # Projected reads load the remaining fields lazily on access
+        if projection:
+            return LazyModel(skill_data, self.find_by_id, Skill)
+        return Skill.from_document(skill_data)
+
+    def find_by_name(self, user_id, name):
+        skill_data = self.collection.find_one(
+            {"user_id": ObjectId(user_id), "name": name})
+        return Skill.from_document(skill_data) if skill_data else None
+
+    def update(self, skill):
+        # Hierarchy fields are owned by the repository: a parent change goes
+        # through move(), and an xp change is rolled up into subtree_xp with
+        # $inc so concurrent updates to other nodes are not overwritten
+        renamed = "name" in skill.dirty_fields()
+        new_parent = skill.parent
+        skill.parent = skill.original("parent", skill.parent)
+        delta = skill.xp - skill.original("xp", skill.xp)
+        skill.subtree_xp += delta
+        changes = skill.changes()
+        for field in ("subtree_xp", "ancestors", "children"):
+            changes.get("$set", {}).pop(field, None)
+        changes = {operator: fields for operator, fields in changes.items() if fields}
+        modified = 0
+        if changes or delta:
+            if delta:
+                changes["$inc"] = {"subtree_xp": delta}
+            requests = [UpdateOne({"_id": skill._id}, changes)]
+            if delta and skill.ancestors:
+                requests.append(self._inc_ancestors(skill.ancestors, delta))
+            modified = self.collection.bulk_write(requests).modified_count
+            skill.mark_clean()
+        if new_parent != skill.parent:
+            self.move(skill._id, new_parent)
+            moved = self.find_by_id(skill._id)
+            skill.parent, skill.ancestors = moved.parent, moved.ancestors
+            skill.mark_clean()
+            modified = modified or 1
+        if renamed and self.name_index is not None:
+            self.name_index.renamed("skill", skill)
+        return modified
+
+    def add_xp(self, skill, amount):
+        """Add xp to a skill and every ancestor's subtree total in one round trip."""
+        requests = [UpdateOne({"_id": skill._id}, {"$inc": {"xp": amount, "subtree_xp": amount}})]
+        if skill.ancestors:
+            requests.append(self._inc_ancestors(skill.ancestors, amount))
+        self.collection.bulk_write(requests)
+        skill.xp += amount
+        skill.subtree_xp += amount
+        skill.mark_clean()
+
+    def _inc_ancestors(self, ancestors, amount):
+        return UpdateMany({"_id": {"$in": [ObjectId(_id) for _id in ancestors]}},
+                          {"$inc": {"subtree_xp": amount}})
+
+    def delete(self, skill_id):
+        # Direct children move up to the deleted skill's parent
+        skill = self.collection.find_one({"_id": ObjectId(skill_id)})
+        if skill is None:
+            return
+        for child in self.collection.find({"parent": str(skill_id)}, {"_id": 1}):
+            self.move(child["_id"], skill.get("parent"))
+        requests = []
+        if skill.get("ancestors") and skill.get("xp"):
+            requests.append(self._inc_ancestors(skill["ancestors"], -skill["xp"]))
+        if skill.get("parent"):
+            requests.append(UpdateOne({"_id": ObjectId(skill["parent"])},
+                                      {"$pull": {"children": str(skill_id)}}))
+        if requests:
+            self.collection.bulk_write(requests)
+        self.collection.delete_one({"_id": ObjectId(skill_id)})
+        if self.name_index is not None:
+            self.name_index.removed("skill", skill_id)
+
+    def bulk_create(self, skills):
+        # Parents may be part of the same batch, so the paths are derived afterwards
+        summary = bulk.bulk_create(self.collection, skills)
+        if self.name_index is not None:
+            self.name_index.bulk_added("skill", skills, summary)
+        for user_id in {skill.user_id for skill in skills}:
+            self.rebuild_hierarchy(user_id)
+        return summary
 
-    # ... (existing methods)
+    def bulk_update(self, skills):
+        renamed = [skill for skill in skills if "name" in skill.dirty_fields()]
+        summary = bulk.bulk_update(self.collection, skills)
+        if self.name_index is not None:
+            self.name_index.bulk_renamed("skill", renamed, summary)
+        return summary
+
+    def bulk_delete(self, skill_ids):
+        summary = bulk.bulk_delete(self.collection, skill_ids)
+        if self.name_index is not None:
+            self.name_index.bulk_removed("skill", skill_ids, summary)
+        return summary
 
     def find_children(self, skill_id):
         children = self.collection.find({"parent": str(skill_id)})
-        return [Skill(**child) for child in children]
+        return [Skill.from_document(child) for child in children]
+
+    def find_subtree(self, skill_id):
+        """The skill and all its descendants, parents before children."""
+        skills = self.collection.find(
+            {"$or": [{"_id": ObjectId(skill_id)}, {"ancestors": str(skill_id)}]})
+        return sorted((Skill.from_document(skill) for skill in skills),
+                      key=lambda skill: len(skill.ancestors))
+
+    def find_tree_by_name(self, user_id, name):
+        """Return (skill, descendants) for a named skill in a single aggregate."""
+        result = list(self.collection.aggregate([
+            {"$match": {"user_id": ObjectId(user_id), "name": name}},
+            {"$limit": 1},
+            {"$addFields": {"_path_id": {"$toString": "$_id"}}},
+            {"$lookup": {"from": self.collection.name, "localField": "_path_id",
+                         "foreignField": "ancestors", "as": "_descendants"}},
+        ]))
+        if not result:
+            return None
+        document = result[0]
+        descendants = document.pop("_descendants")
+        document.pop("_path_id")
+        return Skill.from_document(document), sorted(
+            (Skill.from_document(descendant) for descendant in descendants),
+            key=lambda skill: len(skill.ancestors))
+
+    def move(self, skill_id, parent_id=None):
+        """Re-parent a skill (None makes it a root), carrying its subtree along."""
+        skill_id = str(skill_id)
+        subtree = list(self.collection.find(
+            {"$or": [{"_id": ObjectId(skill_id)}, {"ancestors": skill_id}]},
+            {"parent": 1, "ancestors": 1, "subtree_xp": 1, "xp": 1}))
+        skill = next((doc for doc in subtree if str(doc["_id"]) == skill_id), None)
+        if skill is None:
+            raise ValueError(f"Skill {skill_id} does not exist")
+        if parent_id is not None and str(parent_id) in {str(doc["_id"]) for doc in subtree}:
+            raise ValueError("A skill cannot be moved under itself or its descendants")
+
+        new_ancestors = []
+        if parent_id is not None:
+            parent = self.collection.find_one({"_id": ObjectId(parent_id)}, {"ancestors": 1})
+            if parent is None:
+                raise ValueError(f"Skill {parent_id} does not exist")
+            new_ancestors = (parent.get("ancestors") or []) + [str(parent_id)]
+        old_ancestors = skill.get("ancestors") or []
+        subtree_xp = skill.get("subtree_xp", skill.get("xp", 0))
+
+        requests = []
+        if old_ancestors and subtree_xp:
+            requests.append(self._inc_ancestors(old_ancestors, -subtree_xp))
+        if new_ancestors and subtree_xp:
+            requests.append(self._inc_ancestors(new_ancestors, subtree_xp))
+        if skill.get("parent"):
+            requests.append(UpdateOne({"_id": ObjectId(skill["parent"])},
+                                      {"$pull": {"children": skill_id}}))
+        if parent_id is not None:
+            requests.append(UpdateOne({"_id": ObjectId(parent_id)},
+                                      {"$addToSet": {"children": skill_id}}))
+        requests.append(UpdateOne({"_id": skill["_id"]}, {"$set": {
+            "parent": str(parent_id) if parent_id is not None else None,
+            "ancestors": new_ancestors}}))
+        depth = len(old_ancestors)
+        for doc in subtree:
+            if doc is not skill:
+                # Keep the part of the path below the moved skill
+                requests.append(UpdateOne({"_id": doc["_id"]}, {"$set": {
+                    "ancestors": new_ancestors + doc["ancestors"][depth:]}}))
+        self.collection.bulk_write(requests)
 
     def update_hierarchy(self, skill_id, parent_id=None, child_ids=None):
-        update = {}
         if parent_id is not None:
-            update["parent"] = str(parent_id)
-        if child_ids is not None:
-            update["children"] = [str(child_id) for child_id in child_ids]
+            self.move(skill_id, parent_id)
+        for child_id in child_ids or []:
+            self.move(child_id, skill_id)
+
+    def rebuild_hierarchy(self, user_id=None):
+        """Recompute children, ancestors and subtree_xp from the parent links.
+
+        Used to backfill existing data; returns the number of skills updated.
+        """
+        query = {"user_id": ObjectId(user_id)} if user_id else {}
+        skills = {str(doc["_id"]): doc for doc in self.collection.find(
+            query, {"parent": 1, "xp": 1, "children": 1, "ancestors": 1, "subtree_xp": 1})}
+
+        def path(skill_id):
+            ancestors, seen = [], {skill_id}
+            parent = skills[skill_id].get("parent")
+            # Parents outside the set (or a cycle) end the path
+            while parent and parent in skills and parent not in seen:
+                ancestors.insert(0, parent)
+                seen.add(parent)
+                parent = skills[parent].get("parent")
+            return ancestors
+
+        paths = {skill_id: path(skill_id) for skill_id in skills}
+        totals = {skill_id: doc.get("xp") or 0 for skill_id, doc in skills.items()}
+        children = {skill_id: [] for skill_id in skills}
+        for skill_id, ancestors in paths.items():
+            for ancestor in ancestors:
+                totals[ancestor] += skills[skill_id].get("xp") or 0
+            if ancestors:
+                children[ancestors[-1]].append(skill_id)
 
-        self.collection.update_one(
-            {"_id": ObjectId(skill_id)}, {"$set": update})
+        requests = []
+        for skill_id, doc in skills.items():
+            fields = {"ancestors": paths[skill_id], "subtree_xp": totals[skill_id],
+                      "children": children[skill_id]}
+            if any(doc.get(key) != value for key, value in fields.items()):
+                requests.append(UpdateOne({"_id": doc["_id"]}, {"$set": fields}))
+        if requests:
+            self.collection.bulk_write(requests, ordered=False)
+        return len(requests)
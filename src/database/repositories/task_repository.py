@@ -1,30 +1,135 @@
 from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
+from config import READ_BATCH_SIZE, PAGE_SIZE
 from database.models.task import Task
+from database.models.summary import LazyModel, TaskSummary
+from database.pagination import iter_documents, find_page
+from database import bulk
 
 
 class TaskRepository:
-    def __init__(self, database):
+    INDEXES = [
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING), ("due_date", ASCENDING)],
+                   name="user_status_due_date"),
+        IndexModel([("user_id", ASCENDING), ("name", ASCENDING)], name="user_name"),
+        IndexModel([("project_id", ASCENDING)], name="project_id"),
+    ]
+
+    def __init__(self, database, name_index=None, search_index=None):
         self.db = database
         self.collection = self.db.tasks
+        self.name_index = name_index
+        self.search_index = search_index
 
     def create(self, task):
         result = self.collection.insert_one(task.to_dict())
+        task.mark_clean()
+        if self.name_index is not None:
+            self.name_index.added("task", task)
+        if self.search_index is not None:
+            self.search_index.add("task", task.to_dict())
         return str(result.inserted_id)
 
-    def find_by_id(self, task_id):
-        task_data = self.collection.find_one({"_id": ObjectId(task_id)})
-        return Task(**task_data) if task_data else None
+    def find_by_id(self, task_id, projection=None):
+        task_data = self.collection.find_one({"_id": ObjectId(task_id)}, projection)
+        if not task_data:
+            return None
+        return self._hydrate(task_data, projection)
+
+    def find_by_user(self, user_id, projection=None):
+        tasks = self.collection.find({"user_id": ObjectId(user_id)}, projection)
+        return [self._hydrate(task, projection) for task in tasks]
+
+    def find_open_by_user(self, user_id):
+        tasks = self.collection.find(
+            {"user_id": ObjectId(user_id), "status": {"$ne": "completed"}})
+        return [Task.from_document(task) for task in tasks]
 
-    def find_by_user(self, user_id):
-        tasks = self.collection.find({"user_id": ObjectId(user_id)})
-        return [Task(**task) for task in tasks]
+    def find_names(self, task_ids):
+        """Map task id strings to names with one query."""
+        tasks = self.collection.find(
+            {"_id": {"$in": [ObjectId(task_id) for task_id in task_ids]}}, {"name": 1})
+        return {str(task["_id"]): task.get("name") for task in tasks}
+
+    def find_summaries_by_user(self, user_id):
+        tasks = self.collection.find(
+            {"user_id": ObjectId(user_id)}, TaskSummary.projection())
+        return [TaskSummary(task, self.find_by_id) for task in tasks]
+
+    def _hydrate(self, task_data, projection=None):
+        # Projected reads load the remaining fields lazily on access
+        if projection:
+            return LazyModel(task_data, self.find_by_id, Task)
+        return Task.from_document(task_data)
 
     def find_by_project(self, project_id):
         tasks = self.collection.find({"project_id": ObjectId(project_id)})
-        return [Task(**task) for task in tasks]
+        return [Task.from_document(task) for task in tasks]
+
+    def find_by_name(self, user_id, name):
+        task_data = self.collection.find_one(
+            {"user_id": ObjectId(user_id), "name": name})
+        return Task.from_document(task_data) if task_data else None
+
+    def iter_by_user(self, user_id, batch_size=READ_BATCH_SIZE, page_token=None, view=False):
+        tasks = iter_documents(
+            self.collection, {"user_id": ObjectId(user_id)}, batch_size,
+            page_token=page_token)
+        # Views wrap the raw documents, which is cheapest for read-only scans
+        hydrate = Task.view if view else Task.from_document
+        return (hydrate(task) for task in tasks)
+
+    def find_page_by_user(self, user_id, limit=PAGE_SIZE, page_token=None):
+        tasks, next_token = find_page(
+            self.collection, {"user_id": ObjectId(user_id)}, limit, page_token)
+        return [Task.from_document(task) for task in tasks], next_token
+
+    def iter_by_project(self, project_id, batch_size=READ_BATCH_SIZE):
+        tasks = iter_documents(
+            self.collection, {"project_id": ObjectId(project_id)}, batch_size)
+        return (Task.from_document(task) for task in tasks)
 
     def update(self, task):
-        self.collection.update_one({"_id": task._id}, {"$set": task.to_dict()})
+        changes = task.changes()
+        if not changes:
+            return 0
+        result = self.collection.update_one({"_id": task._id}, changes)
+        if self.name_index is not None and "name" in changes.get("$set", {}):
+            self.name_index.renamed("task", task)
+        if self.search_index is not None:
+            self.search_index.add("task", task.to_dict())
+        task.mark_clean()
+        return result.modified_count
 
     def delete(self, task_id):
         self.collection.delete_one({"_id": ObjectId(task_id)})
+        if self.search_index is not None:
+            self.search_index.remove("task", task_id)
+        if self.name_index is not None:
+            self.name_index.removed("task", task_id)
+
+    def bulk_create(self, tasks):
+        summary = bulk.bulk_create(self.collection, tasks)
+        if self.search_index is not None:
+            self.search_index.bulk_added("task", tasks, summary)
+        if self.name_index is not None:
+            self.name_index.bulk_added("task", tasks, summary)
+        return summary
+
+    def bulk_update(self, tasks):
+        renamed = [task for task in tasks if "name" in task.dirty_fields()]
+        changed = [task for task in tasks if task.is_dirty()]
+        summary = bulk.bulk_update(self.collection, tasks)
+        if self.search_index is not None:
+            self.search_index.bulk_updated("task", changed, summary)
+        if self.name_index is not None:
+            self.name_index.bulk_renamed("task", renamed, summary)
+        return summary
+
+    def bulk_delete(self, task_ids):
+        summary = bulk.bulk_delete(self.collection, task_ids)
+        if self.search_index is not None:
+            self.search_index.bulk_removed("task", task_ids, summary)
+        if self.name_index is not None:
+            self.name_index.bulk_removed("task", task_ids, summary)
+        return summary
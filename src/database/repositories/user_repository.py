@@ -1,26 +1,47 @@
 from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
 from database.models.user import User
 
 
 class UserRepository:
+    INDEXES = [
+        # Partial so legacy documents without a username do not collide
+        IndexModel([("username", ASCENDING)], name="username", unique=True,
+                   partialFilterExpression={"username": {"$exists": True}}),
+    ]
+
     def __init__(self, database):
         self.db = database
         self.collection = self.db.users
 
     def create(self, user):
         result = self.collection.insert_one(user.to_dict())
+        user.mark_clean()
         return str(result.inserted_id)
 
     def find_by_id(self, user_id):
         user_data = self.collection.find_one({"_id": ObjectId(user_id)})
-        return User(**user_data) if user_data else None
+        return User.from_document(user_data) if user_data else None
 
     def find_by_username(self, username):
         user_data = self.collection.find_one({"username": username})
-        return User(**user_data) if user_data else None
+        return User.from_document(user_data) if user_data else None
+
+    def find_current(self, username=None):
+        # Single-user CLI: use the configured username, else the first user
+        if username:
+            return self.find_by_username(username)
+        user_data = self.collection.find_one(
+            {"username": {"$exists": True}}, sort=[("_id", 1)])
+        return User.from_document(user_data) if user_data else None
 
     def update(self, user):
-        self.collection.update_one({"_id": user._id}, {"$set": user.to_dict()})
+        changes = user.changes()
+        if not changes:
+            return 0
+        result = self.collection.update_one({"_id": user._id}, changes)
+        user.mark_clean()
+        return result.modified_count
 
     def delete(self, user_id):
         self.collection.delete_one({"_id": ObjectId(user_id)})
@@ -0,0 +1,265 @@
+# src/database/search_index.py
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from config import SEARCH_INDEX_PATH, READ_BATCH_SIZE
+from database.pagination import InvalidPageToken, encode_page_token, decode_page_token
+
+# What gets indexed from each collection. "title" and "body" are ranked
+# text; "projects"/"skills" hold the id (or list of ids) used by filters.
+SOURCES = {
+    "log": {"collection": "logs", "title": None, "body": "entry", "time": "timestamp",
+            "projects": "project_id", "skills": "skill_id"},
+    "checkin": {"collection": "checkins", "title": None, "body": "notes", "time": "timestamp",
+                "projects": "projects", "skills": "skills"},
+    "task": {"collection": "tasks", "title": "name", "body": "description", "time": "created_at",
+             "projects": "project_id", "skills": None},
+    "project": {"collection": "projects", "title": "name", "body": "description", "time": "start_date",
+                "projects": "_id", "skills": "skills"},
+}
+
+# bm25() column weights for title, body and tags
+WEIGHTS = (2.0, 1.0, 1.5)
+
+HIGHLIGHT = ("**", "**")
+
+
+def _ids(value) -> List[str]:
+    if value is None or value == "":
+        return []
+    values = value if isinstance(value, (list, tuple, set)) else [value]
+    return [str(item) for item in values if item is not None and item != ""]
+
+
+def _timestamp(value) -> Optional[float]:
+    return value.timestamp() if isinstance(value, datetime) else None
+
+
+def match_expression(query: str) -> str:
+    """Turn free text into an FTS5 query: quoted phrases stay phrases, every term must match."""
+    parts = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query):
+        terms = re.findall(r"\w+", phrase or word)
+        if terms:
+            parts.append('"' + " ".join(terms) + '"')
+    return " ".join(parts)
+
+
+class SearchIndex:
+    """Local full-text index over logs, check-ins, tasks and projects.
+
+    A SQLite FTS5 table holds the text (inverted index, BM25 ranking,
+    snippets) next to a plain table of the fields results are filtered on.
+    The repositories update it on every write; `rebuild` re-reads the
+    collections for writes made around them. The file is shared by every
+    process on the machine, like the response cache.
+    """
+
+    def __init__(self, path: str = SEARCH_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "id INTEGER PRIMARY KEY, kind TEXT, doc_id TEXT, user_id TEXT, timestamp REAL, "
+            "UNIQUE (kind, doc_id))")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_user_timestamp ON entries (user_id, timestamp)")
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS entries_text USING fts5("
+            "title, body, tags, tokenize='porter unicode61 remove_diacritics 2')")
+        # Project, skill and tag filters: one row per (entry, value)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entry_links (entry_id INTEGER, field TEXT, value TEXT)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entry_links_value ON entry_links (field, value, entry_id)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entry_links_entry ON entry_links (entry_id)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+
+    # Writes
+
+    def add(self, kind: str, document: Dict[str, Any]):
+        """Index (or re-index) one document, given as stored in MongoDB."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._write(kind, document)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def add_many(self, kind: str, documents: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for document in documents:
+                    self._write(kind, document)
+                    count += 1
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return count
+
+    def remove(self, kind: str, doc_id):
+        self.remove_many(kind, [doc_id])
+
+    def remove_many(self, kind: str, doc_ids: Iterable[Any]):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for doc_id in doc_ids:
+                    self._delete(kind, str(doc_id))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def bulk_added(self, kind: str, models: List[Any], summary: Dict[str, Any]):
+        inserted = set(summary.get("inserted_ids", []))
+        self.add_many(kind, [model.to_dict() for model in models if str(model._id) in inserted])
+
+    def bulk_updated(self, kind: str, models: List[Any], summary: Dict[str, Any]):
+        failed = {error.get("_id") for error in summary["errors"]}
+        self.add_many(kind, [model.to_dict() for model in models if str(model._id) not in failed])
+
+    def bulk_removed(self, kind: str, doc_ids: List[Any], summary: Dict[str, Any]):
+        failed = {error.get("_id") for error in summary["errors"]}
+        self.remove_many(kind, [doc_id for doc_id in doc_ids if str(doc_id) not in failed])
+
+    def _write(self, kind: str, document: Dict[str, Any]):
+        # Called inside a transaction with the lock held
+        source = SOURCES[kind]
+        doc_id = str(document["_id"])
+        self._delete(kind, doc_id)
+        entry_id = self._conn.execute(
+            "INSERT INTO entries (kind, doc_id, user_id, timestamp) VALUES (?, ?, ?, ?)",
+            (kind, doc_id, str(document.get("user_id")), _timestamp(document.get(source["time"])))).lastrowid
+        tags = [str(tag) for tag in document.get("tags") or []]
+        self._conn.execute(
+            "INSERT INTO entries_text (rowid, title, body, tags) VALUES (?, ?, ?, ?)",
+            (entry_id, (document.get(source["title"]) or "") if source["title"] else "",
+             document.get(source["body"]) or "", " ".join(tags)))
+        links = [("tag", tag.casefold()) for tag in tags]
+        for field in ("projects", "skills"):
+            if source[field]:
+                links += [(field, value) for value in _ids(document.get(source[field]))]
+        self._conn.executemany(
+            "INSERT INTO entry_links VALUES (?, ?, ?)", [(entry_id, field, value) for field, value in links])
+
+    def _delete(self, kind: str, doc_id: str):
+        row = self._conn.execute(
+            "SELECT id FROM entries WHERE kind = ? AND doc_id = ?", (kind, doc_id)).fetchone()
+        if row is None:
+            return
+        self._conn.execute("DELETE FROM entries WHERE id = ?", row)
+        self._conn.execute("DELETE FROM entries_text WHERE rowid = ?", row)
+        self._conn.execute("DELETE FROM entry_links WHERE entry_id = ?", row)
+
+    def rebuild(self, database, user_id=None, batch_size: int = READ_BATCH_SIZE) -> Dict[str, int]:
+        """Re-read every indexed collection (for one user, or everyone)."""
+        counts = {}
+        query = {"user_id": ObjectId(user_id)} if user_id else {}
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if user_id:
+                    stale = "SELECT id FROM entries WHERE user_id = ?"
+                    self._conn.execute(f"DELETE FROM entries_text WHERE rowid IN ({stale})", (str(user_id),))
+                    self._conn.execute(f"DELETE FROM entry_links WHERE entry_id IN ({stale})", (str(user_id),))
+                    self._conn.execute("DELETE FROM entries WHERE user_id = ?", (str(user_id),))
+                else:
+                    for table in ("entries", "entries_text", "entry_links"):
+                        self._conn.execute(f"DELETE FROM {table}")
+                for kind, source in SOURCES.items():
+                    projection = {field: 1 for field in ["user_id", "tags", *(
+                        source[key] for key in ("title", "body", "time", "projects", "skills"))] if field}
+                    cursor = database[source["collection"]].find(query, projection).batch_size(batch_size)
+                    counts[kind] = 0
+                    for document in cursor:
+                        self._write(kind, document)
+                        counts[kind] += 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta VALUES (?, ?)", (f"built:{user_id or '*'}", str(time.time())))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return counts
+
+    def is_built(self, user_id) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM meta WHERE name IN (?, 'built:*')", (f"built:{user_id}",)).fetchone() is not None
+
+    # Reads
+
+    def search(self, user_id, query: str, limit: int = 20, page_token: Optional[str] = None,
+               kinds: Optional[List[str]] = None, since: Optional[datetime] = None,
+               until: Optional[datetime] = None, project_id=None, skill_id=None,
+               tag: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Best matches first as (results, next_page_token).
+
+        Each result has kind, doc_id, timestamp, score, the highlighted title
+        and a highlighted snippet of the body. Every term must match;
+        "quoted phrases" match as phrases.
+        """
+        expression = match_expression(query)
+        if not expression:
+            return [], None
+        offset = 0
+        if page_token:
+            offset, token_query = decode_page_token(page_token)
+            if token_query != expression or not isinstance(offset, int):
+                raise InvalidPageToken("Page token belongs to a different search")
+
+        sql = [f"SELECT e.kind, e.doc_id, e.timestamp, bm25(entries_text, {', '.join(map(str, WEIGHTS))}) AS score, "
+               "highlight(entries_text, 0, ?, ?), snippet(entries_text, 1, ?, ?, '…', 16), entries_text.tags "
+               "FROM entries_text JOIN entries e ON e.id = entries_text.rowid "
+               "WHERE entries_text MATCH ? AND e.user_id = ?"]
+        params: List[Any] = [*HIGHLIGHT, *HIGHLIGHT, expression, str(user_id)]
+        if kinds:
+            sql.append(f"AND e.kind IN ({', '.join('?' for _ in kinds)})")
+            params += kinds
+        if since:
+            sql.append("AND e.timestamp >= ?")
+            params.append(since.timestamp())
+        if until:
+            sql.append("AND e.timestamp < ?")
+            params.append(until.timestamp())
+        for field, value in (("projects", project_id), ("skills", skill_id), ("tag", tag)):
+            if value:
+                sql.append("AND e.id IN (SELECT entry_id FROM entry_links WHERE field = ? AND value = ?)")
+                params += [field, str(value).casefold() if field == "tag" else str(value)]
+        # One extra row tells whether there is a next page
+        sql.append("ORDER BY score, e.id LIMIT ? OFFSET ?")
+        params += [limit + 1, offset]
+
+        with self._lock:
+            try:
+                rows = self._conn.execute(" ".join(sql), params).fetchall()
+            except sqlite3.OperationalError as e:
+                raise ValueError(f"Cannot search for '{query}': {e}") from e
+        results = [{"kind": kind, "doc_id": doc_id,
+                    "timestamp": datetime.fromtimestamp(timestamp) if timestamp is not None else None,
+                    "score": -score, "title": title, "snippet": snippet, "tags": tags}
+                   for kind, doc_id, timestamp, score, title, snippet, tags in rows[:limit]]
+        next_token = encode_page_token(offset + limit, expression) if len(rows) > limit else None
+        return results, next_token
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT kind, COUNT(*) FROM entries GROUP BY kind").fetchall())
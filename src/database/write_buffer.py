@@ -0,0 +1,273 @@
+# src/database/write_buffer.py
+
+import atexit
+import fcntl
+import glob
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import json_util
+from pymongo.errors import BulkWriteError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+class WriteBufferFull(Exception):
+    pass
+
+
+class WriteBehindBuffer:
+    """Batches inserts into insert_many behind a durable local spool.
+
+    `add` appends the document to a JSON-lines spool file before queueing it,
+    so a crash or an unreachable server loses nothing: the spool is replayed
+    on the next start.
+
+    Every process gets its own spool (`<name>.<pid>-<token>.jsonl` next to
+    `spool_path`) and holds an exclusive lock on it while running, so
+    processes never rewrite each other's entries. On start, spools whose
+    lock is free belong to processes that are gone and are taken over.
+
+    A background thread flushes when `max_batch` documents are pending or
+    `flush_interval` seconds have passed, and `close` (also run at exit)
+    flushes what is left.
+
+    Documents must carry their own `_id`. Replays after a partial flush then
+    hit duplicate-key errors, which are treated as already written.
+
+    When `max_pending` documents are waiting, `add` blocks for up to
+    `block_timeout` seconds and then raises WriteBufferFull.
+    """
+
+    def __init__(self, database, spool_path: str, max_batch: int = 500, flush_interval: float = 1.0,
+                 max_pending: int = 10000, block_timeout: float = 5.0, fsync: bool = False):
+        self.db = database
+        base, ext = os.path.splitext(spool_path)
+        self.spool_pattern = (glob.escape(base) + ".*" + ext, spool_path)
+        self.spool_path = f"{base}.{os.getpid()}-{uuid.uuid4().hex[:8]}{ext}"
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.block_timeout = block_timeout
+        self.fsync = fsync
+
+        self.pending: List[Tuple[str, Dict[str, Any]]] = []
+        self.lock = threading.Lock()
+        self.wake = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+        self.flush_lock = threading.Lock()
+        self.counters = {"added": 0, "flushed": 0, "batches": 0, "duplicates": 0, "dropped": 0,
+                         "failures": 0, "blocked": 0, "blocked_seconds": 0.0, "replayed": 0}
+        self.last_flush_seconds = 0.0
+        self.last_error: Optional[str] = None
+        self._oldest_at: Optional[float] = None
+        self._closed = False
+
+        os.makedirs(os.path.dirname(spool_path) or ".", exist_ok=True)
+        self._lock_file = self._try_lock(self.spool_path)
+        self._spool = open(self.spool_path, "a", encoding="utf-8")
+        self._replay()
+
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add(self, collection: str, document: Dict[str, Any]):
+        line = json_util.dumps({"c": collection, "d": document},
+                               json_options=json_util.CANONICAL_JSON_OPTIONS)
+        with self.lock:
+            if self._closed:
+                raise WriteBufferFull("Write buffer is closed")
+            if len(self.pending) >= self.max_pending:
+                self._wait_for_room()
+            self._spool.write(line + "\n")
+            self._spool.flush()
+            if self.fsync:
+                os.fsync(self._spool.fileno())
+            self.pending.append((collection, document))
+            self.counters["added"] += 1
+            if self._oldest_at is None:
+                self._oldest_at = time.monotonic()
+            if len(self.pending) >= self.max_batch:
+                self.wake.notify()
+
+    def _wait_for_room(self):
+        # Called with the lock held
+        self.counters["blocked"] += 1
+        started = time.monotonic()
+        self.wake.notify()
+        while len(self.pending) >= self.max_pending:
+            remaining = self.block_timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                self.counters["blocked_seconds"] += time.monotonic() - started
+                raise WriteBufferFull(
+                    f"{len(self.pending)} writes pending; last error: {self.last_error or 'none'}")
+            self.not_full.wait(remaining)
+        self.counters["blocked_seconds"] += time.monotonic() - started
+
+    def flush(self) -> int:
+        """Write everything pending now; returns the number of documents flushed."""
+        with self.flush_lock:
+            with self.lock:
+                batch = list(self.pending)
+            if not batch:
+                return 0
+
+            started = time.monotonic()
+            by_collection: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+            for collection, document in batch:
+                by_collection[collection].append(document)
+            try:
+                for collection, documents in by_collection.items():
+                    self._insert(collection, documents)
+            except PyMongoError as e:
+                # Everything stays queued and spooled; the next flush retries
+                with self.lock:
+                    self.counters["failures"] += 1
+                    self.last_error = str(e)
+                logger.warning(f"Write-behind flush failed, {len(batch)} writes kept: {e}")
+                return 0
+
+            with self.lock:
+                del self.pending[:len(batch)]
+                self.counters["flushed"] += len(batch)
+                self.counters["batches"] += 1
+                self.last_flush_seconds = time.monotonic() - started
+                self.last_error = None
+                self._oldest_at = time.monotonic() if self.pending else None
+                self._rewrite_spool()
+                self.not_full.notify_all()
+            return len(batch)
+
+    def _insert(self, collection: str, documents: List[Dict[str, Any]]):
+        try:
+            self.db[collection].insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            duplicates = sum(1 for error in errors if error.get("code") == DUPLICATE_KEY)
+            rejected = len(errors) - duplicates
+            with self.lock:
+                self.counters["duplicates"] += duplicates
+                self.counters["dropped"] += rejected
+            if rejected:
+                # Retrying a document the server rejects would block the queue forever
+                logger.error(f"Write-behind dropped {rejected} {collection} documents: "
+                             f"{errors[0].get('errmsg')}")
+
+    def _rewrite_spool(self):
+        # Called with the lock held: the spool keeps exactly the pending writes
+        self._spool.close()
+        temp_path = self.spool_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as spool:
+            for collection, document in self.pending:
+                spool.write(json_util.dumps({"c": collection, "d": document},
+                                            json_options=json_util.CANONICAL_JSON_OPTIONS) + "\n")
+            spool.flush()
+            os.fsync(spool.fileno())
+        os.replace(temp_path, self.spool_path)
+        self._spool = open(self.spool_path, "a", encoding="utf-8")
+
+    @staticmethod
+    def _try_lock(spool_path: str):
+        """The spool's lock file, locked; None if a live process holds it."""
+        lock_file = open(spool_path + ".lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return None
+        return lock_file
+
+    def _replay(self):
+        # Take over the spools of processes that exited with writes pending
+        adopted = []
+        for path in sorted(set(glob.glob(self.spool_pattern[0])) | {self.spool_pattern[1]}):
+            if path == self.spool_path or not os.path.exists(path):
+                continue
+            lock_file = self._try_lock(path)
+            if lock_file is None:
+                continue  # Its process is still running and flushes it itself
+            try:
+                with open(path, encoding="utf-8") as spool:
+                    self._read_spool(spool)
+            except FileNotFoundError:
+                pass  # Taken over by another process just now
+            adopted.append((path, lock_file))
+        if adopted:
+            # Own the entries before deleting the old spools; a crash in
+            # between only means duplicate-key errors on the next replay
+            self._rewrite_spool()
+            for path, lock_file in adopted:
+                for leftover in (path, path + ".lock"):
+                    try:
+                        os.remove(leftover)
+                    except FileNotFoundError:
+                        pass
+                lock_file.close()
+        if self.pending:
+            self.counters["replayed"] = len(self.pending)
+            self._oldest_at = time.monotonic()
+            logger.info(f"Replaying {len(self.pending)} spooled writes")
+
+    def _read_spool(self, spool):
+        for line in spool:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json_util.loads(line)
+            except ValueError:
+                # A torn last line from a crash mid-write
+                logger.warning("Skipping unreadable write-behind spool entry")
+                continue
+            self.pending.append((entry["c"], entry["d"]))
+
+    def _run(self):
+        while True:
+            with self.lock:
+                if self._closed:
+                    return
+                if len(self.pending) < self.max_batch:
+                    self.wake.wait(self.flush_interval)
+                if self._closed:
+                    return
+                due = self.pending and (
+                    len(self.pending) >= self.max_batch
+                    or time.monotonic() - (self._oldest_at or 0) >= self.flush_interval)
+            if due and not self.flush():
+                # Back off while the server is unreachable
+                time.sleep(self.flush_interval)
+
+    def close(self, timeout: float = 10.0):
+        with self.lock:
+            if self._closed:
+                return
+            self._closed = True
+            self.wake.notify_all()
+        self._thread.join(timeout)
+        if self.flush() == 0 and self.pending:
+            logger.warning(f"{len(self.pending)} writes left in {self.spool_path} for the next run")
+        with self.lock:
+            self._spool.close()
+            if not self.pending:
+                for path in (self.spool_path, self.spool_path + ".lock"):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+            self._lock_file.close()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self.lock:
+            oldest = time.monotonic() - self._oldest_at if self.pending and self._oldest_at else 0.0
+            return {**self.counters, "pending": len(self.pending), "max_pending": self.max_pending,
+                    "fill": len(self.pending) / self.max_pending if self.max_pending else 0.0,
+                    "oldest_pending_seconds": oldest, "last_flush_seconds": self.last_flush_seconds,
+                    "last_error": self.last_error}
@@ -1,37 +1,91 @@
 import logging
-from typing import Dict, Any
-from langchain_anthropic import ChatAnthropic
-from langchain_core.messages import SystemMessage, HumanMessage
-from langgraph.graph import Graph
-from utils.database_tool import create_database_tool, DatabaseTool
-from langgraph.prebuilt import ToolExecutor
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, List, Optional, Tuple, TYPE_CHECKING
 import os
+import queue
+import threading
+from config import RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_SKIP_COMMANDS, CHAT_MEMORY_MAX_SESSIONS, SEARCH_ENABLED
+from engine.context_builder import ContextBuilder
+from engine.command_router import CommandRouter, CommandError, success
+from engine.conversation_memory import ConversationMemory
+from engine.model_router import ModelRouter
+from engine.response_cache import ResponseCache
+
+if TYPE_CHECKING:
+    from langgraph.graph import Graph
+
+SYSTEM_PROMPT = "You are HAL-9001, an AI assistant. Respond to the user based on their input and the database information provided."
+SUMMARY_PROMPT = "Summarize the conversation so far for your own future reference. Keep names, decisions, dates and open questions; drop small talk. Answer in at most 150 words."
+
+# System prompt + user profile, the prefix marked for prompt caching
+STABLE_PREFIX_BLOCKS = 2
 
 
 class CommandHandler:
-    def __init__(self, db_handler):
+    def __init__(self, db_handler, write_buffer=None):
         self.logger = logging.getLogger(__name__)
         self.db_handler = db_handler
 
-        anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not anthropic_api_key:
-            raise ValueError(
-                "ANTHROPIC_API_KEY environment variable is not set")
+        # Structured CRUD actions go straight to the repositories
+        search_index = None
+        if SEARCH_ENABLED:
+            from database.search_index import SearchIndex
+            search_index = SearchIndex()
+        self.router = CommandRouter(db_handler.db, write_buffer, search_index)
+        self.context_builder = ContextBuilder(db_handler.db)
+
+        self.response_cache = ResponseCache() if RESPONSE_CACHE_ENABLED else None
+        self.router.register("cache", "stats", self.cache_stats)
+        self.router.register("cache", "clear", self.cache_clear)
+        self.router.register("schedule", "generate", self.handle_schedule)
+
+        # The LLM clients and compiled graph are built on first use
+        self.model_router = ModelRouter()
+        self._llms = {}
+        self._graph = None
+        self._user_profile = None
+        # The daemon serves requests on several threads; build each of the
+        # above once
+        self._lazy_lock = threading.RLock()
+
+        # Chat memory per session id, least recently used sessions dropped
+        self.sessions: "OrderedDict[str, ConversationMemory]" = OrderedDict()
+        self._sessions_lock = threading.Lock()
 
-        self.llm = ChatAnthropic(
-            model="claude-3-opus-20240229", anthropic_api_key=anthropic_api_key)
-        self.db_tool: DatabaseTool = create_database_tool(db_handler)
-        self.tool_executor = ToolExecutor([self.db_tool])
+    def llm_for(self, model: str):
+        # One client per model, created the first time that model is routed to
+        with self._lazy_lock:
+            if model not in self._llms:
+                from langchain_anthropic import ChatAnthropic
 
-        # Initialize the graph
-        self.graph = self.create_graph()
+                anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
+                if not anthropic_api_key:
+                    raise ValueError(
+                        "ANTHROPIC_API_KEY environment variable is not set")
+
+                self._llms[model] = ChatAnthropic(
+                    model=model, anthropic_api_key=anthropic_api_key)
+            return self._llms[model]
+
+    @property
+    def llm(self):
+        return self.llm_for(self.model_router.large)
+
+    @property
+    def graph(self):
+        with self._lazy_lock:
+            if self._graph is None:
+                self._graph = self.create_graph()
+            return self._graph
+
+    def create_graph(self) -> "Graph":
+        from langgraph.graph import Graph
 
-    def create_graph(self) -> Graph:
         workflow = Graph()
 
         # Define nodes
         workflow.add_node("process_input", self.process_input)
-        workflow.add_node("database", self.tool_executor)
+        workflow.add_node("database", self.query_database)
         workflow.add_node("generate_response", self.generate_response)
 
         # Define edges
@@ -43,42 +97,235 @@ class CommandHandler:
 
         return workflow.compile()
 
+    # Graph nodes receive the previous node's output, so each one passes the
+    # incoming state along with what it adds.
     def process_input(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        user_input = state.get("input", "")
-        return {
-            "tool_input": {
-                "name": "database_tool",
-                "arguments": {
-                    "action": "find_one",
-                    "collection": "users",
-                    "data": {}
-                }
-            }
-        }
+        try:
+            user_id = self.router.user_id
+        except CommandError:
+            user_id = None
+        return {**state, "user_id": user_id}
 
-    def generate_response(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        db_result = state.get("database", {})
+    def query_database(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        if state.get("user_id") is None:
+            return {**state, "database": "No user profile yet."}
+        context = self.context_builder.build(state["user_id"], state.get("input", ""))
+        return {**state, "database": context}
+
+    def generate_response(self, state: Dict[str, Any], config=None) -> Dict[str, Any]:
         user_input = state.get("input", "")
+        memory = self.get_memory(state.get("session_id"))
+        prompt = self.build_prompt(state, memory)
+        messages = self.to_chat_messages(prompt)
+
+        model = state.get("model") or self.model_router.large
+        cache_key = None
+        if self.response_cache is not None and state.get("use_cache"):
+            cache_key = ResponseCache.make_key(
+                model, prompt, state.get("database", {}))
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                self.remember(memory, user_input, cached)
+                self.logger.info(f"Turn served from cache ({model} key)")
+                return {"response": cached, "model": model, "cached": True}
+
+        served_by = model
+        content = self.complete(model, messages, state, config)
+        if self.model_router.should_escalate(model, content):
+            served_by = self.model_router.large
+            self.logger.info(
+                f"Escalating from {model} to {served_by}: low-confidence answer")
+            if state.get("notify"):
+                state["notify"]({"event": "model", "data": served_by})
+            content = self.complete(served_by, messages, state, config)
+        self.logger.info(
+            f"Turn served by {served_by} ({state.get('model_reason', 'default')})")
+
+        if cache_key is not None and content:
+            self.response_cache.set(cache_key, served_by, content)
+        self.remember(memory, user_input, content)
+        return {"response": content, "model": served_by}
+
+    def complete(self, model: str, messages: list, state: Dict[str, Any], config=None) -> str:
+        llm = self.llm_for(model)
+        if state.get("stream"):
+            # Chunks reach the caller through the callbacks in `config`
+            return "".join(chunk.content for chunk in llm.stream(
+                messages, config=config) if isinstance(chunk.content, str))
+        return llm.invoke(messages, config=config).content
+
+    def build_prompt(self, state: Dict[str, Any], memory: Optional[ConversationMemory] = None) -> List[Tuple[str, str]]:
+        # Stable parts come first (system prompt, then user profile) so the
+        # provider-side prompt cache can reuse them across turns; the
+        # per-turn database snapshot only appears in the final message.
+        prompt = [("system", SYSTEM_PROMPT), ("system", self.user_profile())]
+        if memory is not None:
+            prompt += memory.messages()
+        prompt.append(("human", f"User input: {state.get('input', '')}\nDatabase info: {state.get('database', {})}"))
+        return prompt
+
+    @staticmethod
+    def to_chat_messages(prompt: List[Tuple[str, str]]) -> list:
+        from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 
-        system_prompt = "You are HAL-9001, an AI assistant. Respond to the user based on their input and the database information provided."
-        human_message = f"User input: {user_input}\nDatabase info: {db_result}"
+        system = [{"type": "text", "text": content}
+                  for role, content in prompt if role == "system"]
+        # Cache breakpoint after the system prompt and user profile
+        system[STABLE_PREFIX_BLOCKS - 1]["cache_control"] = {"type": "ephemeral"}
+        messages = [SystemMessage(content=system)]
 
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=human_message)
-        ]
+        conversation = [(role, content)
+                        for role, content in prompt if role != "system"]
+        for index, (role, content) in enumerate(conversation):
+            if index == len(conversation) - 2:
+                # Second breakpoint at the end of the history, which is
+                # unchanged between turns until the next compaction
+                content = [{"type": "text", "text": content,
+                            "cache_control": {"type": "ephemeral"}}]
+            message_class = AIMessage if role == "ai" else HumanMessage
+            messages.append(message_class(content=content))
+        return messages
 
-        response = self.llm.invoke(messages)
-        return {"response": response.content}
+    def user_profile(self) -> str:
+        with self._lazy_lock:
+            if self._user_profile is None:
+                try:
+                    user = self.router.users.find_by_id(self.router.user_id)
+                except CommandError:
+                    user = None
+                if user is None:
+                    return "User profile: unknown"
+                self._user_profile = f"User profile: username={user.username}, settings={user.settings}"
+            return self._user_profile
+
+    def get_memory(self, session_id: Optional[str]) -> Optional[ConversationMemory]:
+        if not session_id:
+            return None
+        with self._sessions_lock:
+            memory = self.sessions.pop(session_id, None) or ConversationMemory(
+                summarizer=self.summarize_turns)
+            self.sessions[session_id] = memory
+            while len(self.sessions) > CHAT_MEMORY_MAX_SESSIONS:
+                self.sessions.popitem(last=False)
+        return memory
+
+    def remember(self, memory: Optional[ConversationMemory], user_input: str, response: str):
+        if memory is None:
+            return
+        memory.add_exchange(user_input, response)
+        # Summarize off the request path so this turn's latency is unaffected
+        memory.compact_in_background()
+
+    def summarize_turns(self, summary: str, turns: List[Tuple[str, str]]) -> str:
+        from langchain_core.messages import SystemMessage, HumanMessage
+
+        transcript = "\n".join(f"{role}: {content}" for role, content in turns)
+        response = self.llm_for(self.model_router.small).invoke([
+            SystemMessage(content=SUMMARY_PROMPT),
+            HumanMessage(content=f"Summary so far:\n{summary or '(none)'}\n\nNew turns:\n{transcript}")
+        ])
+        return response.content
 
     def handle_command(self, command: str, data: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            result = self.graph.invoke({"input": data.get("input", "")})
-            return {"status": "success", "data": result.get("response", "No response generated.")}
+            if self.router.can_handle(command, data):
+                return self.router.dispatch(command, data)
+
+            result = self.graph.invoke(self.initial_state(command, data))
+            return {"status": "success", "data": result.get("response", "No response generated."),
+                    "model": result.get("model")}
         except Exception as e:
             self.logger.error(f"Error in handling command: {str(e)}")
             return {"status": "error", "data": f"An error occurred while processing your request: {str(e)}"}
 
+    def stream_command(self, command: str, data: Dict[str, Any],
+                       cancel_event: threading.Event = None) -> Iterator[Dict[str, Any]]:
+        """Yield {"event": "token"} chunks followed by one {"event": "result"}.
+
+        Closing the generator (or setting `cancel_event`) stops it at once;
+        the LLM request is not started if it has not been yet, and is
+        otherwise aborted at its next token.
+        """
+        if self.router.can_handle(command, data):
+            yield {"event": "result", **self.handle_command(command, data)}
+            return
+
+        from engine.streaming import TokenStreamHandler
+
+        cancel_event = cancel_event or threading.Event()
+        events = queue.Queue()
+        stream_handler = TokenStreamHandler(
+            lambda token: events.put({"event": "token", "data": token}), cancel_event)
+
+        def run():
+            try:
+                result = self.graph.invoke(
+                    {**self.initial_state(command, data), "stream": True,
+                     "notify": events.put},
+                    config={"callbacks": [stream_handler]})
+                events.put({"event": "result", "status": "success",
+                            "data": result.get("response", "No response generated."),
+                            "model": result.get("model")})
+            except Exception as e:
+                if not cancel_event.is_set():
+                    self.logger.error(f"Error in streaming command: {str(e)}")
+                events.put({"event": "result", "status": "error",
+                            "data": f"An error occurred while processing your request: {str(e)}"})
+
+        def wake_on_cancel():
+            # Unblocks the loop below as soon as the request is cancelled
+            cancel_event.wait()
+            events.put(None)
+
+        threading.Thread(target=run, daemon=True).start()
+        threading.Thread(target=wake_on_cancel, daemon=True).start()
+        try:
+            while True:
+                event = events.get()
+                if event is None or cancel_event.is_set():
+                    return
+                yield event
+                if event["event"] == "result":
+                    return
+        finally:
+            cancel_event.set()
+
+    def initial_state(self, command: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        user_input = self.describe_input(command, data)
+        model, reason = self.model_router.choose(command, user_input)
+        return {
+            "input": user_input,
+            "model": model,
+            "model_reason": reason,
+            "session_id": data.get("session_id"),
+            "use_cache": self.use_cache(command, data),
+        }
+
+    def use_cache(self, command: str, data: Dict[str, Any]) -> bool:
+        return not data.get("no_cache") and command not in RESPONSE_CACHE_SKIP_COMMANDS
+
+    def cache_stats(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        if self.response_cache is None:
+            return success("Response cache is disabled")
+        stats = self.response_cache.stats()
+        return success(
+            f"Entries: {stats['entries']}  Hits: {stats['hits']}  Misses: {stats['misses']}  "
+            f"Evictions: {stats['evictions']}  Hit rate: {stats['hit_rate']:.0%}")
+
+    def cache_clear(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        if self.response_cache is not None:
+            self.response_cache.clear()
+        return success("Response cache cleared")
+
+    def describe_input(self, command: str, data: Dict[str, Any]) -> str:
+        # Free-text actions without their own input (e.g. `project chat`)
+        # still give the model something to work with
+        if data.get("input"):
+            return data["input"]
+        details = " ".join(f"{key}={value}" for key, value in data.items()
+                           if key not in ("action", "session_id", "no_cache") and value is not None)
+        return " ".join(part for part in [command, data.get("action"), details] if part)
+
     # You can add more specific command handlers here if needed
     def handle_chat(self, data: Dict[str, Any]) -> Dict[str, Any]:
         return self.handle_command("chat", data)
@@ -88,5 +335,15 @@ class CommandHandler:
         pass
 
     def handle_schedule(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        # Implement schedule generation logic here
-        pass
+        # The plan itself is deterministic; the model is only asked to explain it
+        result = self.router.schedule_generate(data)
+        if not data.get("explain") or result["status"] != "success":
+            return result
+        explanation = self.handle_command("chat", {
+            "input": f"Explain this generated schedule briefly and point out anything to adjust:\n{result['data']}",
+            "session_id": data.get("session_id"),
+            "no_cache": True,
+        })
+        if explanation["status"] != "success":
+            return result
+        return success(f"{result['data']}\n\n{explanation['data']}")
@@ -0,0 +1,693 @@
+# src/engine/command_router.py
+
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, Callable, Tuple, Optional
+from bson import ObjectId
+
+from config import USERNAME, PAGE_SIZE, READ_BATCH_SIZE
+from database.models.checkin import CheckIn
+from database.models.log import Log
+from database.models.project import Project
+from database.models.routine import Routine
+from database.models.skill import Skill
+from database.models.task import Task
+from database.cache import CachedDatabase
+from database.export import ExportError, export, export_filename
+from database.name_index import NameIndex, AmbiguousName, fold
+from database.pagination import InvalidPageToken
+from database.repositories.checkin_repository import CheckInRepository
+from database.repositories.log_repository import LogRepository
+from database.repositories.project_repository import ProjectRepository
+from database.repositories.protocol_repository import ProtocolRepository
+from database.repositories.routine_repository import RoutineRepository
+from database.repositories.schedule_repository import ScheduleRepository
+from database.repositories.skill_repository import SkillRepository
+from database.repositories.task_repository import TaskRepository
+from database.repositories.user_repository import UserRepository
+from engine.interval_index import IntervalIndex
+from engine.recurrence import InvalidRecurrence, OccurrenceCache, parse_clock, parse_date
+
+
+class CommandError(Exception):
+    pass
+
+
+def success(data) -> Dict[str, Any]:
+    return {"status": "success", "data": data}
+
+
+def error(message: str) -> Dict[str, Any]:
+    return {"status": "error", "data": message}
+
+
+def format_date(value) -> str:
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    return str(value) if value else "-"
+
+
+class CommandRouter:
+    """Dispatches structured CLI actions straight to the repositories.
+
+    Anything not registered here (chat and the free-text actions) is left to
+    the LLM graph in CommandHandler.
+    """
+
+    def __init__(self, database, write_buffer=None, search_index=None):
+        self.db = database
+        self.write_buffer = write_buffer
+        self.search = search_index
+        self.names = NameIndex(database)
+        self.users = UserRepository(database)
+        self.tasks = TaskRepository(database, self.names, search_index)
+        self.projects = ProjectRepository(database, self.names, search_index)
+        self.skills = SkillRepository(database, self.names)
+        self.logs = LogRepository(database, write_buffer, search_index)
+        self.checkins = CheckInRepository(database, write_buffer, search_index)
+        self.routines = RoutineRepository(database, self.names)
+        self.schedules = ScheduleRepository(database)
+        self.protocols = ProtocolRepository(database)
+        self.occurrences = OccurrenceCache()
+        self._user_id = None
+        self.lock = threading.RLock()
+
+        self.routes: Dict[Tuple[str, Optional[str]], Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+            ("task", "add"): self.task_add,
+            ("task", "list"): self.task_list,
+            ("task", "complete"): self.task_complete,
+            ("task", "delete"): self.task_delete,
+            ("task", "update"): self.task_update,
+            ("task", "import"): self.task_import,
+            ("project", "list"): self.project_list,
+            ("project", "add"): self.project_add,
+            ("project", "remove"): self.project_remove,
+            ("project", "info"): self.project_info,
+            ("skill", "list"): self.skill_list,
+            ("skill", "add"): self.skill_add,
+            ("skill", "remove"): self.skill_remove,
+            ("skill", "info"): self.skill_info,
+            ("routine", "list"): self.routine_list,
+            ("routine", "add"): self.routine_add,
+            ("routine", "add_task"): self.routine_add_task,
+            ("routine", "remove_task"): self.routine_remove_task,
+            ("log", "add"): self.log_add,
+            ("log", "list"): self.log_list,
+            ("log", "search"): self.log_search,
+            ("log", "export"): self.log_export,
+            ("schedule", "print"): self.schedule_print,
+            ("schedule", "generate"): self.schedule_generate,
+            ("schedule", "patch"): self.schedule_patch,
+            ("name", "complete"): self.name_complete,
+            ("checkin", None): self.checkin,
+            ("user", "settings"): self.user_settings,
+            ("user", "account"): self.user_account,
+            ("user", "stats"): self.user_stats,
+            ("db", "migrate"): self.db_migrate,
+            ("db", "check"): self.db_check,
+            ("db", "stats"): self.db_stats,
+            ("db", "flush"): self.db_flush,
+            ("db", "reindex"): self.db_reindex,
+        }
+
+    def register(self, command: str, action: Optional[str], handler: Callable[[Dict[str, Any]], Dict[str, Any]]):
+        self.routes[(command, action)] = handler
+
+    def can_handle(self, command: str, data: Dict[str, Any]) -> bool:
+        return (command, data.get("action")) in self.routes
+
+    def dispatch(self, command: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            # The daemon serves requests on several threads, and routes share
+            # in-memory state (interval indexes, occurrence cache, user id)
+            with self.lock:
+                return self.routes[(command, data.get("action"))](data)
+        except (CommandError, InvalidRecurrence) as e:
+            return error(str(e))
+
+    @property
+    def user_id(self):
+        with self.lock:
+            if self._user_id is None:
+                user = self.users.find_current(USERNAME)
+                if user is None:
+                    raise CommandError(
+                        "No user found. Complete onboarding before using this command.")
+                self._user_id = user._id
+            return self._user_id
+
+    def _require(self, entity, kind: str, name: str):
+        if entity is None:
+            raise CommandError(f"No {kind} named '{name}'")
+        return entity
+
+    def _page_size(self, data) -> int:
+        # limit(0) means no limit to Mongo, so it must not get that far
+        limit = data.get("limit")
+        if limit is None:
+            return PAGE_SIZE
+        if limit < 1:
+            raise CommandError("The limit must be at least 1")
+        return limit
+
+    def _find_named(self, kind: str, repository, name: str, prefix: bool = False):
+        """Resolve a user-typed name (or id).
+
+        Names go through the name index, which reports duplicates as
+        ambiguous, and the id it returns is confirmed against the database;
+        when that fails (the index lags behind another process) the names are
+        read again once. Only read-only lookups pass prefix=True to accept a
+        unique prefix; commands that change or delete what they find need the
+        full (case-insensitive) name.
+        """
+        if len(name) == 24 and ObjectId.is_valid(name):
+            entity = repository.find_by_id(name)
+            if entity is not None and str(entity.user_id) == str(self.user_id):
+                return entity
+        folded = fold(name)
+        for reloaded in (False, True):
+            try:
+                entity_id = self.names.resolve(kind, self.user_id, name, prefix)
+            except AmbiguousName as e:
+                raise CommandError(str(e))
+            entity = repository.find_by_id(entity_id) if entity_id else None
+            if entity is not None and str(entity.user_id) == str(self.user_id):
+                stored = fold(entity.name)
+                if stored == folded:
+                    return entity
+                if prefix and stored.startswith(folded):
+                    # An exact name added since the names were loaded wins
+                    return repository.find_by_name(self.user_id, name) or entity
+            if not reloaded:
+                self.names.invalidate(kind, self.user_id)
+        suggestions = self.names.suggest(kind, self.user_id, name)
+        hint = f"; did you mean {' or '.join(repr(suggestion) for suggestion in suggestions)}?" if suggestions else ""
+        raise CommandError(f"No {kind} named '{name}'{hint}")
+
+    def name_complete(self, data):
+        return success(self.names.complete(data["kind"], self.user_id, data.get("prefix") or ""))
+
+    # Tasks
+
+    def task_add(self, data):
+        task = Task(self.user_id, data["name"], data.get("description", ""),
+                    status="pending", priority=data.get("priority", "medium"),
+                    due_date=data.get("due_date"))
+        self.tasks.create(task)
+        return success(f"Task '{task.name}' added")
+
+    def task_list(self, data):
+        tasks = self.tasks.find_summaries_by_user(self.user_id)
+        if not tasks:
+            return success("No tasks")
+        lines = [f"[{'x' if task.status == 'completed' else ' '}] {task.name}"
+                 f" (priority: {task.priority}, due: {format_date(task.due_date)})"
+                 for task in tasks]
+        return success("\n".join(lines))
+
+    def task_complete(self, data):
+        task = self._find_named("task", self.tasks, data["name"])
+        task.status = "completed"
+        task.completed_at = datetime.utcnow()
+        self.tasks.update(task)
+        return success(f"Task '{task.name}' completed")
+
+    def task_delete(self, data):
+        task = self._find_named("task", self.tasks, data["name"])
+        self.tasks.delete(task._id)
+        return success(f"Task '{task.name}' deleted")
+
+    def task_update(self, data):
+        task = self._find_named("task", self.tasks, data["name"])
+        if data.get("new_name"):
+            task.name = data["new_name"]
+        if data.get("description"):
+            task.description = data["description"]
+        self.tasks.update(task)
+        return success(f"Task '{task.name}' updated")
+
+    def task_import(self, data):
+        names = [name.strip() for name in data.get("names") or [] if name.strip()]
+        if not names:
+            raise CommandError("No task names to import")
+        tasks = [Task(self.user_id, name, "", status="pending", priority="medium", due_date=None)
+                 for name in names]
+        # One unordered round trip; a failed insert does not stop the rest
+        summary = self.tasks.bulk_create(tasks)
+        lines = [f"Imported {summary['inserted']} of {len(tasks)} tasks"]
+        lines += [f"  {tasks[error['index']].name}: {error['message']}" for error in summary["errors"]]
+        return success("\n".join(lines))
+
+    # Projects
+
+    def project_list(self, data):
+        projects = self.projects.find_summaries_by_user(self.user_id)
+        if not projects:
+            return success("No projects")
+        lines = [f"{project.name} [{project.status}]" for project in projects]
+        return success("\n".join(lines))
+
+    def project_add(self, data):
+        project = Project(self.user_id, data["name"], data.get("description", ""),
+                          status="active", start_date=datetime.utcnow(), end_date=None)
+        self.projects.create(project)
+        return success(f"Project '{project.name}' added")
+
+    def project_remove(self, data):
+        project = self._find_named("project", self.projects, data["name"])
+        self.projects.delete(project._id)
+        return success(f"Project '{project.name}' removed")
+
+    def project_info(self, data):
+        project = self._find_named("project", self.projects, data["name"], prefix=True)
+        lines = [
+            f"{project.name} [{project.status}]",
+            f"Description: {project.description or '-'}",
+            f"Start: {format_date(project.start_date)}  End: {format_date(project.end_date)}",
+            f"Tasks: {len(project.tasks)}  Skills: {len(project.skills)}  XP gain: {project.xp_gain}",
+        ]
+        return success("\n".join(lines))
+
+    # Skills
+
+    def skill_list(self, data):
+        skills = self.skills.find_summaries_by_user(self.user_id)
+        if not skills:
+            return success("No skills")
+        lines = [f"{skill.name} (level {skill.level}, {skill.xp} xp)"
+                 for skill in skills]
+        return success("\n".join(lines))
+
+    def skill_add(self, data):
+        parent = None
+        if data.get("parent"):
+            parent = self._find_named("skill", self.skills, data["parent"])
+        skill = Skill(self.user_id, data["name"], data.get("description", ""),
+                      parent=str(parent._id) if parent else None)
+        self.skills.create(skill)
+        if parent:
+            return success(f"Skill '{skill.name}' added under '{parent.name}'")
+        return success(f"Skill '{skill.name}' added")
+
+    def skill_remove(self, data):
+        skill = self._find_named("skill", self.skills, data["name"])
+        self.skills.delete(skill._id)
+        return success(f"Skill '{skill.name}' removed")
+
+    def skill_info(self, data):
+        named = self._find_named("skill", self.skills, data["name"], prefix=True)
+        tree = self._require(self.skills.find_tree_by_name(
+            self.user_id, named.name), "skill", data["name"])
+        skill, descendants = tree
+        lines = [
+            f"{skill.name} (level {skill.level}, {skill.xp} xp)",
+            f"Description: {skill.description or '-'}",
+            f"Subtree: {skill.subtree_xp} xp, level {skill.subtree_level}",
+        ]
+        if descendants:
+            lines.append("Sub-skills:")
+            lines += self._skill_tree(skill, descendants)
+        else:
+            lines.append("Sub-skills: -")
+        return success("\n".join(lines))
+
+    def _skill_tree(self, root, descendants):
+        children = {}
+        for skill in descendants:
+            children.setdefault(skill.parent, []).append(skill)
+
+        lines = []
+
+        def walk(skill_id, depth):
+            for child in sorted(children.get(skill_id, []), key=lambda child: child.name):
+                lines.append(f"{'  ' * depth}- {child.name} (level {child.level}, "
+                             f"{child.xp} xp, subtree {child.subtree_xp} xp)")
+                walk(str(child._id), depth + 1)
+
+        walk(str(root._id), 1)
+        return lines
+
+    # Routines
+
+    def routine_list(self, data):
+        routines = self.routines.find_by_user(self.user_id, view=True)
+        if not routines:
+            return success("No routines")
+        lines = [f"{routine._id} {routine.name} ({len(routine.task_ids)} tasks)"
+                 for routine in routines]
+        return success("\n".join(lines))
+
+    def routine_add(self, data):
+        routine = Routine(self.user_id, data["name"], [],
+                          description=data.get("description") or "")
+        routine_id = self.routines.create(routine)
+        return success(f"Routine '{routine.name}' added ({routine_id})")
+
+    def routine_add_task(self, data):
+        routine = self._find_named("routine", self.routines, data["routine_id"])
+        task = self._find_named("task", self.tasks, data["task_id"])
+        self.routines.add_task_to_routine(routine._id, task._id)
+        return success(f"Task '{task.name}' added to routine '{routine.name}'")
+
+    def routine_remove_task(self, data):
+        routine = self._find_named("routine", self.routines, data["routine_id"])
+        task = self._find_named("task", self.tasks, data["task_id"])
+        self.routines.remove_task_from_routine(routine._id, task._id)
+        return success(f"Task '{task.name}' removed from routine '{routine.name}'")
+
+    # Logs and check-ins
+
+    def log_add(self, data):
+        self.logs.create(Log(self.user_id, data["entry"]))
+        return success("Log entry added")
+
+    def log_list(self, data):
+        try:
+            logs, next_token = self.logs.find_page_by_user(
+                self.user_id, self._page_size(data), data.get("page_token"), view=True)
+        except InvalidPageToken as e:
+            raise CommandError(str(e))
+        if not logs and not data.get("page_token"):
+            return success("No log entries")
+        lines = [f"{log.timestamp:%Y-%m-%d %H:%M}  {log.entry}" for log in logs]
+        return {**success("\n".join(lines)), "next_page_token": next_token}
+
+    def log_search(self, data):
+        if self.search is None:
+            raise CommandError("Search is disabled (HAL9001_SEARCH)")
+        if not self.search.is_built(self.user_id):
+            # First search: pick up everything written before the index existed
+            self.search.rebuild(self.db, self.user_id)
+        filters = {"kinds": data.get("kinds") or None, "tag": data.get("tag")}
+        try:
+            if data.get("since"):
+                filters["since"] = datetime.combine(parse_date(data["since"]), datetime.min.time())
+            if data.get("until"):
+                # Inclusive: up to the end of that day
+                filters["until"] = datetime.combine(parse_date(data["until"]), datetime.min.time()) + timedelta(days=1)
+        except ValueError:
+            raise CommandError("Dates must be YYYY-MM-DD")
+        if data.get("project"):
+            filters["project_id"] = self._find_named("project", self.projects, data["project"], prefix=True)._id
+        if data.get("skill"):
+            filters["skill_id"] = self._find_named("skill", self.skills, data["skill"], prefix=True)._id
+        try:
+            results, next_token = self.search.search(
+                self.user_id, data["query"], self._page_size(data), data.get("page_token"), **filters)
+        except ValueError as e:
+            raise CommandError(str(e))
+        if not results and not data.get("page_token"):
+            return success(f"Nothing matches '{data['query']}'")
+        lines = []
+        for result in results:
+            text = " - ".join(part for part in (result["title"], result["snippet"]) if part) or f"tags: {result['tags']}"
+            lines.append(f"[{result['kind']} {format_date(result['timestamp'])}] {text}")
+        return {**success("\n".join(lines)), "next_page_token": next_token}
+
+    def log_export(self, data):
+        fmt = data.get("format") or "jsonl"
+        compression = data.get("compression")
+        if data.get("all_users"):
+            user_id = None
+        elif data.get("user"):
+            user = self.users.find_by_username(data["user"])
+            if user is None:
+                raise CommandError(f"User '{data['user']}' not found")
+            user_id = user._id
+        else:
+            user_id = self.user_id
+        filters = {}
+        try:
+            if data.get("since"):
+                filters["since"] = datetime.combine(parse_date(data["since"]), datetime.min.time())
+            if data.get("until"):
+                filters["until"] = datetime.combine(parse_date(data["until"]), datetime.min.time()) + timedelta(days=1)
+        except ValueError:
+            raise CommandError("Dates must be YYYY-MM-DD")
+        directory = data.get("directory") or "."
+        os.makedirs(directory, exist_ok=True)
+        if self.write_buffer is not None and self.write_buffer.pending:
+            # Buffered logs and check-ins belong in the export too
+            self.write_buffer.flush()
+
+        lines = []
+        for kind in data.get("kinds") or ["logs"]:
+            path = os.path.join(directory, export_filename(kind, fmt, compression))
+            try:
+                result = export(self.db, kind, path, fmt, compression, user_id, resume=bool(data.get("resume")),
+                                batch_size=data.get("batch_size") or READ_BATCH_SIZE, **filters)
+            except (ExportError, OSError) as e:
+                raise CommandError(f"Export of {kind} failed: {e}" + (
+                    "" if isinstance(e, ExportError) else " (run again with --resume to continue)"))
+            if result["status"] == "complete":
+                lines.append(f"{kind}: already exported to {path}")
+                continue
+            files = ", ".join(result["files"]) or "no files (nothing matched)"
+            lines.append(f"{kind}: {result['rows']} rows{' (resumed)' if result['status'] == 'resumed' else ''} "
+                         f"in {result['seconds']:.1f}s, {result['bytes'] / 1e6:.1f} MB -> {files}")
+        return success("\n".join(lines))
+
+    def checkin(self, data):
+        mood = data.get("mood", "none")
+        self.checkins.create(CheckIn(self.user_id, mood, data.get("notes", "")))
+        return success(f"Check-in recorded (mood: {mood})")
+
+    # Schedule
+
+    def schedule_print(self, data):
+        today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+        schedule = self.schedules.find_by_user_and_date(self.user_id, today)
+        protocol = self.protocols.find_by_user(self.user_id)
+        busy = self.occurrences.busy_between(protocol, today, today + timedelta(days=1))
+        entries = schedule.tasks if schedule is not None else []
+        if not entries and not busy:
+            return success("Nothing scheduled for today")
+        # Recurring events are listed alongside the tasks, and a task that
+        # overlaps one is flagged
+        lines = [(max(start, today), f"{max(start, today):%H:%M} - {end:%H:%M}  [{name or 'busy'}]")
+                 for start, end, name in busy]
+        names = self.tasks.find_names({entry["task_id"] for entry in entries})
+        for entry in entries:
+            conflicts = [name or "busy" for start, end, name in busy
+                         if start < entry["end_time"] and end > entry["start_time"]]
+            line = (f"{entry['start_time']:%H:%M} - {entry['end_time']:%H:%M}  "
+                    f"{names.get(str(entry['task_id']), entry['task_id'])}")
+            if conflicts:
+                line += f"  (conflicts with {', '.join(conflicts)})"
+            lines.append((entry["start_time"], line))
+        return success("\n".join(line for _, line in sorted(lines, key=lambda line: line[0])))
+
+    @staticmethod
+    def _name_list(tasks, limit=10):
+        names = ", ".join(task.name for task in tasks[:limit])
+        return f"{names} and {len(tasks) - limit} more" if len(tasks) > limit else names
+
+    def schedule_generate(self, data):
+        from engine.scheduler import Scheduler
+
+        now = datetime.utcnow().replace(second=0, microsecond=0)
+        days = int(data.get("days") or 7)
+        today = datetime.combine(now.date(), datetime.min.time())
+        tasks = self.tasks.find_open_by_user(self.user_id)
+        protocol = self.protocols.find_by_user(self.user_id)
+        plan = Scheduler(protocol, self.occurrences).plan(tasks, now, days)
+
+        # Every day in the horizon is rewritten, but today's past slots stay
+        schedule = {today + timedelta(days=offset): plan["entries"].get(today + timedelta(days=offset), [])
+                    for offset in range(days)}
+        existing = self.schedules.find_by_user_and_date(self.user_id, today)
+        if existing is not None:
+            schedule[today] = [entry for entry in existing.tasks
+                               if entry["start_time"] < now] + schedule[today]
+        self.schedules.replace_days(self.user_id, schedule)
+        # Days a previous, longer plan covered would repeat these tasks
+        self.schedules.delete_from(self.user_id, today + timedelta(days=days))
+
+        names = {str(task._id): task.name for task in tasks}
+        lines = []
+        for day, entries in schedule.items():
+            if entries:
+                lines.append(f"{day:%a %Y-%m-%d}")
+                lines += [f"  {entry['start_time']:%H:%M} - {entry['end_time']:%H:%M}  "
+                          f"{names.get(str(entry['task_id']), entry['task_id'])}" for entry in entries]
+        scheduled = len(tasks) - len(plan["unscheduled"])
+        lines.append(f"Scheduled {scheduled} of {len(tasks)} open tasks over {days} days")
+        if plan["late"]:
+            lines.append("Finishing after their due date: " + self._name_list(plan["late"]))
+        if plan["unscheduled"]:
+            lines.append("No room for: " + self._name_list(plan["unscheduled"]))
+        return success("\n".join(lines) if tasks else "No open tasks to schedule")
+
+    def schedule_patch(self, data):
+        """Put a task at a time, pushing later slots back if it overlaps them."""
+        from engine.scheduler import DEFAULT_PREFERENCES
+
+        start = self._parse_slot_time(data["time"])
+        day = datetime.combine(start.date(), datetime.min.time())
+        task = self._find_named("task", self.tasks, data["task"])
+        schedule = self.schedules.find_by_user_and_date(self.user_id, day)
+        entries = schedule.tasks if schedule is not None else []
+
+        # Replacing the task of an existing slot keeps its times
+        for index, entry in enumerate(entries):
+            if entry["start_time"] == start:
+                if not self.schedules.patch_entries(schedule, {index: {"task_id": str(task._id)}}):
+                    raise CommandError("The schedule changed meanwhile, try again")
+                return success(f"{start:%H:%M} - {entry['end_time']:%H:%M}  {task.name}")
+
+        protocol = self.protocols.find_by_user(self.user_id)
+        preferences = {**DEFAULT_PREFERENCES, **(getattr(protocol, "preferences", None) or {})}
+        end = start + timedelta(minutes=int(task.estimated_time or preferences["default_task_minutes"]))
+        busy = IntervalIndex((busy_start, busy_end, name)
+                             for busy_start, busy_end, name in self.occurrences.busy_between(
+                                 protocol, day, day + timedelta(days=2)))
+        slots = IntervalIndex((entry["start_time"], entry["end_time"], index)
+                              for index, entry in enumerate(entries))
+
+        blocked = busy.overlapping(start, end)
+        if blocked:
+            occupied = IntervalIndex([*busy, *slots])
+            free = occupied.free_slot(end - start, start, day + timedelta(days=1))
+            hint = f"; next free slot at {free:%H:%M}" if free else ""
+            raise CommandError(f"{start:%H:%M} - {end:%H:%M} conflicts with "
+                               f"{', '.join(name or 'busy' for _, _, name in blocked)}{hint}")
+
+        lines = [f"{start:%H:%M} - {end:%H:%M}  {task.name}"]
+        overlapping = slots.overlapping(start, end)
+        if overlapping:
+            # Later slots move back only as far as the overlap carries on
+            first = min(slot_start for slot_start, _, _ in overlapping)
+            moved = slots.push_back(first, end)
+            changes = {index: {"start_time": slot_start, "end_time": slot_end}
+                       for slot_start, slot_end, index in moved}
+            if not self.schedules.patch_entries(schedule, changes):
+                raise CommandError("The schedule changed meanwhile, try again")
+            names = self.tasks.find_names({entries[index]["task_id"] for index in changes})
+            for index, fields in sorted(changes.items()):
+                clash = busy.overlapping(fields["start_time"], fields["end_time"])
+                line = (f"  moved {names.get(str(entries[index]['task_id']), entries[index]['task_id'])} "
+                        f"to {fields['start_time']:%H:%M} - {fields['end_time']:%H:%M}")
+                if clash:
+                    line += f" (now conflicts with {', '.join(name or 'busy' for _, _, name in clash)})"
+                lines.append(line)
+        self.schedules.insert_entry(self.user_id, day, {
+            "task_id": str(task._id), "start_time": start, "end_time": end})
+        return success("\n".join(lines))
+
+    @staticmethod
+    def _parse_slot_time(value):
+        # "HH:MM" for today, or "YYYY-MM-DD HH:MM"
+        day_part, _, clock_part = str(value).strip().rpartition(" ")
+        try:
+            day = parse_date(day_part) if day_part else datetime.utcnow().date()
+            return datetime.combine(day, parse_clock(clock_part))
+        except ValueError:
+            raise CommandError(f"Cannot read time '{value}', expected HH:MM or YYYY-MM-DD HH:MM")
+
+    # User
+
+    def _current_user(self):
+        user = self.users.find_by_id(self.user_id)
+        if user is None:
+            raise CommandError("Current user no longer exists")
+        return user
+
+    def user_settings(self, data):
+        settings = self._current_user().settings
+        lines = [f"{key}: {value}" for key, value in settings.items()]
+        return success("\n".join(lines) or "No settings")
+
+    def user_account(self, data):
+        user = self._current_user()
+        lines = [
+            f"Username: {user.username}",
+            f"Email: {user.email}",
+            f"Member since: {format_date(user.created_at)}",
+        ]
+        return success("\n".join(lines))
+
+    def user_stats(self, data):
+        query = {"user_id": self.user_id}
+        open_tasks = self.db.tasks.count_documents(
+            {**query, "status": {"$ne": "completed"}})
+        done_tasks = self.db.tasks.count_documents(
+            {**query, "status": "completed"})
+        lines = [
+            f"Tasks: {open_tasks} open, {done_tasks} completed",
+            f"Projects: {self.db.projects.count_documents(query)}",
+            f"Skills: {self.db.skills.count_documents(query)}",
+            f"Log entries: {self.db.logs.count_documents(query)}",
+            f"Check-ins: {self.db.checkins.count_documents(query)}",
+        ]
+        return success("\n".join(lines))
+
+    # Database maintenance
+
+    def db_migrate(self, data):
+        from database.indexes import migrate
+
+        report = migrate(self.db)
+        # Backfill skill paths and subtree totals for data written before them
+        rebuilt = self.skills.rebuild_hierarchy()
+        lines = [f"{collection}.{name}: {status}" for collection, name, status in report]
+        lines.append(f"skills.hierarchy: {rebuilt} updated")
+        return success("\n".join(lines))
+
+    def db_check(self, data):
+        from database.indexes import check_indexes
+
+        report = check_indexes(self.db)
+        return success("\n".join(f"{collection}.{name}: {status}"
+                                  for collection, name, status in report))
+
+    def db_stats(self, data):
+        # A plain Database would hand back a "cache" collection here
+        cache = self.db.cache if isinstance(self.db, CachedDatabase) else None
+        if cache is None:
+            lines = ["Query cache is disabled"]
+        else:
+            stats = cache.stats()
+            lines = [f"Entries: {stats['entries']}  Hits: {stats['hits']}  Misses: {stats['misses']}  "
+                     f"Evictions: {stats['evictions']}  Hit rate: {stats['hit_rate']:.0%}"]
+            lines += [f"  {name}: {counts['hits']} hits, {counts['misses']} misses, "
+                      f"{counts['invalidations']} invalidations ({counts['hit_rate']:.0%})"
+                      for name, counts in sorted(stats["collections"].items())]
+        occurrences = self.occurrences.stats()
+        lines.append(f"Recurrence cache: {occurrences['protocols']} protocols, {occurrences['days']} days, "
+                     f"{occurrences['hits']} hits, {occurrences['misses']} misses, "
+                     f"{occurrences['invalidations']} invalidations")
+        return success("\n".join(lines + self._buffer_stats()))
+
+    def _buffer_stats(self):
+        if self.write_buffer is None:
+            return []
+        metrics = self.write_buffer.metrics()
+        return [
+            f"Write buffer: {metrics['pending']}/{metrics['max_pending']} pending "
+            f"(oldest {metrics['oldest_pending_seconds']:.1f}s), {metrics['flushed']} flushed "
+            f"in {metrics['batches']} batches, last flush {metrics['last_flush_seconds'] * 1000:.0f}ms",
+            f"  Blocked: {metrics['blocked']} times ({metrics['blocked_seconds']:.1f}s)  "
+            f"Failures: {metrics['failures']}  Duplicates: {metrics['duplicates']}  "
+            f"Dropped: {metrics['dropped']}  Replayed: {metrics['replayed']}"
+            + (f"\n  Last error: {metrics['last_error']}" if metrics["last_error"] else ""),
+        ]
+
+    def db_reindex(self, data):
+        if self.search is None:
+            raise CommandError("Search is disabled (HAL9001_SEARCH)")
+        started = datetime.utcnow()
+        counts = self.search.rebuild(self.db, self.user_id)
+        elapsed = (datetime.utcnow() - started).total_seconds()
+        return success(f"Search index rebuilt in {elapsed:.1f}s: "
+                       + ", ".join(f"{count} {kind}s" for kind, count in counts.items()))
+
+    def db_flush(self, data):
+        if self.write_buffer is None:
+            return success("Write buffer is disabled")
+        flushed = self.write_buffer.flush()
+        pending = len(self.write_buffer.pending)
+        if pending:
+            raise CommandError(f"Flushed {flushed} writes; {pending} still pending "
+                               f"({self.write_buffer.last_error})")
+        return success(f"Flushed {flushed} writes")
@@ -0,0 +1,213 @@
+# src/engine/context_builder.py
+
+import math
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Set, Tuple
+
+from config import CONTEXT_TOKEN_BUDGET, CONTEXT_CANDIDATES, CONTEXT_FETCH_WORKERS
+from database.repositories.protocol_repository import ProtocolRepository
+from engine.conversation_memory import estimate_tokens
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "to", "of", "in", "on", "at", "for", "with", "is",
+    "are", "was", "were", "be", "i", "me", "my", "you", "your", "it", "this", "that", "what",
+    "whats", "what's", "how", "do", "does", "did", "can", "could", "should", "would", "about",
+    "from", "as", "by", "so", "if", "we", "our", "have", "has", "had", "any", "some", "there",
+}
+
+PRIORITY_WEIGHTS = {"critical": 1.0, "urgent": 1.0, "high": 0.8, "medium": 0.5, "low": 0.2}
+
+# How much each kind is worth before relevance is taken into account
+KIND_WEIGHTS = {"schedule": 1.2, "task": 1.0, "project": 0.9, "skill": 0.6, "log": 0.7, "checkin": 0.6}
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def keywords(text: str) -> Set[str]:
+    return {word for word in _WORD.findall(str(text).lower())
+            if word not in STOPWORDS and len(word) > 1}
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def fetch_executor() -> ThreadPoolExecutor:
+    # Shared across requests so a warm daemon does not respawn threads
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=CONTEXT_FETCH_WORKERS, thread_name_prefix="context-fetch")
+    return _executor
+
+
+def _days_between(later: datetime, earlier: datetime) -> float:
+    return (later - earlier).total_seconds() / 86400
+
+
+def _date(value) -> str:
+    return value.strftime("%Y-%m-%d") if isinstance(value, datetime) else str(value)
+
+
+def entry_time(value) -> str:
+    return value.strftime("%H:%M") if isinstance(value, datetime) else str(value)
+
+
+class ContextBuilder:
+    """Ranks a user's documents against the input and packs the best ones
+    into a compact, token-bounded block for the prompt."""
+
+    # (collection, kind, projection, sort)
+    SOURCES = [
+        ("tasks", "task", {"name": 1, "description": 1, "status": 1, "priority": 1,
+                           "due_date": 1, "created_at": 1, "tags": 1}, [("due_date", 1)]),
+        ("projects", "project", {"name": 1, "description": 1, "status": 1, "start_date": 1,
+                                 "end_date": 1, "tags": 1}, [("_id", -1)]),
+        ("skills", "skill", {"name": 1, "description": 1, "level": 1, "xp": 1, "tags": 1},
+         [("_id", -1)]),
+        ("logs", "log", {"entry": 1, "timestamp": 1, "tags": 1}, [("timestamp", -1)]),
+        ("checkins", "checkin", {"mood": 1, "notes": 1, "timestamp": 1, "tags": 1},
+         [("timestamp", -1)]),
+    ]
+
+    def __init__(self, database, token_budget: int = CONTEXT_TOKEN_BUDGET,
+                 candidates: int = CONTEXT_CANDIDATES):
+        self.db = database
+        self.protocols = ProtocolRepository(database)
+        self.token_budget = token_budget
+        self.candidates = candidates
+
+    def build(self, user_id, text: str, now: datetime = None) -> str:
+        now = now or datetime.utcnow()
+        terms = keywords(text)
+        ranked = self.rank(self.fetch_candidates(user_id, terms), terms, now)
+        return self.pack(ranked)
+
+    def fetch_candidates(self, user_id, terms: Set[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Run every query concurrently so DB wall-clock is the slowest one,
+        not the sum, then merge results per kind by _id."""
+        jobs = []
+        for collection, kind, projection, sort in self.SOURCES:
+            query = {"user_id": user_id}
+            if kind == "task":
+                query["status"] = {"$ne": "completed"}
+            jobs.append((kind, self._find, (collection, query, projection, sort)))
+            if terms:
+                # Older records that mention the input must not be crowded
+                # out by the most recent/urgent ones
+                jobs.append((kind, self._find, (collection, {**query, **self.keyword_query(
+                    projection, terms)}, projection, None)))
+        jobs.append(("task", self._upcoming_tasks, (user_id,)))
+        jobs.append(("project", self._active_projects, (user_id,)))
+        jobs.append(("schedule", self._todays_schedule, (user_id,)))
+
+        executor = fetch_executor()
+        futures = [(kind, executor.submit(fetch, *args)) for kind, fetch, args in jobs]
+        candidates: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+        for kind, future in futures:
+            docs = candidates.setdefault(kind, {})
+            for doc in future.result():
+                docs.setdefault(doc["_id"], doc)
+        return {kind: list(docs.values()) for kind, docs in candidates.items()}
+
+    def _find(self, collection, query, projection, sort) -> List[Dict[str, Any]]:
+        cursor = self.db[collection].find(query, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        return list(cursor.limit(self.candidates))
+
+    def _upcoming_tasks(self, user_id) -> List[Dict[str, Any]]:
+        return list(self.protocols.get_upcoming_tasks(user_id))
+
+    def _active_projects(self, user_id) -> List[Dict[str, Any]]:
+        return [{**project, "status": "active"}
+                for project in self.protocols.get_active_projects(user_id)]
+
+    def _todays_schedule(self, user_id) -> List[Dict[str, Any]]:
+        today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+        schedule = self.db.schedules.find_one({"user_id": user_id, "date": today})
+        if not schedule:
+            return []
+        return [{"_id": f"{schedule['_id']}:{index}", **entry}
+                for index, entry in enumerate(schedule.get("tasks", []))]
+
+    @staticmethod
+    def keyword_query(projection: Dict[str, int], terms: Set[str]) -> Dict[str, Any]:
+        pattern = "|".join(re.escape(term) for term in sorted(terms))
+        fields = [field for field in ("name", "description", "entry", "notes", "tags")
+                  if field in projection]
+        return {"$or": [{field: {"$regex": pattern, "$options": "i"}} for field in fields]}
+
+    def rank(self, candidates: Dict[str, List[Dict[str, Any]]], terms: Set[str],
+             now: datetime) -> List[Tuple[float, str, Dict[str, Any]]]:
+        ranked = [(self.score(kind, doc, terms, now), kind, doc)
+                  for kind, docs in candidates.items() for doc in docs]
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return ranked
+
+    def score(self, kind: str, doc: Dict[str, Any], terms: Set[str], now: datetime) -> float:
+        score = KIND_WEIGHTS.get(kind, 0.5)
+
+        if terms:
+            text = " ".join(str(doc.get(field) or "") for field in
+                            ("name", "description", "entry", "notes", "mood"))
+            text += " " + " ".join(str(tag) for tag in doc.get("tags") or [])
+            overlap = len(terms & keywords(text))
+            score += 4.0 * overlap / len(terms)
+
+        timestamp = doc.get("timestamp") or doc.get("created_at") or doc.get("start_date")
+        if isinstance(timestamp, datetime):
+            # Recency fades over a couple of weeks
+            score += math.exp(-max(_days_between(now, timestamp), 0) / 14)
+
+        due_date = doc.get("due_date")
+        if isinstance(due_date, datetime):
+            days_left = _days_between(due_date, now)
+            score += 1.5 if days_left < 0 else 1.5 / (1 + days_left)
+
+        priority = doc.get("priority")
+        if isinstance(priority, (int, float)):
+            score += min(max(priority, 0), 5) / 5
+        elif priority:
+            score += PRIORITY_WEIGHTS.get(str(priority).lower(), 0.3)
+
+        if kind == "project" and doc.get("status") == "active":
+            score += 0.5
+        return score
+
+    def serialize(self, kind: str, doc: Dict[str, Any]) -> str:
+        if kind == "task":
+            parts = [doc.get("name"), doc.get("status"),
+                     f"priority {doc['priority']}" if doc.get("priority") else None,
+                     f"due {_date(doc['due_date'])}" if doc.get("due_date") else None]
+        elif kind == "project":
+            parts = [doc.get("name"), doc.get("status"),
+                     f"ends {_date(doc['end_date'])}" if doc.get("end_date") else None]
+        elif kind == "skill":
+            parts = [doc.get("name"), f"level {doc.get('level', 1)}", f"{doc.get('xp', 0)} xp"]
+        elif kind == "schedule":
+            parts = [f"today {entry_time(doc.get('start_time'))}-{entry_time(doc.get('end_time'))}",
+                     doc.get("task_id")]
+        elif kind == "log":
+            parts = [_date(doc.get("timestamp")), doc.get("entry")]
+        else:
+            parts = [_date(doc.get("timestamp")), f"mood {doc.get('mood')}", doc.get("notes")]
+        description = doc.get("description")
+        if description and kind in ("task", "project", "skill"):
+            parts.append(description[:120])
+        return f"{kind}: " + " | ".join(str(part) for part in parts if part)
+
+    def pack(self, ranked: List[Tuple[float, str, Dict[str, Any]]]) -> str:
+        lines, used = [], 0
+        for _, kind, doc in ranked:
+            line = self.serialize(kind, doc)
+            cost = estimate_tokens(line) + 1
+            if used + cost > self.token_budget:
+                continue
+            lines.append(line)
+            used += cost
+        return "\n".join(lines) if lines else "No relevant records."
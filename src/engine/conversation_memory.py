@@ -0,0 +1,89 @@
+# src/engine/conversation_memory.py
+
+import logging
+import threading
+from typing import Callable, List, Optional, Tuple
+
+from config import CHAT_MEMORY_TOKEN_BUDGET, CHAT_MEMORY_KEEP_TURNS
+
+Turn = Tuple[str, str]  # (role, content), role is "human" or "ai"
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token, good enough for budgeting
+    return max(1, len(text) // 4)
+
+
+class ConversationMemory:
+    """Chat history held under a token budget.
+
+    The most recent turns are kept verbatim; once the history outgrows the
+    budget, older turns are folded into a rolling summary by `summarizer`,
+    so prompt size per turn stays flat however long the session runs.
+    """
+
+    def __init__(self, summarizer: Optional[Callable[[str, List[Turn]], str]] = None,
+                 token_budget: int = CHAT_MEMORY_TOKEN_BUDGET,
+                 keep_turns: int = CHAT_MEMORY_KEEP_TURNS):
+        self.summarizer = summarizer
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.summary = ""
+        self.turns: List[Turn] = []
+        self._lock = threading.Lock()
+        self._compacting = False
+
+    def add_exchange(self, user_input: str, response: str):
+        with self._lock:
+            self.turns.append(("human", user_input))
+            self.turns.append(("ai", response))
+
+    def history_tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(
+            estimate_tokens(content) for _, content in self.turns)
+
+    def needs_compaction(self) -> bool:
+        return (self.history_tokens() > self.token_budget
+                and len(self.turns) > self.keep_turns * 2)
+
+    def compact(self):
+        """Fold everything but the most recent turns into the summary."""
+        with self._lock:
+            if self._compacting or not self.needs_compaction():
+                return
+            self._compacting = True
+            split = len(self.turns) - self.keep_turns * 2
+            older, previous_summary = self.turns[:split], self.summary
+        try:
+            # Summarize without holding the lock so new turns are not blocked
+            summary = None
+            if self.summarizer is not None:
+                try:
+                    summary = self.summarizer(previous_summary, older)
+                except Exception as e:
+                    # Trim anyway so the budget holds while the summarizer is failing
+                    logger.warning(f"Summarizing chat history failed, truncating it instead: {e}")
+            if summary is None:
+                summary = " ".join([previous_summary] + [f"{role}: {content}" for role, content in older])
+        finally:
+            with self._lock:
+                self._compacting = False
+        with self._lock:
+            # Keep the summary within about a quarter of the token budget
+            # (token_budget characters at ~4 characters per token)
+            self.summary = summary[-self.token_budget:].strip()
+            self.turns = self.turns[split:]
+
+    def compact_in_background(self):
+        if self.needs_compaction():
+            threading.Thread(target=self.compact, daemon=True).start()
+
+    def messages(self) -> List[Turn]:
+        with self._lock:
+            history = list(self.turns)
+            summary = self.summary
+        if summary:
+            return [("system", f"Summary of the earlier conversation: {summary}")] + history
+        return history
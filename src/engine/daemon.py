@@ -0,0 +1,118 @@
+# src/engine/daemon.py
+
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import threading
+
+from config import DAEMON_SOCKET
+
+
+class CommandRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+            if request.get("op") == "stream_command":
+                self.stream(request)
+                return
+            response = self.server.dispatch(request)
+        except Exception as e:
+            self.server.logger.error(f"Error in daemon request: {str(e)}")
+            response = {"status": "error", "data": f"An error occurred while processing your request: {str(e)}"}
+        self.send(response)
+
+    def send(self, message):
+        # Repository results can carry ObjectIds and datetimes
+        self.wfile.write(json.dumps(message, default=str).encode() + b"\n")
+        self.wfile.flush()
+
+    def stream(self, request):
+        cancel_event = threading.Event()
+
+        def watch_client():
+            # The client sends nothing after its request, so EOF means it
+            # went away (e.g. Ctrl-C) and the LLM request should be aborted
+            try:
+                self.rfile.read(1)
+            except OSError:
+                pass
+            cancel_event.set()
+
+        threading.Thread(target=watch_client, daemon=True).start()
+        events = self.server.command_handler.stream_command(
+            request.get("command", ""), request.get("data") or {}, cancel_event)
+        try:
+            for event in events:
+                self.send(event)
+        except (BrokenPipeError, ConnectionResetError):
+            cancel_event.set()
+        finally:
+            events.close()
+
+
+class CommandDaemon(socketserver.ThreadingUnixStreamServer):
+    """Owns one warm CommandHandler and serves it over a Unix domain socket."""
+
+    daemon_threads = True
+
+    def __init__(self, command_handler, socket_path: str = DAEMON_SOCKET):
+        self.logger = logging.getLogger(__name__)
+        self.command_handler = command_handler
+        self.socket_path = socket_path
+        self._remove_stale_socket()
+        os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+        super().__init__(socket_path, CommandRequestHandler)
+        os.chmod(socket_path, 0o600)
+
+    def _remove_stale_socket(self):
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(self.socket_path)
+            return
+        finally:
+            probe.close()
+        raise RuntimeError(
+            f"A HAL-9001 daemon is already listening on {self.socket_path}")
+
+    def dispatch(self, request):
+        op = request.get("op")
+        if op == "ping":
+            return {"status": "success", "data": "pong", "pid": os.getpid()}
+        if op == "handle_command":
+            return self.command_handler.handle_command(
+                request.get("command", ""), request.get("data") or {})
+        return {"status": "error", "data": f"Unsupported daemon operation: {op}"}
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def serve(command_handler, socket_path: str = DAEMON_SOCKET, on_ready=None):
+    # Compile the graph up front so the first request is already warm
+    command_handler.graph
+    daemon = CommandDaemon(command_handler, socket_path)
+
+    def stop(signum, frame):
+        threading.Thread(target=daemon.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    if on_ready:
+        on_ready(socket_path)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.server_close()
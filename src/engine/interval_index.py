@@ -0,0 +1,91 @@
+# src/engine/interval_index.py
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterable, List, Optional, Tuple
+
+
+class IntervalIndex:
+    """Possibly overlapping [start, end) intervals, sorted by start.
+
+    Alongside the starts it keeps the running maximum of the ends, which is
+    non-decreasing and so can be binary searched too: every interval before
+    the first position whose running maximum passes `t` ends at or before
+    `t`. Overlap queries and free-slot searches therefore only look at
+    intervals near the answer.
+
+    Inserting and pushing intervals back are O(n) list operations in the
+    worst case, but only recompute the running maximum as far as it changes.
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[Any, Any, Any]] = ()):
+        items = sorted(intervals, key=lambda item: (item[0], item[1]))
+        self.starts: List[Any] = [item[0] for item in items]
+        self.ends: List[Any] = [item[1] for item in items]
+        self.payloads: List[Any] = [item[2] for item in items]
+        self.max_ends: List[Any] = [None] * len(items)
+        self._reindex(0)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        return zip(self.starts, self.ends, self.payloads)
+
+    def _reindex(self, position: int, changed_until: Optional[int] = None):
+        # Recompute the running maximum from `position` on. Past the changed
+        # entries each value depends only on the one before it, so the walk
+        # stops at the first that comes out as it was.
+        running = self.max_ends[position - 1] if position else None
+        for i in range(position, len(self.ends)):
+            value = self.ends[i] if running is None else max(running, self.ends[i])
+            if changed_until is not None and i >= changed_until and self.max_ends[i] == value:
+                return
+            self.max_ends[i] = running = value
+
+    def insert(self, start, end, payload=None):
+        position = bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.payloads.insert(position, payload)
+        self.max_ends.insert(position, None)
+        self._reindex(position, position + 1)
+
+    def overlapping(self, start, end) -> List[Tuple[Any, Any, Any]]:
+        """Intervals that overlap [start, end)."""
+        first = bisect_right(self.max_ends, start)
+        last = bisect_left(self.starts, end)
+        return [(self.starts[i], self.ends[i], self.payloads[i])
+                for i in range(first, last) if self.ends[i] > start]
+
+    def free_slot(self, duration, not_before, not_after=None) -> Optional[Any]:
+        """Start of the earliest gap of `duration` at or after `not_before`."""
+        cursor = not_before
+        i = bisect_right(self.max_ends, cursor)
+        while i < len(self.starts) and self.starts[i] < cursor + duration:
+            cursor = max(cursor, self.ends[i])
+            i += 1
+        if not_after is not None and cursor + duration > not_after:
+            return None
+        return cursor
+
+    def push_back(self, at, not_before) -> List[Tuple[Any, Any, Any]]:
+        """Move intervals starting at or after `at` later, each just far enough
+        to start at `not_before` or after the one before it ends.
+
+        Stops at the first interval that already fits, so slack between
+        intervals absorbs the push. Returns the moved intervals at their new
+        times.
+        """
+        position = bisect_left(self.starts, at)
+        cursor = not_before
+        i = position
+        while i < len(self.starts) and self.starts[i] < cursor:
+            delta = cursor - self.starts[i]
+            self.starts[i] += delta
+            self.ends[i] += delta
+            cursor = self.ends[i]
+            i += 1
+        # Starts stay sorted: each moved one starts where the previous ended,
+        # and the first one left alone starts at or after that
+        self._reindex(position, i)
+        return list(zip(self.starts[position:i], self.ends[position:i], self.payloads[position:i]))
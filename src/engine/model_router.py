@@ -0,0 +1,68 @@
+# src/engine/model_router.py
+
+import re
+from typing import Set, Tuple
+
+from config import (MODEL_SMALL, MODEL_LARGE, MODEL_LARGE_COMMANDS, MODEL_LONG_INPUT_TOKENS,
+                    MODEL_COMPLEXITY_THRESHOLD, MODEL_ESCALATION)
+from engine.conversation_memory import estimate_tokens
+
+# Words that usually mean planning or reasoning rather than a lookup
+COMPLEX_KEYWORDS = {
+    "plan", "planning", "why", "compare", "analyze", "analyse", "strategy", "prioritize",
+    "prioritise", "optimize", "optimise", "reflect", "explain", "tradeoff", "trade-off",
+    "reorganize", "restructure", "evaluate", "recommend", "should",
+}
+
+# Phrases that suggest the small model was not sure of its answer
+LOW_CONFIDENCE_PHRASES = (
+    "i'm not sure", "i am not sure", "i don't know", "i do not know", "i'm unable",
+    "i am unable", "i cannot determine", "i can't determine", "not enough information",
+    "unclear", "i'm not certain", "i am not certain",
+)
+
+_WORD = re.compile(r"[a-z'-]+")
+
+
+class ModelRouter:
+    """Picks the model for a request: small by default, large when it looks hard."""
+
+    def __init__(self, small: str = MODEL_SMALL, large: str = MODEL_LARGE,
+                 large_commands: Set[str] = MODEL_LARGE_COMMANDS,
+                 long_input_tokens: int = MODEL_LONG_INPUT_TOKENS,
+                 threshold: float = MODEL_COMPLEXITY_THRESHOLD,
+                 escalation: bool = MODEL_ESCALATION):
+        self.small = small
+        self.large = large
+        self.large_commands = large_commands
+        self.long_input_tokens = long_input_tokens
+        self.threshold = threshold
+        self.escalation = escalation
+
+    def complexity(self, text: str) -> float:
+        """Cheap 0..1 score from length, keywords, questions and clauses."""
+        words = _WORD.findall(text.lower())
+        if not words:
+            return 0.0
+        score = min(estimate_tokens(text) / self.long_input_tokens, 1.0) * 0.4
+        score += min(sum(word in COMPLEX_KEYWORDS for word in words), 2) * 0.2
+        score += min(text.count("?"), 3) * 0.05
+        score += min(sum(word in ("and", "then", "but", "because") for word in words), 4) * 0.05
+        return min(score, 1.0)
+
+    def choose(self, command: str, text: str) -> Tuple[str, str]:
+        """Return (model, reason)."""
+        if command in self.large_commands:
+            return self.large, f"command '{command}'"
+        if estimate_tokens(text) >= self.long_input_tokens:
+            return self.large, "long input"
+        score = self.complexity(text)
+        if score >= self.threshold:
+            return self.large, f"complexity {score:.2f}"
+        return self.small, f"complexity {score:.2f}"
+
+    def should_escalate(self, model: str, response: str) -> bool:
+        if not self.escalation or model == self.large:
+            return False
+        text = response.strip().lower()
+        return not text or any(phrase in text for phrase in LOW_CONFIDENCE_PHRASES)
@@ -0,0 +1,259 @@
+# src/engine/recurrence.py
+
+import threading
+from collections import OrderedDict
+from datetime import datetime, date, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from config import RECURRENCE_CACHE_MAX_PROTOCOLS
+
+# Recurring entries (protocol time_blocks and recurring_events) look like
+#   {"name": "Standup", "start": "09:00", "end": "09:15", "days": ["mon", "wed"]}
+# and may carry RRULE-style fields:
+#   freq        "daily", "weekly" or "monthly"; weekly when "days" is given,
+#               else daily
+#   interval    every n days/weeks/months, counted from "from" (default 1)
+#   days        weekdays, as names or numbers (0 = Monday)
+#   month_days  days of the month for monthly rules (default: the day of "from")
+#   from/until  first and last date the entry applies ("YYYY-MM-DD")
+#   except      dates it is skipped on
+# or the same as an iCalendar rule string:
+#   "rule": "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH;UNTIL=20261231"
+# An end at or before the start runs past midnight. Anything else (COUNT,
+# BYSETPOS, ordinal weekdays like 1MO, weekdays in monthly rules) is
+# rejected rather than approximated.
+
+DAY_NAMES = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+FREQUENCIES = ("daily", "weekly", "monthly")
+RULE_PARTS = ("FREQ", "INTERVAL", "BYDAY", "BYMONTHDAY", "UNTIL", "DTSTART")
+
+
+class InvalidRecurrence(ValueError):
+    pass
+
+
+def parse_clock(value) -> time:
+    if isinstance(value, time):
+        return value
+    hours, _, minutes = str(value).partition(":")
+    return time(int(hours), int(minutes or 0))
+
+
+def parse_date(value) -> Optional[date]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).replace("-", "")[:8]
+    return date(int(text[:4]), int(text[4:6]), int(text[6:8]))
+
+
+def parse_days(days) -> Optional[set]:
+    """Weekday numbers (0 = Monday) from ints or names; None means every day."""
+    if not days:
+        return None
+    return {day if isinstance(day, int) else _weekday(str(day)) for day in days}
+
+
+def _weekday(name: str) -> int:
+    # Two letters are enough to tell the days apart ("mo", "th", ...)
+    prefix = name.strip().lower()[:2]
+    for number, day_name in enumerate(DAY_NAMES):
+        if day_name.startswith(prefix):
+            return number
+    raise InvalidRecurrence(f"Unknown weekday: {name}")
+
+
+def parse_rule(rule: str) -> Dict[str, Any]:
+    """The fields of an iCalendar RRULE string; raises InvalidRecurrence on parts it cannot honour."""
+    parts = {}
+    for part in rule.upper().removeprefix("RRULE:").split(";"):
+        if not part.strip():
+            continue
+        key, separator, value = part.strip().partition("=")
+        if not separator or key not in RULE_PARTS:
+            raise InvalidRecurrence(f"Unsupported recurrence rule part '{part.strip()}' in '{rule}'")
+        parts[key] = value
+    if "BYDAY" in parts:
+        if any(len(day) != 2 or not day.isalpha() for day in parts["BYDAY"].split(",")):
+            raise InvalidRecurrence(f"Ordinal weekdays (like 1MO) are not supported: '{rule}'")
+        if parts.get("FREQ") == "MONTHLY":
+            raise InvalidRecurrence(f"BYDAY in monthly rules is not supported: '{rule}'")
+    entry: Dict[str, Any] = {}
+    if "FREQ" in parts:
+        entry["freq"] = parts["FREQ"].lower()
+    if "INTERVAL" in parts:
+        entry["interval"] = int(parts["INTERVAL"])
+    if "BYDAY" in parts:
+        entry["days"] = [day.lower() for day in parts["BYDAY"].split(",")]
+    if "BYMONTHDAY" in parts:
+        entry["month_days"] = [int(day) for day in parts["BYMONTHDAY"].split(",")]
+    if "UNTIL" in parts:
+        entry["until"] = parts["UNTIL"]
+    if "DTSTART" in parts:
+        entry["from"] = parts["DTSTART"]
+    return entry
+
+
+class RecurrenceRule:
+    """When one recurring entry applies, compiled once from its dict."""
+
+    __slots__ = ("name", "start", "end", "freq", "interval", "days", "month_days",
+                 "first", "until", "exceptions")
+
+    def __init__(self, entry: Dict[str, Any]):
+        if entry.get("rule"):
+            entry = {**parse_rule(entry["rule"]), **{key: value for key, value in entry.items() if key != "rule"}}
+        self.name = entry.get("name")
+        self.start = parse_clock(entry["start"])
+        self.end = parse_clock(entry["end"])
+        self.days = parse_days(entry.get("days"))
+        self.freq = str(entry.get("freq") or ("weekly" if self.days else "daily")).lower()
+        if self.freq not in FREQUENCIES:
+            raise InvalidRecurrence(f"Unsupported recurrence frequency: {self.freq}")
+        if self.freq == "monthly" and self.days is not None:
+            raise InvalidRecurrence("Monthly entries take month_days, not days")
+        self.interval = max(int(entry.get("interval") or 1), 1)
+        self.first = parse_date(entry.get("from"))
+        self.until = parse_date(entry.get("until"))
+        self.exceptions = {parse_date(day) for day in entry.get("except") or []}
+        month_days = entry.get("month_days") or ([self.first.day] if self.first else [1])
+        self.month_days = set(month_days)
+
+    def occurs_on(self, day: date) -> bool:
+        if (self.first and day < self.first) or (self.until and day > self.until) or day in self.exceptions:
+            return False
+        if self.freq == "monthly":
+            if day.day not in self.month_days:
+                return False
+            return not self.first or (
+                (day.year - self.first.year) * 12 + day.month - self.first.month) % self.interval == 0
+        if self.days is not None and day.weekday() not in self.days:
+            return False
+        if self.interval == 1 or not self.first:
+            return True
+        if self.freq == "weekly":
+            # Weeks counted Monday to Monday, so every weekday of an active week applies
+            weeks = (day - timedelta(days=day.weekday()) - (self.first - timedelta(days=self.first.weekday()))).days // 7
+            return weeks % self.interval == 0
+        return (day - self.first).days % self.interval == 0
+
+    def span(self, day: date) -> Tuple[datetime, datetime]:
+        start = datetime.combine(day, self.start)
+        end = datetime.combine(day, self.end)
+        if end <= start:
+            end += timedelta(days=1)  # Runs past midnight
+        return start, end
+
+
+class DayOccurrences:
+    """The expanded windows (time blocks) and busy intervals of one day."""
+
+    __slots__ = ("windows", "busy")
+
+    def __init__(self, windows: List[Tuple[datetime, datetime, Optional[str]]],
+                 busy: List[Tuple[datetime, datetime, Optional[str]]]):
+        self.windows = windows
+        self.busy = busy
+
+
+class OccurrenceCache:
+    """Per-protocol cache of recurring entries expanded into concrete days.
+
+    Days are expanded on first use and kept until the protocol's
+    `last_updated` changes, so asking for a wider range only expands the
+    days not seen yet. The least recently used protocols are dropped beyond
+    `max_protocols`.
+    """
+
+    def __init__(self, max_protocols: int = RECURRENCE_CACHE_MAX_PROTOCOLS):
+        self.max_protocols = max_protocols
+        self.entries: "OrderedDict[Any, Dict[str, Any]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def day(self, protocol, day: date) -> DayOccurrences:
+        return self.days(protocol, day, day)[day]
+
+    def days(self, protocol, first: date, last: date) -> Dict[date, DayOccurrences]:
+        """Expanded occurrences for every day from `first` to `last` inclusive."""
+        with self.lock:
+            entry = self._entry(protocol)
+            days = {}
+            for offset in range((last - first).days + 1):
+                day = first + timedelta(days=offset)
+                occurrences = entry["days"].get(day)
+                if occurrences is None:
+                    self.misses += 1
+                    occurrences = entry["days"][day] = self._expand(entry, day)
+                else:
+                    self.hits += 1
+                days[day] = occurrences
+            return days
+
+    def busy_between(self, protocol, start: datetime, end: datetime) -> List[Tuple[datetime, datetime, Optional[str]]]:
+        """Busy intervals overlapping [start, end), including ones begun the day before."""
+        days = self.days(protocol, start.date() - timedelta(days=1), end.date())
+        return sorted((interval for occurrences in days.values() for interval in occurrences.busy
+                       if interval[0] < end and interval[1] > start), key=lambda interval: interval[:2])
+
+    def conflicts(self, protocol, start: datetime, end: datetime) -> List[str]:
+        """Names of the recurring events that overlap [start, end)."""
+        return [name or "busy" for _, _, name in self.busy_between(protocol, start, end)]
+
+    def invalidate(self, protocol_id=None):
+        with self.lock:
+            if protocol_id is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(protocol_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"protocols": len(self.entries),
+                    "days": sum(len(entry["days"]) for entry in self.entries.values()),
+                    "hits": self.hits, "misses": self.misses, "invalidations": self.invalidations,
+                    "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def _entry(self, protocol) -> Dict[str, Any]:
+        # Called with the lock held
+        key = getattr(protocol, "_id", None)
+        version = getattr(protocol, "last_updated", None)
+        entry = self.entries.get(key)
+        if entry is not None and entry["version"] == version:
+            self.entries.move_to_end(key)
+            return entry
+        if entry is not None:
+            self.invalidations += 1
+        entry = {
+            "version": version,
+            "windows": self._compile(getattr(protocol, "time_blocks", None)),
+            "busy": self._compile(getattr(protocol, "recurring_events", None)),
+            "days": {},
+        }
+        if key is not None:
+            self.entries[key] = entry
+            while len(self.entries) > self.max_protocols:
+                self.entries.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def _compile(entries) -> List[RecurrenceRule]:
+        rules = []
+        for entry in entries or []:
+            try:
+                rules.append(RecurrenceRule(entry))
+            except (ValueError, KeyError) as e:
+                raise InvalidRecurrence(f"Protocol entry '{entry.get('name') or entry}': {e}") from e
+        return rules
+
+    @staticmethod
+    def _expand(entry: Dict[str, Any], day: date) -> DayOccurrences:
+        return DayOccurrences(
+            [(*rule.span(day), rule.name) for rule in entry["windows"] if rule.occurs_on(day)],
+            sorted(((*rule.span(day), rule.name) for rule in entry["busy"] if rule.occurs_on(day)),
+                   key=lambda interval: interval[:2]))
@@ -0,0 +1,180 @@
+# src/engine/scheduler.py
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime, date, time, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from engine.recurrence import OccurrenceCache, parse_clock
+
+# The scheduler reads from the protocol:
+#   time_blocks       windows in which tasks may be placed
+#   recurring_events  busy time carved out of those windows
+#   preferences       day_start/day_end (used when there are no time blocks),
+#                     default_task_minutes, max_block_minutes, min_block_minutes,
+#                     break_minutes
+# Both lists hold recurring entries as described in engine/recurrence.py.
+# Times are on the same naive UTC clock as the rest of the data.
+
+DEFAULT_PREFERENCES = {
+    "day_start": "09:00",
+    "day_end": "17:00",
+    "default_task_minutes": 60,
+    "max_block_minutes": 120,
+    "min_block_minutes": 15,
+    "break_minutes": 10,
+}
+
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+
+class IntervalSet:
+    """Disjoint, sorted [start, end) intervals with binary-searched lookups."""
+
+    def __init__(self, intervals: Iterable[Tuple[Any, Any]] = ()):
+        self.starts: List[Any] = []
+        self.ends: List[Any] = []
+        for start, end in sorted(intervals):
+            self.add(start, end)
+
+    def __iter__(self) -> Iterator[Tuple[Any, Any]]:
+        return zip(self.starts, self.ends)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def add(self, start, end):
+        if start >= end:
+            return
+        # Merge with every interval that overlaps or touches [start, end)
+        lo = bisect_left(self.ends, start)
+        hi = bisect_right(self.starts, end)
+        if lo < hi:
+            start = min(start, self.starts[lo])
+            end = max(end, self.ends[hi - 1])
+        self.starts[lo:hi] = [start]
+        self.ends[lo:hi] = [end]
+
+    def remove(self, start, end) -> List[Tuple[Any, Any]]:
+        """Cut [start, end) out; returns the pieces that were actually free."""
+        if start >= end:
+            return []
+        lo = bisect_right(self.ends, start)
+        hi = bisect_left(self.starts, end)
+        if lo >= hi:
+            return []
+        removed = [(max(self.starts[i], start), min(self.ends[i], end)) for i in range(lo, hi)]
+        pieces = []
+        if self.starts[lo] < start:
+            pieces.append((self.starts[lo], start))
+        if self.ends[hi - 1] > end:
+            pieces.append((end, self.ends[hi - 1]))
+        self.starts[lo:hi] = [piece[0] for piece in pieces]
+        self.ends[lo:hi] = [piece[1] for piece in pieces]
+        return removed
+
+    def first_fit(self, duration, not_before, min_length=None) -> Optional[Tuple[Any, Any]]:
+        """The earliest free [start, start + duration) at or after `not_before`.
+
+        With `min_length`, settle for the earliest piece of at least that
+        length instead, cut to `duration`.
+        """
+        needed = duration if min_length is None else min(min_length, duration)
+        for i in range(bisect_right(self.ends, not_before), len(self.starts)):
+            start = max(self.starts[i], not_before)
+            if start + needed <= self.ends[i]:
+                return start, min(start + duration, self.ends[i])
+        return None
+
+    def total(self):
+        return sum((end - start for start, end in self), timedelta())
+
+
+class Scheduler:
+    """Packs open tasks into the free time of a protocol.
+
+    Tasks are placed greedily, earliest deadline first, then by priority and
+    age, each at the earliest free slot. Long tasks are split into blocks of
+    at most `max_block_minutes`. A task that cannot finish before its due date
+    is still placed and reported as late; one that does not fit at all is
+    reported as unscheduled.
+    """
+
+    def __init__(self, protocol=None, occurrences: Optional[OccurrenceCache] = None):
+        self.protocol = protocol
+        self.occurrences = occurrences or OccurrenceCache()
+        self.preferences = {**DEFAULT_PREFERENCES, **(getattr(protocol, "preferences", None) or {})}
+
+    def availability(self, start: datetime, end: datetime) -> IntervalSet:
+        free = IntervalSet()
+        days = self.occurrences.days(self.protocol, start.date() - timedelta(days=1), end.date())
+        for day, occurrences in days.items():
+            for window_start, window_end in self._windows(day, occurrences):
+                free.add(max(window_start, start), min(window_end, end))
+        # Busy time goes last so events running past midnight are not re-added,
+        # starting the day before for events that spill into the first day
+        for occurrences in days.values():
+            for busy_start, busy_end, _ in occurrences.busy:
+                free.remove(busy_start, busy_end)
+        return free
+
+    def _windows(self, day: date, occurrences) -> List[Tuple[datetime, datetime]]:
+        if getattr(self.protocol, "time_blocks", None):
+            return [(window_start, window_end) for window_start, window_end, _ in occurrences.windows]
+        start = datetime.combine(day, parse_clock(self.preferences["day_start"]))
+        end = datetime.combine(day, parse_clock(self.preferences["day_end"]))
+        return [(start, end if end > start else end + timedelta(days=1))]
+
+    def busy(self, day: date) -> List[Tuple[datetime, datetime]]:
+        """Busy intervals on `day` from the protocol's recurring events."""
+        return [(start, end) for start, end, _ in self.occurrences.day(self.protocol, day).busy]
+
+    def order(self, tasks: List[Any]) -> List[Any]:
+        far = datetime.max
+        return sorted(tasks, key=lambda task: (
+            task.due_date or far,
+            PRIORITY_RANK.get(task.priority, 1),
+            task.created_at or far))
+
+    def plan(self, tasks: List[Any], start: datetime, days: int = 7) -> Dict[str, Any]:
+        """Return {"entries": {date: [entry, ...]}, "late": [...], "unscheduled": [...]}."""
+        end = datetime.combine(start.date() + timedelta(days=days), time.min)
+        free = self.availability(start, end)
+        default_minutes = int(self.preferences["default_task_minutes"])
+        max_block = timedelta(minutes=int(self.preferences["max_block_minutes"]))
+        min_block = timedelta(minutes=int(self.preferences["min_block_minutes"]))
+        gap = timedelta(minutes=int(self.preferences["break_minutes"]))
+
+        entries: Dict[datetime, List[Dict[str, Any]]] = {}
+        late, unscheduled = [], []
+        for task in self.order(tasks):
+            remaining = timedelta(minutes=int(task.estimated_time or default_minutes))
+            placed, taken = [], []
+            cursor = start
+            while remaining > timedelta():
+                block = min(remaining, max_block)
+                # A whole block if one fits, else the earliest usable piece
+                slot = free.first_fit(block, cursor) or free.first_fit(block, cursor, min_block)
+                if slot is None:
+                    break
+                block_start, block_end = slot
+                taken += free.remove(block_start, block_end + gap)
+                placed.append(slot)
+                remaining -= block_end - block_start
+                cursor = block_end
+            if remaining > timedelta():
+                # Give back the partial placement rather than half-schedule a task,
+                # exactly as taken: the break after a block may overlap busy time
+                for taken_start, taken_end in taken:
+                    free.add(taken_start, taken_end)
+                unscheduled.append(task)
+                continue
+            for block_start, block_end in placed:
+                day = datetime.combine(block_start.date(), time.min)
+                entries.setdefault(day, []).append({
+                    "task_id": str(task._id), "start_time": block_start, "end_time": block_end})
+            if task.due_date and placed[-1][1] > task.due_date:
+                late.append(task)
+
+        for day_entries in entries.values():
+            day_entries.sort(key=lambda entry: entry["start_time"])
+        return {"entries": entries, "late": late, "unscheduled": unscheduled,
+                "free": free.total()}
@@ -0,0 +1,36 @@
+# src/engine/streaming.py
+
+import threading
+from typing import Callable
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+class StreamCancelled(Exception):
+    pass
+
+
+class TokenStreamHandler(BaseCallbackHandler):
+    """Forwards LLM tokens as they arrive and aborts once cancelled."""
+
+    # Let StreamCancelled propagate so the HTTP stream is torn down
+    raise_error = True
+
+    def __init__(self, on_token: Callable[[str], None], cancel_event: threading.Event):
+        self.on_token = on_token
+        self.cancel_event = cancel_event
+
+    def check(self):
+        if self.cancel_event.is_set():
+            raise StreamCancelled("Streaming request cancelled")
+
+    # A request cancelled while its context was being built never starts
+    def on_llm_start(self, serialized, prompts, **kwargs) -> None:
+        self.check()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs) -> None:
+        self.check()
+
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        self.check()
+        if token:
+            self.on_token(token)
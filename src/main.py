@@ -1,17 +1,17 @@
 # src/main.py
 
 import os
-from dotenv import load_dotenv
-from pymongo import MongoClient
+import config  # loads .env
 from cli.cli import create_cli
-from engine.command_handler import CommandHandler
-from database.handlers.database_handler import DatabaseHandler
 
-# Load environment variables from .env file
-load_dotenv()
 
+def create_command_handler():
+    # Heavy imports (pymongo, langchain, anthropic) are deferred until a
+    # subcommand actually needs the handler, so --help and typos stay fast.
+    from pymongo import MongoClient
+    from engine.command_handler import CommandHandler
+    from database.handlers.database_handler import DatabaseHandler
 
-def create_app():
     # Get MongoDB URI and database name from environment variables
     mongodb_uri = os.getenv('MONGODB_URI')
     db_name = os.getenv('MONGODB_DATABASE')
@@ -23,9 +23,26 @@ def create_app():
 
     client = MongoClient(mongodb_uri)
     db = client[db_name]  # Explicitly select the database
+    if config.INDEX_CHECK:
+        from database.indexes import warn_missing_indexes
+        warn_missing_indexes(db, config.INDEX_CHECK_STAMP, config.INDEX_CHECK_INTERVAL)
+    if config.DB_CACHE_ENABLED:
+        from database.cache import CachedDatabase, QueryCache
+        db = CachedDatabase(db, QueryCache(
+            config.DB_CACHE_TTL, config.DB_CACHE_TTLS, config.DB_CACHE_MAX_ENTRIES))
     db_handler = DatabaseHandler(db)
-    command_handler = CommandHandler(db_handler)
-    return create_cli(command_handler)
+
+    write_buffer = None
+    if config.WRITE_BUFFER_ENABLED:
+        from database.write_buffer import WriteBehindBuffer
+        write_buffer = WriteBehindBuffer(
+            db, config.WRITE_BUFFER_SPOOL, config.WRITE_BUFFER_BATCH, config.WRITE_BUFFER_INTERVAL,
+            config.WRITE_BUFFER_MAX_PENDING, config.WRITE_BUFFER_BLOCK_TIMEOUT, config.WRITE_BUFFER_FSYNC)
+    return CommandHandler(db_handler, write_buffer)
+
+
+def create_app():
+    return create_cli(create_command_handler)
 
 
 if __name__ == '__main__':
@@ -19,7 +19,11 @@ class DatabaseInput(BaseModel):
 
 class DatabaseTool(StructuredTool):
     name: str = "database_tool"
-    description: str = "Use this tool to interact with the database. Available actions: insert_one, insert_many, find_one, find_many, update_one, update_many, delete_one, delete_many, count_documents"
+    description: str = ("Use this tool to interact with the database. Available actions: insert_one, insert_many, find_one, find_many, update_one, update_many, delete_one, delete_many, count_documents, bulk_write. "
+        "For bulk_write pass data={\"operations\": [{\"op\": \"insert_one\", \"document\": {...}}, "
+        "{\"op\": \"update_one\", \"filter\": {...}, \"update\": {\"$set\": {...}}}, "
+        "{\"op\": \"delete_one\", \"filter\": {...}}]} to write many records in one call; "
+        "failures are reported per operation index")
     args_schema: Type[BaseModel] = DatabaseInput
     _db_handler: DatabaseHandler = PrivateAttr()
 
@@ -40,6 +44,8 @@ class DatabaseTool(StructuredTool):
 
             if action == 'find_many':
                 result = method(collection, data, limit)
+            elif action == 'bulk_write':
+                result = method(collection, data.get("operations", []))
             elif action in ['insert_many', 'update_many', 'delete_many']:
                 result = method(collection, data)
             else:
@@ -0,0 +1,100 @@
+# src/utils/model_benchmark.py
+#
+# Hydration benchmark for the slotted models. Run from src/:
+#   python -m utils.model_benchmark [count]
+# Compares the old __dict__ model built with Model(**doc) (bare, and with the
+# dict snapshot dirty tracking used to take) against the generated codec
+# (from_dict, and from_document with its lazy snapshot) and the zero-copy
+# view, over `count` log documents (default 100k). Times are the best of
+# `repeat` runs with the garbage collector off.
+
+import copy
+import gc
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+
+from bson import ObjectId
+
+from database.models.log import Log
+
+
+class DictLog:
+    """The pre-slots Log model, kept here as the baseline."""
+
+    def __init__(self, user_id, entry, project_id=None, skill_id=None, tags=None, timestamp=None, _id=None):
+        self._id = _id if _id else ObjectId()
+        self.user_id = user_id
+        self.timestamp = timestamp if timestamp else datetime.utcnow()
+        self.entry = entry
+        self.project_id = project_id
+        self.skill_id = skill_id
+        self.tags = tags if tags else []
+
+    def to_dict(self):
+        return {"_id": self._id, "user_id": self.user_id, "timestamp": self.timestamp,
+                "entry": self.entry, "project_id": self.project_id,
+                "skill_id": self.skill_id, "tags": self.tags}
+
+
+def tracked_dict_log(document: Dict[str, Any]) -> DictLog:
+    log = DictLog(**document)
+    log.snapshot = {key: copy.deepcopy(value) if isinstance(value, (list, dict)) else value
+                    for key, value in log.to_dict().items()}
+    return log
+
+
+def make_documents(count: int) -> List[Dict[str, Any]]:
+    user_id = ObjectId()
+    start = datetime(2024, 1, 1)
+    return [{"_id": ObjectId(), "user_id": user_id, "timestamp": start + timedelta(minutes=i),
+             "entry": f"log entry number {i}", "project_id": None, "skill_id": None,
+             "tags": ["work"] if i % 3 == 0 else []}
+            for i in range(count)]
+
+
+def measure(hydrate: Callable[[Dict[str, Any]], Any], documents: List[Dict[str, Any]],
+            repeat: int = 5) -> Tuple[float, float]:
+    """Return (seconds to hydrate all documents, bytes allocated per object)."""
+    elapsed = float("inf")
+    # As timeit does, keep collector pauses out of the timings
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for document in documents:
+                hydrate(document)
+            elapsed = min(elapsed, time.perf_counter() - start)
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [hydrate(document) for document in documents]
+    per_object = (tracemalloc.get_traced_memory()[0] - before) / len(kept)
+    tracemalloc.stop()
+    return elapsed, per_object
+
+
+def run(count: int = 100_000) -> List[Tuple[str, float, float]]:
+    documents = make_documents(count)
+    candidates = [
+        ("dict model, Model(**doc)", lambda document: DictLog(**document)),
+        ("dict model + dict snapshot", tracked_dict_log),
+        ("slots codec, from_dict", Log.from_dict),
+        ("slots codec, from_document", Log.from_document),
+        ("view", Log.view),
+    ]
+    return [(label, *measure(hydrate, documents)) for label, hydrate in candidates]
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    results = run(count)
+    baseline = results[0][1]
+    print(f"Hydrating {count} log documents")
+    for label, elapsed, per_object in results:
+        print(f"  {label:<28} {elapsed * 1000:8.1f}ms  {per_object:6.0f} B/object"
+              f"  ({baseline / elapsed:.1f}x)")
@@ -0,0 +1,68 @@
+# src/utils/startup_check.py
+#
+# Cold-start budget check for the CLI entry point. Run from src/:
+#   python -m utils.startup_check
+# Exits non-zero when importing `main` takes longer than IMPORT_BUDGET_MS or
+# pulls in one of the heavy dependencies that should only load on demand.
+
+import os
+import re
+import subprocess
+import sys
+from typing import List, Tuple
+
+from config import IMPORT_BUDGET_MS
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be imported just to parse argv
+HEAVY_MODULES = ["langchain", "langchain_core", "langchain_anthropic",
+                 "langgraph", "anthropic", "pymongo"]
+
+_IMPORTTIME_LINE = re.compile(
+    r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+
+def measure_import_time(module: str = "main", runs: int = 3) -> float:
+    """Return the best cumulative import time of `module` in milliseconds."""
+    best = None
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=SRC_DIR, capture_output=True, text=True, check=True)
+        for line in proc.stderr.splitlines():
+            match = _IMPORTTIME_LINE.match(line)
+            if match and match.group(2) == module:
+                elapsed = int(match.group(1)) / 1000.0
+                best = elapsed if best is None else min(best, elapsed)
+    if best is None:
+        raise RuntimeError(f"Could not measure import time of '{module}'")
+    return best
+
+
+def find_heavy_imports(module: str = "main") -> List[str]:
+    probe = (f"import sys, {module}; "
+             f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    proc = subprocess.run([sys.executable, "-c", probe], cwd=SRC_DIR,
+                          capture_output=True, text=True, check=True)
+    return [m for m in proc.stdout.strip().split(",") if m]
+
+
+def check_startup(budget_ms: float = IMPORT_BUDGET_MS) -> Tuple[bool, str]:
+    elapsed = measure_import_time()
+    heavy = find_heavy_imports()
+    problems = []
+    if elapsed > budget_ms:
+        problems.append(
+            f"import main took {elapsed:.1f}ms (budget {budget_ms:.0f}ms)")
+    if heavy:
+        problems.append(f"heavy modules imported eagerly: {', '.join(heavy)}")
+    if problems:
+        return False, "; ".join(problems)
+    return True, f"import main took {elapsed:.1f}ms (budget {budget_ms:.0f}ms)"
+
+
+if __name__ == '__main__':
+    ok, message = check_startup()
+    print(("OK: " if ok else "FAIL: ") + message)
+    sys.exit(0 if ok else 1)
@@ -6,6 +6,7 @@ from langgraph.prebuilt import ToolExecutor
 from langgraph.prebuilt.tool_node import tools_condition
 from langgraph.graph.message import add_messages
 import os
+from config import MODEL_SMALL
 
 
 class AgentState(TypedDict):
@@ -16,7 +17,7 @@ def create_chat_workflow(db_handler):
     anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
 
     chat_model = ChatAnthropic(
-        model="claude-3-haiku-20240307", anthropic_api_key=anthropic_api_key)
+        model=MODEL_SMALL, anthropic_api_key=anthropic_api_key)
 
     # Assuming DatabaseTool is a subclass of BaseTool
     database_tool = DatabaseTool(db_handler)
@@ -5,10 +5,11 @@ from langgraph.prebuilt import ToolExecutor
 from langchain.schema import HumanMessage, SystemMessage
 from langchain.chat_models import ChatAnthropic
 from utils.database_tool import DatabaseTool
+from config import MODEL_SMALL
 
 
 def create_onboarding_workflow(db_handler):
-    chat_model = ChatAnthropic(model="claude-3-haiku-20240307")
+    chat_model = ChatAnthropic(model=MODEL_SMALL)
     database_tool = DatabaseTool(db_handler)
     tool_executor = ToolExecutor(tools=[database_tool])
 
@@ -0,0 +1,34 @@
+# tests/test_bulk.py
+
+import pytest
+from bson import ObjectId
+
+mongomock = pytest.importorskip("mongomock")
+
+from database import bulk
+from engine.command_router import CommandRouter
+
+
+@pytest.fixture
+def database():
+    database = mongomock.MongoClient().db
+    database.users.insert_one({"username": "dave"})
+    return database
+
+
+def test_bulk_delete_reports_malformed_ids_per_item(database):
+    kept, gone = ObjectId(), ObjectId()
+    database.tasks.insert_many([{"_id": kept}, {"_id": gone}])
+    summary = bulk.bulk_delete(database.tasks, ["nope", gone, None])
+    assert summary["deleted"] == 1
+    assert [(error["index"], error["_id"]) for error in summary["errors"]] == [(0, "nope"), (2, "None")]
+    assert [task["_id"] for task in database.tasks.find()] == [kept]
+
+
+def test_task_import(database):
+    router = CommandRouter(database)
+    result = router.dispatch("task", {"action": "import", "names": ["Write report", "", "  Read  "]})
+    assert result["data"] == "Imported 2 of 2 tasks"
+    assert sorted(task["name"] for task in database.tasks.find()) == ["Read", "Write report"]
+    # The name index hears about the new tasks
+    assert router.names.complete("task", router.user_id, "") == ["Read", "Write report"]
@@ -0,0 +1,25 @@
+# tests/test_cache.py
+
+import pytest
+from pymongo import MongoClient
+
+from database.cache import CachedCollection, CachedDatabase
+
+
+def test_only_collections_are_wrapped():
+    # connect=False: building a Database and its collections needs no server
+    cached = CachedDatabase(MongoClient(connect=False)["hal"])
+    assert isinstance(cached.tasks, CachedCollection)
+    assert isinstance(cached.client, MongoClient)
+
+
+def test_misses_are_not_cached():
+    mongomock = pytest.importorskip("mongomock")
+    database = mongomock.MongoClient().db
+    cached = CachedDatabase(database)
+    assert cached["users"].find_one({"username": "dave"}) is None
+    # Inserted by another process, behind the cache's back
+    database.users.insert_one({"username": "dave"})
+    assert cached["users"].find_one({"username": "dave"})["username"] == "dave"
+    assert cached["users"].find_one({"username": "dave"}) is not None
+    assert cached.cache.stats()["hits"] == 1
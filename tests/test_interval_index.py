@@ -0,0 +1,32 @@
+# tests/test_interval_index.py
+
+import random
+
+from engine.interval_index import IntervalIndex
+
+
+def test_push_back_stops_where_there_is_slack():
+    slots = IntervalIndex([(9, 10, "a"), (10, 11, "b"), (13, 14, "c")])
+    # Something new now runs until 10.5: "a" and "b" move, "c" has room
+    moved = slots.push_back(9, 10.5)
+    assert moved == [(10.5, 11.5, "a"), (11.5, 12.5, "b")]
+    assert list(slots) == [(10.5, 11.5, "a"), (11.5, 12.5, "b"), (13, 14, "c")]
+
+
+def test_queries_match_brute_force_after_changes():
+    rng = random.Random(7)
+    intervals = []
+    for _ in range(200):
+        start = rng.randrange(0, 1000)
+        intervals.append((start, start + rng.randrange(1, 60), len(intervals)))
+    index = IntervalIndex(intervals)
+    for _ in range(50):
+        start = rng.randrange(0, 1000)
+        index.insert(start, start + rng.randrange(1, 60), len(index))
+        at = rng.randrange(0, 1000)
+        index.push_back(at, at + rng.randrange(0, 30))
+        items = list(index)
+        assert [item[0] for item in items] == sorted(item[0] for item in items)
+        query = rng.randrange(0, 1100)
+        expected = sorted(item for item in items if item[0] < query + 20 and item[1] > query)
+        assert sorted(index.overlapping(query, query + 20)) == expected
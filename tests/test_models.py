@@ -0,0 +1,45 @@
+# tests/test_models.py
+
+from datetime import datetime
+
+from bson import ObjectId
+
+from database.models.routine import Routine
+from database.models.task import Task
+
+
+def task_document(**fields):
+    return {"_id": ObjectId(), "user_id": ObjectId(), "name": "Write report", "description": "",
+            "status": "pending", "priority": "medium", "due_date": None,
+            "created_at": datetime(2024, 1, 1), "tags": ["work"], **fields}
+
+
+def test_loaded_model_is_clean():
+    document = task_document()
+    del document["tags"]  # defaulted fields may be missing from older documents
+    task = Task.from_document(document)
+    assert task.tags == []
+    assert task.changes() == {}
+
+
+def test_in_place_edits_are_changes():
+    document = task_document()
+    task = Task.from_document(document)
+    task.tags.append("urgent")
+    task.status = "completed"
+    assert task.changes() == {"$push": {"tags": {"$each": ["urgent"]}}, "$set": {"status": "completed"}}
+    assert document["tags"] == ["work"]
+    assert task.original("status") == "pending"
+    task.mark_clean()
+    assert task.changes() == {}
+    task.tags.remove("work")
+    assert task.changes() == {"$pull": {"tags": {"$in": ["work"]}}}
+
+
+def test_encoded_fields_are_clean_after_load():
+    task_id = ObjectId()
+    routine = Routine.from_document({"_id": ObjectId(), "user_id": ObjectId(), "name": "Morning",
+                                     "task_ids": [task_id]})
+    assert routine.changes() == {}
+    routine.task_ids.append(ObjectId())
+    assert list(routine.changes()) == ["$push"]
@@ -0,0 +1,84 @@
+# tests/test_name_lookup.py
+
+import pytest
+from bson import ObjectId
+
+mongomock = pytest.importorskip("mongomock")
+
+from database.cache import CachedDatabase
+from engine.command_router import CommandError, CommandRouter
+
+
+@pytest.fixture
+def database():
+    database = mongomock.MongoClient().db
+    database.users.insert_one({"username": "dave"})
+    return database
+
+
+def add_task(database, name):
+    user = database.users.find_one()
+    database.tasks.insert_one({"_id": ObjectId(), "user_id": user["_id"], "name": name})
+
+
+def task_names(database):
+    return sorted(task["name"] for task in database.tasks.find())
+
+
+def test_delete_needs_the_whole_name(database):
+    router = CommandRouter(database)
+    add_task(database, "Write report")
+    with pytest.raises(CommandError, match="did you mean 'Write report'"):
+        router.task_delete({"name": "Write"})
+    router.task_delete({"name": "write REPORT"})
+    assert task_names(database) == []
+
+
+def test_exact_name_wins_over_stale_index(database):
+    router = CommandRouter(database)
+    add_task(database, "Write report")
+    assert router.names.complete("task", router.user_id, "") == ["Write report"]
+    # Another process adds the exact name; this index never hears of it
+    add_task(database, "Write")
+    router.task_delete({"name": "Write"})
+    assert task_names(database) == ["Write report"]
+
+
+def test_prefix_only_for_lookups(database):
+    router = CommandRouter(database)
+    add_task(database, "Write report")
+    task = router._find_named("task", router.tasks, "wri", prefix=True)
+    assert task.name == "Write report"
+    with pytest.raises(CommandError):
+        router._find_named("task", router.tasks, "wri")
+
+
+def test_writes_through_cached_database_drop_names(database):
+    cached = CachedDatabase(database)
+    router = CommandRouter(cached)
+    add_task(database, "Write report")
+    assert router.names.complete("task", router.user_id, "") == ["Write report"]
+    # A write that bypasses the repositories, as the database tool does
+    cached["tasks"].update_one({"name": "Write report"}, {"$set": {"name": "Read report"}})
+    assert router.names.complete("task", router.user_id, "") == ["Read report"]
+
+
+def test_duplicate_names_are_ambiguous(database):
+    router = CommandRouter(database)
+    add_task(database, "Write report")
+    add_task(database, "Write report")
+    with pytest.raises(CommandError, match="matches several tasks"):
+        router.task_delete({"name": "Write report"})
+    assert task_names(database) == ["Write report", "Write report"]
+
+
+def test_exact_name_is_resolved_by_the_index(database, monkeypatch):
+    router = CommandRouter(database)
+    add_task(database, "Write report")
+    router.names.complete("task", router.user_id, "")
+
+    def find_by_name(user_id, name):
+        raise AssertionError("exact names come from the index")
+
+    monkeypatch.setattr(router.tasks, "find_by_name", find_by_name)
+    assert router._find_named("task", router.tasks, "write report").name == "Write report"
@@ -0,0 +1,44 @@
+# tests/test_recurrence.py
+
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from engine.recurrence import InvalidRecurrence, OccurrenceCache, RecurrenceRule, parse_rule
+
+
+def test_parse_rule_reads_supported_parts():
+    assert parse_rule("RRULE:FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH;UNTIL=20261231") == {
+        "freq": "weekly", "interval": 2, "days": ["mo", "th"], "until": "20261231"}
+
+
+@pytest.mark.parametrize("rule", [
+    "FREQ=WEEKLY;COUNT=2;BYDAY=MO",     # would recur forever
+    "FREQ=MONTHLY;BYDAY=1MO",           # would fire on the 1st, whatever the weekday
+    "FREQ=MONTHLY;BYDAY=MO",
+    "FREQ=WEEKLY;BYDAY=-1FR",
+    "FREQ=MONTHLY;BYSETPOS=1;BYDAY=MO",
+    "FREQ=DAILY;BYHOUR=9",
+    "FREQ=DAILY;NONSENSE",
+])
+def test_parse_rule_rejects_what_it_cannot_honour(rule):
+    with pytest.raises(InvalidRecurrence):
+        parse_rule(rule)
+
+
+def test_monthly_entries_reject_weekdays():
+    with pytest.raises(InvalidRecurrence):
+        RecurrenceRule({"start": "09:00", "end": "10:00", "freq": "monthly", "days": ["mon"]})
+
+
+def test_weekly_rule_string():
+    rule = RecurrenceRule({"start": "09:00", "end": "09:15", "rule": "FREQ=WEEKLY;BYDAY=MO,TH"})
+    assert [rule.occurs_on(date(2026, 1, day)) for day in (5, 6, 8)] == [True, False, True]
+
+
+def test_cache_names_the_bad_entry():
+    protocol = SimpleNamespace(_id="p", last_updated=None, time_blocks=[], recurring_events=[
+        {"name": "Board meeting", "start": "09:00", "end": "10:00", "rule": "FREQ=MONTHLY;BYDAY=1MO"}])
+    with pytest.raises(InvalidRecurrence, match="Board meeting"):
+        OccurrenceCache().day(protocol, date(2026, 1, 5))
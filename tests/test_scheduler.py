@@ -0,0 +1,37 @@
+# tests/test_scheduler.py
+
+from datetime import datetime
+from types import SimpleNamespace
+
+from database.models.task import Task
+from engine.scheduler import IntervalSet, Scheduler
+
+
+def make_task(name, minutes, created_at):
+    return Task("user", name, "", "todo", "medium", None, estimated_time=minutes, created_at=created_at)
+
+
+def test_remove_returns_only_what_was_free():
+    free = IntervalSet([(0, 10), (20, 30)])
+    assert free.remove(5, 25) == [(5, 10), (20, 25)]
+    assert list(free) == [(0, 5), (25, 30)]
+    assert free.remove(40, 50) == []
+
+
+def test_rolled_back_task_does_not_free_busy_time():
+    protocol = SimpleNamespace(_id="p", last_updated=None, time_blocks=[], preferences={},
+                               recurring_events=[{"name": "Standup", "start": "10:00", "end": "10:15"}])
+    start = datetime(2026, 1, 5, 9, 0)
+    # Too long for one day: its blocks (and the breaks after them) are rolled back
+    too_long = make_task("Too long", 600, datetime(2026, 1, 1))
+    follow_up = make_task("Follow-up", 70, datetime(2026, 1, 2))
+
+    plan = Scheduler(protocol).plan([too_long, follow_up], start, days=1)
+
+    assert plan["unscheduled"] == [too_long]
+    entries = plan["entries"][datetime(2026, 1, 5)]
+    standup_start, standup_end = datetime(2026, 1, 5, 10, 0), datetime(2026, 1, 5, 10, 15)
+    for entry in entries:
+        assert entry["end_time"] <= standup_start or entry["start_time"] >= standup_end
+    # 8h window minus the standup, minus the follow-up and its break
+    assert plan["free"].total_seconds() == (8 * 60 - 15 - 70 - 10) * 60